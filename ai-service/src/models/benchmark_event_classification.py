@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-event classification cost
+Compares the keyword automaton against the old per-keyword substring scans
+on date contexts extracted from the bundled test PDFs.
+
+Usage: python benchmark_event_classification.py [--pdf path ...] [--repeat N]
+"""
+
+import re
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from timeline_analyzer import DateExtractor, PyPDFLoader
+
+
+def legacy_event_scores(context_lower: str) -> dict:
+    """Substring scan of every EVENT_KEYWORDS entry (pre-automaton behaviour)"""
+    scores = {}
+    for event_type, keywords in DateExtractor.EVENT_KEYWORDS.items():
+        score = sum(len(kw.split()) for kw in keywords if kw in context_lower)
+        if score > 0:
+            scores[event_type] = score
+    return scores
+
+
+def legacy_classify(context: str) -> str:
+    """classify_event_type as it was: one substring test per keyword and indicator"""
+    context_lower = context.lower()
+    if DateExtractor._is_filler_context(context_lower):
+        return 'other'
+    scores = legacy_event_scores(context_lower)
+    if not scores:
+        return 'other'
+    event_type = max(scores.items(), key=lambda x: x[1])[0]
+    if event_type in DateExtractor.EVENT_VALIDATORS:
+        if any(indicator in context_lower for indicator in DateExtractor.HEADER_INDICATORS) or \
+                any(re.search(p, context_lower, re.IGNORECASE) for p in DateExtractor.HEADER_CONTEXT_PATTERNS):
+            return 'other'
+    return event_type
+
+
+def load_contexts(pdf_paths) -> list:
+    contexts = []
+    for pdf_path in pdf_paths:
+        try:
+            pages = PyPDFLoader(str(pdf_path)).load()
+        except Exception as e:
+            print(f"Skipping {pdf_path.name}: {e}", file=sys.stderr)
+            continue
+        text = "\n\n--- PAGE BREAK ---\n\n".join(page.page_content for page in pages)
+        contexts.extend(context for _, context, _ in DateExtractor.extract_dates_from_text(text))
+    return contexts
+
+
+def time_per_event(func, contexts, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for context in contexts:
+            func(context)
+    return (time.perf_counter() - start) / (repeat * len(contexts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event classification microbenchmark")
+    parser.add_argument("--pdf", nargs="*", help="PDF files (default: src/test_pdf/*.pdf)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pdf_paths = [Path(p) for p in args.pdf] if args.pdf else sorted((Path(__file__).parent.parent / "test_pdf").glob("*.pdf"))
+    contexts = [context.lower() for context in load_contexts(pdf_paths)]
+    if not contexts:
+        print("No dated contexts found")
+        return 1
+
+    automaton = DateExtractor._EVENT_AUTOMATON
+
+    # Same results before timing anything
+    for context in contexts:
+        assert legacy_event_scores(context) == automaton.score(context)
+        assert legacy_classify(context) == DateExtractor.classify_event_type(context)
+
+    avg_len = sum(len(c) for c in contexts) / len(contexts)
+    print(f"Events: {len(contexts)} (avg context {avg_len:.0f} chars), repeat={args.repeat}")
+    print(f"Keywords: {len(automaton.keywords)}")
+    rows = [
+        ("event type scores", legacy_event_scores, automaton.score),
+        ("classify_event_type", legacy_classify, DateExtractor.classify_event_type),
+    ]
+    for label, legacy, current in rows:
+        legacy_us = time_per_event(legacy, contexts, args.repeat)
+        current_us = time_per_event(current, contexts, args.repeat)
+        print(f"{label:<20} substring scan {legacy_us:8.1f} us/event   automaton {current_us:8.1f} us/event")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
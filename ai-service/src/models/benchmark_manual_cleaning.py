@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: manual timeline cleaning (the Gemini fallback)
+Times clean_events_manually (one substitution pass over all contexts) against
+cleaning event by event over a synthetic timeline and, with --baseline, checks
+the output against clean_event_manually from an earlier git revision.
+
+Usage: python benchmark_manual_cleaning.py [--events N] [--repeat N] [--baseline REV]
+"""
+
+import sys
+import time
+import random
+import argparse
+import subprocess
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import refactor_timeline_cli as refactor
+
+EVENT_TYPES = ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment', 'Court Proceeding',
+               'Maintenance Order', 'Filing', 'Compliance Filing', 'Statutory Amendment', 'Legal Event']
+
+PHRASES = [
+    'MANU/SC/0833/2020', 'https://www.manupatra.com/doc?id=42', '--- PAGE BREAK ---',
+    'The Family Court awarded interim maintenance of Rs. 15,000 per month to the wife from 01.09.2013.',
+    'The appellant challenged the order of the High Court, which had affirmed the decree.',
+    'The Court held that passport impounding without reasons violates Article 21 of the Constitution.',
+    'The Court directed the respondent to file an affidavit disclosing assets within 4 weeks.',
+    'Section 24 of the Hindu Marriage Act was amended w.e.f. 24.09.2001 to insert a proviso.',
+    'Maneka Gandhi v. Union of India was decided by a bench of seven judges.',
+    'Arrears of Rs. 2,40,000 remained unpaid and the husband sought more time.',
+    'The writ petition was filed under Article 32 and heard in the Supreme Court.',
+    'The matter was decided after the decision in the earlier appeal.',
+    'There was a violation of the principles of natural justice.',
+    'A compliance affidavit was filed by the applicant.',
+]
+
+
+def synthetic_timeline(n_events: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    timeline = []
+    for idx in range(n_events):
+        date = f"{rng.randint(1950, 2023)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00"
+        context = ' '.join(rng.choice(PHRASES) for _ in range(rng.randint(0, 8)))
+        timeline.append({
+            'id': f"{date}_{idx}",
+            'date': date,
+            'eventType': rng.choice(EVENT_TYPES),
+            'eventName': 'Event',
+            'context': context,
+            'summary': '',
+        })
+    return timeline
+
+
+def load_baseline(rev: str) -> types.ModuleType:
+    """Load refactor_timeline_cli as it was at a git revision"""
+    path = Path(refactor.__file__).resolve()
+    repo = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=path.parent,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    source = subprocess.run(['git', 'show', f"{rev}:{path.relative_to(repo).as_posix()}"], cwd=repo,
+                            capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType('refactor_timeline_cli_baseline')
+    module.__file__ = str(path)
+    exec(compile(source, f"{rev}:refactor_timeline_cli.py", 'exec'), module.__dict__)
+    return module
+
+
+def time_ms(func, timeline, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(timeline)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manual cleaning microbenchmark")
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=str, help="Git revision to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    timeline = synthetic_timeline(args.events)
+    print(f"Events: {len(timeline)}, repeat={args.repeat}")
+
+    current_ms = time_ms(refactor.clean_events_manually, timeline, args.repeat)
+    print(f"clean_events_manually      {current_ms:8.1f} ms/timeline  {current_ms * 1000 / len(timeline):6.1f} us/event")
+    single_ms = time_ms(lambda events: [refactor.clean_event_manually(e) for e in events], timeline, args.repeat)
+    print(f"clean_event_manually       {single_ms:8.1f} ms/timeline  {single_ms * 1000 / len(timeline):6.1f} us/event")
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        mismatches = sum(
+            1 for event, cleaned in zip(timeline, refactor.clean_events_manually(timeline))
+            if baseline.clean_event_manually(event) != cleaned
+        )
+        baseline_ms = time_ms(lambda events: [baseline.clean_event_manually(e) for e in events],
+                              timeline, args.repeat)
+        print(f"{args.baseline} clean_event_manually {baseline_ms:8.1f} ms/timeline  "
+              f"{baseline_ms * 1000 / len(timeline):6.1f} us/event")
+        print(f"Output mismatches vs {args.baseline}: {mismatches}")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF text extraction backends
+Pages per second for every installed backend on the bundled test PDFs, plus
+text fidelity against pypdf (the PyPDFLoader engine): page count agreement and
+word-level F1 per document.
+
+Usage: python benchmark_pdf_backends.py [--pdf path ...] [--backends pdfium mupdf pypdf]
+"""
+
+import re
+import sys
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from page_stream import iter_pdf_pages
+from pdf_backends import EXTRACTION_BACKENDS
+
+WORD_RE = re.compile(r'\w+')
+
+
+def word_f1(reference: str, candidate: str) -> float:
+    """Overlap of word multisets: 1.0 means the same words, whatever the layout"""
+    ref = Counter(WORD_RE.findall(reference.lower()))
+    cand = Counter(WORD_RE.findall(candidate.lower()))
+    if not ref and not cand:
+        return 1.0
+    common = sum((ref & cand).values())
+    if not common:
+        return 0.0
+    precision = common / sum(cand.values())
+    recall = common / sum(ref.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def extract(pdf_path: Path, backend: str):
+    start = time.perf_counter()
+    pages = [page.page_content for page in iter_pdf_pages(str(pdf_path), backend=backend)]
+    return pages, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF text backend benchmark")
+    parser.add_argument("--pdf", nargs="*", help="PDF files (default: src/test_pdf/*.pdf)")
+    parser.add_argument("--backends", nargs="*", help="Backends to compare (default: all installed)")
+    args = parser.parse_args()
+
+    pdf_paths = [Path(p) for p in args.pdf] if args.pdf else sorted((Path(__file__).parent.parent / "test_pdf").glob("*.pdf"))
+    backends = args.backends or [name for name, backend in EXTRACTION_BACKENDS.items() if backend.available()]
+    if 'pypdf' not in backends:
+        backends.append('pypdf')
+    print(f"Backends: {', '.join(backends)}")
+
+    totals = {name: [0, 0.0] for name in backends}
+    print(f"\n{'document':<34}{'backend':<8}{'pages':>6}{'pages/s':>10}{'word F1':>9}")
+    for pdf_path in pdf_paths:
+        try:
+            reference, _ = extract(pdf_path, 'pypdf')
+        except Exception as e:
+            print(f"Skipping {pdf_path.name}: {e}", file=sys.stderr)
+            continue
+        for name in backends:
+            pages, seconds = extract(pdf_path, name)
+            totals[name][0] += len(pages)
+            totals[name][1] += seconds
+            same_pages = 'ok' if len(pages) == len(reference) else f'{len(reference)} expected'
+            f1 = word_f1('\n'.join(reference), '\n'.join(pages))
+            print(f"{pdf_path.name[:32]:<34}{name:<8}{len(pages):>6}{len(pages) / seconds:>10.1f}{f1:>9.3f}  {same_pages}")
+
+    print()
+    base_rate = totals['pypdf'][0] / totals['pypdf'][1]
+    for name, (pages, seconds) in totals.items():
+        rate = pages / seconds
+        print(f"{name:<8} {pages} pages in {seconds:6.2f}s  {rate:8.1f} pages/s  {rate / base_rate:5.1f}x pypdf")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential vs multi-process PDF text extraction
+Times PyPDFLoader.load() against iter_pdf_pages_parallel (pypdf backend) at
+several worker counts and checks that every run returns the same pages and metadata.
+
+Usage: python benchmark_pdf_parsing.py [--pdf path] [--workers 1 2 4]
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from langchain_community.document_loaders import PyPDFLoader
+
+from page_stream import iter_pdf_pages_parallel
+
+DEFAULT_PDF = Path(__file__).parent.parent / "test_pdf" / "Suprme-Court-Judgement_-Kesavananda-Bharati-v-State-of-Kerala-1973.pdf"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF parsing benchmark")
+    parser.add_argument("--pdf", type=str, default=str(DEFAULT_PDF))
+    parser.add_argument("--workers", type=int, nargs="*", help="Worker counts to try (default: 1, 2 and all cores)")
+    args = parser.parse_args()
+
+    worker_counts = args.workers or sorted({1, 2, os.cpu_count() or 1})
+    print(f"PDF: {Path(args.pdf).name} (cpu_count={os.cpu_count()})")
+
+    start = time.perf_counter()
+    expected = PyPDFLoader(args.pdf).load()
+    baseline = time.perf_counter() - start
+    print(f"PyPDFLoader.load()         {baseline:7.2f}s  {len(expected)} pages")
+
+    ok = True
+    for workers in worker_counts:
+        start = time.perf_counter()
+        pages = list(iter_pdf_pages_parallel(args.pdf, workers=workers, backend='pypdf'))
+        elapsed = time.perf_counter() - start
+        same = pages == expected
+        ok = ok and same
+        print(f"parallel workers={workers:<3}      {elapsed:7.2f}s  {baseline / elapsed:5.2f}x  "
+              f"{'identical' if same else 'MISMATCH'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
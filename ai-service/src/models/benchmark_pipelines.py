@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Benchmark: end-to-end pipelines with the offline LLM stand-in
+Runs LegalDocSummarizer.process_full_pipeline, ContractAnalyzer.analyze_contract
+and the timeline flow (TimelineAnalyzer + refactor_timeline_cli) over the test
+PDFs with LLM_PROVIDER=fake, and prints per-stage wall time, CPU time, peak RSS
+and simulated LLM time as JSON. Each (pipeline, PDF) run is a fresh process
+with its own empty document registry and contract cache, so numbers include
+PDF parsing and every LLM call, and peak RSS is that run's own. With the default zero latency, wall time is all ours.
+Case stages run as a dependency graph (vector_store alongside summarize), so
+their windows, CPU time and LLM calls overlap; run totals are exact.
+
+Usage: python benchmark_pipelines.py [--pdf path ...] [--pipelines case contract timeline]
+                                     [--latency SPEC] [--error-rate P] [--seed N] [--warm] [--output FILE]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import contextlib
+from pathlib import Path
+from datetime import datetime, timezone
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+PIPELINES = ('case', 'contract', 'timeline')
+TEST_PDF_DIR = Path(__file__).parent.parent / "test_pdf"
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _cpu_seconds() -> float:
+    """CPU time of this process and its finished children (PDF worker pools)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class StageRecorder:
+    """Per-stage wall time, CPU time, peak RSS so far and LLM calls from the token ledger"""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name: str, optional: bool = False):
+        from token_estimator import LEDGER
+        first_call = len(LEDGER.calls)
+        wall, cpu = time.perf_counter(), _cpu_seconds()
+        entry = {'stage': name}
+        try:
+            yield entry
+        except Exception as e:
+            entry['error'] = f"{type(e).__name__}: {e}"
+            if not optional:
+                raise
+        finally:
+            calls = LEDGER.calls[first_call:]
+            entry.update({
+                'wall_s': round(time.perf_counter() - wall, 3),
+                'cpu_s': round(_cpu_seconds() - cpu, 3),
+                'peak_rss_mb': _peak_rss_mb(),
+                'llm_calls': len(calls),
+                'llm_ms': round(sum(c['latency_ms'] for c in calls), 1),
+                'prompt_tokens': sum(c['prompt_tokens'] for c in calls),
+            })
+            self.stages.append(entry)
+
+    def wrap(self, obj, method: str, stage: str, optional: bool = False):
+        """Time obj.method under stage every time the pipeline calls it"""
+        original = getattr(obj, method)
+
+        def timed(*args, **kwargs):
+            with self.stage(stage, optional):
+                return original(*args, **kwargs)
+        setattr(obj, method, timed)
+
+
+def run_case(pdf: str, work_dir: Path, recorder: StageRecorder) -> str:
+    from case_analysis import LegalDocSummarizer
+    summarizer = LegalDocSummarizer(api_key='', cache_dir=str(work_dir / "case_cache"))
+    recorder.wrap(summarizer, 'load_document', 'load')
+    recorder.wrap(summarizer, 'chunk_document', 'chunk')
+    # Local embeddings need sentence-transformers and faiss; the run goes on without them
+    recorder.wrap(summarizer, 'create_vector_store', 'vector_store', optional=True)
+    recorder.wrap(summarizer, 'summarize_hierarchical', 'summarize')
+    recorder.wrap(summarizer, 'save_summaries', 'save')
+    recorder.wrap(summarizer, 'setup_qa_chain', 'qa_setup', optional=True)
+    summarizer.process_full_pipeline(pdf, chunk_size=10, output_dir=str(work_dir / "case_out"))
+    return 'ok'
+
+
+def run_contract(pdf: str, work_dir: Path, recorder: StageRecorder) -> str:
+    from contract_analysis import ContractAnalyzer
+    analyzer = ContractAnalyzer(api_key='')
+    recorder.wrap(analyzer, 'load_contract', 'load')
+    recorder.wrap(analyzer, 'is_contract_document', 'contract_check')
+    recorder.wrap(analyzer, 'chunk_contract', 'chunk')
+    recorder.wrap(analyzer, 'analyze_chunks_parallel', 'analyze_chunks')
+    recorder.wrap(analyzer, 'save_analysis', 'save')
+    try:
+        analyzer.analyze_contract(pdf, pages_per_chunk=3, output_dir=str(work_dir / "contract_out"))
+    except ValueError as e:
+        if "does not appear to be a contract" in str(e):
+            return 'not_a_contract'
+        raise
+    return 'ok'
+
+
+def run_timeline(pdf: str, work_dir: Path, recorder: StageRecorder) -> str:
+    from timeline_analyzer import TimelineAnalyzer
+    import refactor_timeline_cli
+    analyzer = TimelineAnalyzer()
+    recorder.wrap(analyzer, 'load_document', 'load')
+    recorder.wrap(analyzer, 'extract_timeline_events', 'extract')
+    result = analyzer.analyze_document(pdf)
+
+    # The refactor CLI as the backend runs it: timeline JSON on stdin, JSON on stdout
+    stdin, stdout = sys.stdin, sys.stdout
+    sys.stdin, sys.stdout = io.StringIO(json.dumps({'timeline': result.get('events', [])}, default=str)), io.StringIO()
+    try:
+        with recorder.stage('refactor'):
+            refactor_timeline_cli.main()
+        output = json.loads(sys.stdout.getvalue())
+    finally:
+        sys.stdin, sys.stdout = stdin, stdout
+    return 'ok' if 'error' not in output else f"refactor error: {output['error']}"
+
+
+RUNNERS = {'case': run_case, 'contract': run_contract, 'timeline': run_timeline}
+
+
+def run_one(pipeline: str, pdf: str, work_dir: Path) -> dict:
+    """One pipeline on one PDF in this process; pipeline output goes to stderr"""
+    from llm_provider import get_provider
+    recorder = StageRecorder()
+    run = {'pipeline': pipeline, 'pdf': Path(pdf).name, 'pages': None}
+    with contextlib.redirect_stdout(sys.stderr):
+        try:
+            with recorder.stage('total'):
+                run['status'] = RUNNERS[pipeline](pdf, work_dir, recorder)
+        except Exception as e:
+            run['status'] = f"error: {type(e).__name__}: {e}"
+    try:
+        from pypdf import PdfReader
+        run['pages'] = len(PdfReader(pdf).pages)
+    except Exception:
+        pass
+    provider = get_provider()
+    run['llm'] = {'calls': provider.calls, 'injected_429s': provider.errors}
+    # 'total' closes last; list it first
+    run['stages'] = recorder.stages[-1:] + recorder.stages[:-1]
+    return run
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark (offline LLM)")
+    parser.add_argument("--pdf", nargs="*", help="PDF files (default: src/test_pdf/*.pdf)")
+    parser.add_argument("--pipelines", nargs="*", choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--latency", default="0", help="Fake LLM latency spec, e.g. fixed:800 or lognormal:900,0.5 (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake LLM calls failing with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warm", action="store_true", help="Use the shared document registry and offline contract cache instead of cold ones")
+    parser.add_argument("--output", type=str, help="Write the JSON report here as well as to stdout")
+    parser.add_argument("--run-one", nargs=3, metavar=("PIPELINE", "PDF", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        pipeline, pdf, work_dir = args.run_one
+        print(json.dumps(run_one(pipeline, pdf, Path(work_dir))))
+        return 0
+
+    pdf_paths = [Path(p) for p in args.pdf] if args.pdf else sorted(TEST_PDF_DIR.glob("*.pdf"))
+    env = dict(os.environ, LLM_PROVIDER='fake', FAKE_LLM_LATENCY=args.latency,
+               FAKE_LLM_429_RATE=str(args.error_rate), FAKE_LLM_SEED=str(args.seed))
+    runs = []
+    for pdf in pdf_paths:
+        for pipeline in args.pipelines:
+            work_dir = Path(tempfile.mkdtemp(prefix=f"bench_{pipeline}_"))
+            try:
+                # A private copy keeps sidecar caches out of test_pdf
+                pdf_copy = work_dir / pdf.name
+                shutil.copy(pdf, pdf_copy)
+                run_env = dict(env) if args.warm else dict(env, DOCUMENT_REGISTRY_DIR=str(work_dir / "registry"),
+                                                            CONTRACT_CACHE_DIR=str(work_dir / "contract_cache"))
+                proc = subprocess.run([sys.executable, __file__, '--run-one', pipeline, str(pdf_copy), str(work_dir)],
+                                      env=run_env, capture_output=True, text=True)
+                try:
+                    run = json.loads(proc.stdout.strip().splitlines()[-1])
+                except (IndexError, ValueError):
+                    run = {'pipeline': pipeline, 'pdf': pdf.name,
+                           'status': f"crashed (exit {proc.returncode}): {proc.stderr.strip()[-300:]}"}
+            finally:
+                shutil.rmtree(work_dir, ignore_errors=True)
+            total = next((s for s in run.get('stages', []) if s['stage'] == 'total'), {})
+            print(f"{pipeline:<9} {pdf.name[:48]:<48} {run['status'][:24]:<24} "
+                  f"{total.get('wall_s', 0):7.2f}s wall {total.get('cpu_s', 0):7.2f}s cpu "
+                  f"{total.get('peak_rss_mb', 0):7.1f} MB", file=sys.stderr)
+            runs.append(run)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+        'llm': {'provider': 'fake', 'latency': args.latency, 'error_rate': args.error_rate, 'seed': args.seed},
+        'registry': 'warm' if args.warm else 'cold',
+        'runs': runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding='utf-8')
+    print(text)
+    return 0 if all(not r['status'].startswith(('error', 'crashed')) for r in runs) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
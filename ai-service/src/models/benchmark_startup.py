@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: CLI cold start
+Every request spawns a fresh CLI process, so import time is paid per request.
+Times a fresh interpreter importing each *_cli.py module (median of --repeat
+runs), counts the modules loaded and flags heavy dependencies loaded before
+any work starts. With --baseline REF the same CLIs are measured at that git
+revision too (extracted with git archive), for a before/after table.
+
+Usage: python benchmark_startup.py [--repeat 5] [--cli summarize_cli qa_cli] [--baseline HEAD~1] [--output report.json]
+"""
+
+import sys
+import json
+import time
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+MODELS_DIR = Path(__file__).resolve().parent
+# Should only load when a run actually needs them
+HEAVY_MODULES = ('google.generativeai', 'langchain_google_genai', 'langsmith', 'langchain_core.runnables',
+                 'faiss', 'sentence_transformers', 'torch', 'matplotlib')
+
+PROBE = """
+import sys, time, json
+sys.path.insert(0, sys.argv[2])
+start = time.perf_counter()
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - start
+print(json.dumps({'import_s': elapsed, 'modules': len(sys.modules),
+                  'heavy': [m for m in json.loads(sys.argv[3]) if m in sys.modules]}))
+"""
+
+
+def measure(cli: str, models_dir: Path, repeat: int) -> Dict:
+    """Median wall time of `python -c "import cli"` (interpreter start included) and the import alone"""
+    walls, imports, last = [], [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, '-c', PROBE, cli, str(models_dir), json.dumps(HEAVY_MODULES)],
+                              cwd=str(models_dir), capture_output=True, text=True)
+        walls.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            return {'cli': cli, 'error': (proc.stderr.strip().splitlines() or ['failed'])[-1]}
+        last = json.loads(proc.stdout.strip().splitlines()[-1])
+        imports.append(last['import_s'])
+    return {'cli': cli, 'wall_s': round(statistics.median(walls), 3), 'import_s': round(statistics.median(imports), 3),
+            'modules': last['modules'], 'heavy': last['heavy']}
+
+
+def extract_revision(ref: str, target: Path) -> Path:
+    """ai-service/src/models as of a git revision"""
+    top, prefix = subprocess.run(['git', 'rev-parse', '--show-toplevel', '--show-prefix'], cwd=str(MODELS_DIR),
+                                 capture_output=True, text=True, check=True).stdout.split('\n')[:2]
+    archive = target / 'models.tar'
+    with open(archive, 'wb') as f:
+        subprocess.run(['git', 'archive', ref, prefix], cwd=top, stdout=f, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(target)
+    return target / prefix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold-start benchmark")
+    parser.add_argument("--cli", nargs="*", help="CLI modules (default: every *_cli.py here)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=str, default=None, help="Git revision to compare against")
+    parser.add_argument("--output", type=str, help="Write the JSON report here as well as to stdout")
+    args = parser.parse_args()
+
+    clis = args.cli or sorted(path.stem for path in MODELS_DIR.glob('*_cli.py'))
+    report: Dict[str, List[Dict]] = {'current': [measure(cli, MODELS_DIR, args.repeat) for cli in clis]}
+    baseline: Optional[Dict[str, Dict]] = None
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            old_dir = extract_revision(args.baseline, Path(tmp))
+            report['baseline'] = [measure(cli, old_dir, args.repeat) if (old_dir / f"{cli}.py").exists()
+                                  else {'cli': cli, 'error': 'not in baseline'} for cli in clis]
+        baseline = {run['cli']: run for run in report['baseline']}
+
+    header = f"{'CLI':<24} {'wall':>7} {'import':>7} {'modules':>8}"
+    print((header + f" {'baseline':>9} {'speedup':>8}" if baseline else header) + "  heavy modules loaded", file=sys.stderr)
+    for run in report['current']:
+        if 'error' in run:
+            print(f"{run['cli']:<24} error: {run['error']}", file=sys.stderr)
+            continue
+        line = f"{run['cli']:<24} {run['wall_s']:>6.2f}s {run['import_s']:>6.2f}s {run['modules']:>8}"
+        if baseline:
+            old = baseline[run['cli']]
+            line += (f" {old['wall_s']:>8.2f}s {old['wall_s'] / run['wall_s']:>7.1f}x" if 'wall_s' in old
+                     else f" {'-':>9} {'-':>8}")
+        print(f"{line}  {', '.join(run['heavy']) or '-'}", file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: rule-based event summaries
+Times TimelineAnalyzer._create_summary_from_context on date contexts from the
+bundled test PDFs and prints a per-rule timing report from SUMMARY_RULES.
+With --baseline, also checks the summaries against an earlier git revision.
+
+Usage: python benchmark_summary_rules.py [--pdf path ...] [--repeat N] [--top N] [--baseline REV]
+"""
+
+import sys
+import time
+import types
+import argparse
+import subprocess
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+import timeline_analyzer
+from timeline_analyzer import DateExtractor, TimelineAnalyzer, SUMMARY_RULES, PyPDFLoader
+
+
+def load_events(pdf_paths) -> list:
+    """(date, context, event_type) for every dated context in the PDFs"""
+    analyzer = TimelineAnalyzer()
+    events = []
+    for pdf_path in pdf_paths:
+        try:
+            pages = PyPDFLoader(str(pdf_path)).load()
+        except Exception as e:
+            print(f"Skipping {pdf_path.name}: {e}", file=sys.stderr)
+            continue
+        text = "\n\n--- PAGE BREAK ---\n\n".join(page.page_content for page in pages)
+        for date_obj, context, _ in DateExtractor.extract_dates_from_text(text):
+            events.append((date_obj, context, analyzer._classify_event(context)))
+    return events
+
+
+def load_baseline(rev: str) -> types.ModuleType:
+    """Load timeline_analyzer as it was at a git revision"""
+    path = Path(timeline_analyzer.__file__).resolve()
+    repo = subprocess.run(['git', 'rev-parse', '--show-toplevel'], cwd=path.parent,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    source = subprocess.run(['git', 'show', f"{rev}:{path.relative_to(repo).as_posix()}"], cwd=repo,
+                            capture_output=True, text=True, check=True).stdout
+    module = types.ModuleType('timeline_analyzer_baseline')
+    module.__file__ = str(path)
+    exec(compile(source, f"{rev}:timeline_analyzer.py", 'exec'), module.__dict__)
+    return module
+
+
+def time_us(analyzer, events, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for date_obj, context, event_type in events:
+            analyzer._create_summary_from_context(date_obj, context, event_type)
+    return (time.perf_counter() - start) / (repeat * len(events)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summary rule microbenchmark")
+    parser.add_argument("--pdf", nargs="*", help="PDF files (default: src/test_pdf/*.pdf)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Rules to list in the timing report")
+    parser.add_argument("--baseline", type=str, help="Git revision to compare against (e.g. HEAD~1)")
+    args = parser.parse_args()
+
+    pdf_paths = [Path(p) for p in args.pdf] if args.pdf else sorted((Path(__file__).parent.parent / "test_pdf").glob("*.pdf"))
+    events = load_events(pdf_paths)
+    if not events:
+        print("No dated contexts found")
+        return 1
+
+    analyzer = TimelineAnalyzer()
+    print(f"Events: {len(events)}, repeat={args.repeat}, rules={len(SUMMARY_RULES.patterns)}")
+    print(f"_create_summary_from_context  {time_us(analyzer, events, args.repeat):8.1f} us/event")
+
+    # Per-rule report (one profiled pass; timing overhead is excluded from the numbers above)
+    SUMMARY_RULES.enable_profiling()
+    start = time.perf_counter()
+    for date_obj, context, event_type in events:
+        analyzer._create_summary_from_context(date_obj, context, event_type)
+    total = time.perf_counter() - start
+    rows = list(SUMMARY_RULES.report())
+    SUMMARY_RULES.disable_profiling()
+    print(f"\n{'rule':<26}{'calls':>8}{'total ms':>10}{'us/call':>9}{'share':>8}")
+    for name, calls, seconds in rows[:args.top]:
+        print(f"{name:<26}{calls:>8}{seconds * 1000:>10.2f}{seconds / calls * 1e6:>9.2f}{seconds / total:>8.1%}")
+    print(f"{'regex total':<26}{sum(r[1] for r in rows):>8}{sum(r[2] for r in rows) * 1000:>10.2f}")
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline).TimelineAnalyzer()
+        mismatches = sum(
+            1 for event in events
+            if baseline._create_summary_from_context(*event) != analyzer._create_summary_from_context(*event)
+        )
+        print(f"\n{args.baseline} _create_summary_from_context  {time_us(baseline, events, args.repeat):8.1f} us/event")
+        print(f"Output mismatches vs {args.baseline}: {mismatches}")
+        return 1 if mismatches else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Boilerplate Stripping
+Removes per-page header/footer lines (reporter banners, "Page X of Y",
+download URLs) once at ingest, detected by how often they repeat across pages
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from token_estimator import estimate_tokens
+
+# Lines at the top and at the bottom of a page that can be header/footer
+EDGE_LINES = 4
+# A line is boilerplate when it sits on the edge of at least this share of pages
+MIN_PAGE_SHARE = 0.5
+MIN_PAGES = 3
+
+DIGITS_RE = re.compile(r'\d+')
+
+
+def line_signature(line: str) -> str:
+    """Page-independent form of a line: numbers masked, whitespace and case folded"""
+    return DIGITS_RE.sub('#', ' '.join(line.split()).lower())
+
+
+def _edge_lines(lines: List[str]) -> List[int]:
+    """Indexes of the first and last EDGE_LINES non-blank lines of a page"""
+    filled = [i for i, line in enumerate(lines) if line.strip()]
+    return sorted(set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]))
+
+
+def _edge_signatures(text: str) -> Set[str]:
+    lines = text.split('\n')
+    return {line_signature(lines[i]) for i in _edge_lines(lines)}
+
+
+def find_boilerplate(page_texts: Iterable[str]) -> Set[str]:
+    """Signatures of lines repeated on the edges of most pages (one pass, one page held at a time)"""
+    counts = Counter()
+    pages = 0
+    for text in page_texts:
+        counts.update(_edge_signatures(text))
+        pages += 1
+    if pages < MIN_PAGES:
+        return set()
+    threshold = max(MIN_PAGES, math.ceil(MIN_PAGE_SHARE * pages))
+    return {signature for signature, count in counts.items() if count >= threshold and signature}
+
+
+class BoilerplateStripper:
+    """Strips found boilerplate page by page, tallying what was removed for the report"""
+
+    def __init__(self, boilerplate: Set[str]):
+        self.boilerplate = boilerplate
+        self.pages = 0
+        self.removed = Counter()
+        self.bytes_before = self.bytes_after = 0
+        self.tokens_before = self.tokens_after = 0
+
+    def strip(self, page: Document) -> Document:
+        """Only edge lines are removed, so body text that happens to match a header
+        survives; pages are kept (even when emptied) so page numbering is unchanged."""
+        text = page.page_content
+        lines = text.split('\n')
+        drop = {i for i in _edge_lines(lines) if line_signature(lines[i]) in self.boilerplate}
+        for i in drop:
+            self.removed[line_signature(lines[i])] += 1
+        kept = '\n'.join(line for i, line in enumerate(lines) if i not in drop).strip() if drop else text
+        self.pages += 1
+        self.bytes_before += len(text.encode('utf-8'))
+        self.bytes_after += len(kept.encode('utf-8'))
+        self.tokens_before += estimate_tokens(text)
+        self.tokens_after += estimate_tokens(kept)
+        return Document(page_content=kept, metadata=page.metadata)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            'pages': self.pages,
+            'lines_removed': sum(self.removed.values()),
+            'bytes_before': self.bytes_before,
+            'bytes_removed': self.bytes_before - self.bytes_after,
+            'tokens_before': self.tokens_before,
+            'tokens_removed': self.tokens_before - self.tokens_after,
+            'boilerplate': [{'line': signature, 'pages': count} for signature, count in self.removed.most_common()],
+        }
+
+
+def strip_boilerplate(pages: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+    """Drop repeated header/footer lines from every page.
+    Returns the cleaned pages and a report of what was removed."""
+    stripper = BoilerplateStripper(find_boilerplate(page.page_content for page in pages))
+    cleaned = [stripper.strip(page) for page in pages]
+    return cleaned, stripper.report()
+
+
+if __name__ == "__main__":
+    # Report what ingest-time cleaning removes: python boilerplate.py file.pdf [...]
+    import sys
+    from page_stream import iter_pdf_pages
+
+    for pdf_path in sys.argv[1:]:
+        _, report = strip_boilerplate(list(iter_pdf_pages(pdf_path)))
+        share = report['bytes_removed'] / max(1, report['bytes_before'])
+        print(f"{pdf_path}: {report['pages']} pages, {report['lines_removed']} lines, "
+              f"{report['bytes_removed']} bytes ({share:.1%}), ~{report['tokens_removed']} tokens removed")
+        for item in report['boilerplate'][:5]:
+            print(f"    {item['pages']:>4} x {item['line']}")
@@ -9,7 +9,7 @@ pip install langchain langchain-google-genai sentence-transformers pypdf faiss-c
 import os
 import time
 import pickle
-from typing import List, Dict
+from typing import List, Dict, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 import re  # Added import for regular expressions
@@ -17,33 +17,40 @@ import re  # Added import for regular expressions
 # Load environment variables from .env file
 load_dotenv(Path(__file__).parent.parent.parent / '.env')
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_google_genai import GoogleGenerativeAI
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.vectorstores import FAISS
-from langchain.docstore.document import Document
-from langchain.callbacks.base import BaseCallbackHandler
+# Light langchain_core pieces only at import time: chains, prompts, FAISS,
+# embeddings and the Gemini SDKs are imported where first used (CLI startup)
+from langchain_core.documents import Document
+from langchain_core.callbacks.base import BaseCallbackHandler
 
-# For direct Gemini API access
-try:
-    import google.generativeai as genai
-except ImportError:
-    genai = None
+from document_registry import DocumentRegistry
+from page_stream import iter_page_chunks
+from token_estimator import LEDGER, estimate_tokens, reduce_to_budget
+from summary_length import SUMMARY_MAX_OUTPUT_TOKENS, fit_summary_length
+from llm_provider import get_provider
+from tracing import TRACER, traced
+from pipeline_dag import StageGraph
+from metrics import CACHE_LOOKUPS, RATE_LIMIT_WAIT, RATE_LIMIT_WAITS, EMBED_CHARS, EMBED_CHUNKS, EMBED_SECONDS
 
-# LOCAL EMBEDDINGS - No API calls!
-from langchain_community.embeddings import HuggingFaceEmbeddings
+
+def _genai():
+    """google.generativeai for direct Gemini API access (None if not installed)"""
+    try:
+        import google.generativeai as genai
+    except ImportError:
+        return None
+    return genai
 
 
 class RateLimiter:
     """Handle API rate limits for Gemini"""
     
     def __init__(self, requests_per_minute=15):
-        self.requests_per_minute = requests_per_minute
+        self.requests_per_minute = requests_per_minute  # 0: no limit
         self.request_times = []
     
     def wait_if_needed(self):
+        if self.requests_per_minute <= 0:
+            return
         now = time.time()
         self.request_times = [t for t in self.request_times if now - t < 60]
         
@@ -52,6 +59,8 @@ class RateLimiter:
             if wait_time > 0:
                 print(f"⏳ Rate limit: waiting {wait_time:.0f}s...")
                 time.sleep(wait_time)
+                RATE_LIMIT_WAITS.inc(limiter='case')
+                RATE_LIMIT_WAIT.inc(wait_time, limiter='case')
                 self.request_times = []
         
         self.request_times.append(now)
@@ -79,48 +88,110 @@ class LegalDocSummarizer:
         
         self.api_key = api_key
         self.cache_dir = Path(cache_dir)
-        self.cache_dir.mkdir(exist_ok=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        
+        # Gemini, or the offline stand-in (LLM_PROVIDER=fake)
+        self.provider = get_provider()
         
         # Rate limiter
-        self.rate_limiter = RateLimiter(requests_per_minute=12)  # Conservative
-        
-        # Gemini LLM (only for text generation)
-        self.llm = GoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=api_key,
-            temperature=0.3,
-            max_retries=3
-        )
+        self.rate_limiter = RateLimiter(requests_per_minute=12 if self.provider.rate_limited else 0)  # Conservative
         
-        # LOCAL embeddings - runs on your computer, NO API calls!
-        print("🔧 Loading local embedding model...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",
-            model_kwargs={'device': 'cpu'},
-            encode_kwargs={'normalize_embeddings': True}
-        )
-        print("✓ Local embeddings loaded")
+        # Gemini LLMs: built on first use, see the llm/summary_llm properties
+        self._llm = None
+        self._summary_llm = None
+        
+        # LOCAL embeddings: loaded on first use (vector store / QA), see the embeddings property
+        self._embeddings = None
         
         # Storage
         self.documents = []
+        # A loaded PDF: its pages are streamed from the document registry
+        self.source_path: Optional[str] = None
         self.chunks = []
         self.vectorstore = None
         self.summaries = {}
+        self.length_stats = None
         
         print("✓ Initialized LangChain + Gemini (FREE TIER MODE)")
     
+    @property
+    def llm(self):
+        """Gemini LLM (only for text generation)"""
+        if self._llm is None:
+            self._llm = self.provider.text_model(
+                "gemini-2.5-flash",
+                self.api_key,
+                temperature=0.3,
+                max_retries=3
+            )
+        return self._llm
+    
+    @llm.setter
+    def llm(self, llm):
+        self._llm = llm
+    
+    @property
+    def summary_llm(self):
+        """Executive summaries: output capped near the 600-word target"""
+        if self._summary_llm is None:
+            self._summary_llm = self.provider.text_model(
+                "gemini-2.5-flash",
+                self.api_key,
+                temperature=0.3,
+                max_output_tokens=SUMMARY_MAX_OUTPUT_TOKENS,
+                max_retries=3
+            )
+        return self._summary_llm
+    
+    @summary_llm.setter
+    def summary_llm(self, llm):
+        self._summary_llm = llm
+    
+    @property
+    def embeddings(self):
+        """LOCAL embeddings - runs on your computer, NO API calls!"""
+        if self._embeddings is None:
+            print("🔧 Loading local embedding model...")
+            from langchain_community.embeddings import HuggingFaceEmbeddings
+            with TRACER.span('embed.load_model', model="all-MiniLM-L6-v2"):
+                self._embeddings = HuggingFaceEmbeddings(
+                    model_name="sentence-transformers/all-MiniLM-L6-v2",
+                    model_kwargs={'device': 'cpu'},
+                    encode_kwargs={'normalize_embeddings': True}
+                )
+            print("✓ Local embeddings loaded")
+        return self._embeddings
+    
+    def _predict(self, prompt: str, label: str, llm=None, **kwargs) -> str:
+        """llm.predict (self.llm by default), recorded in the token ledger"""
+        llm = llm or self.llm
+        return LEDGER.track(label, llm.model, prompt, lambda: llm.predict(prompt, **kwargs))
+    
+    def _synthesize_group(self, group: List[str], first_section: int = 1, callbacks=None) -> str:
+        """Merge consecutive summaries into one (the group step of the hierarchy)"""
+        combined = "\n\n".join([f"Section {j+first_section}:\n{s}" for j, s in enumerate(group)])
+        return self._predict(
+            f"Synthesize these summaries:\n\n{combined}\n\nUnified summary:",
+            'group_summary',
+            callbacks=callbacks
+        )
+    
     
+    @traced('load')
     def load_document(self, file_path: str) -> List[Document]:
         """Load PDF or text file"""
         
         print(f"\n📄 Loading document: {file_path}")
         
+        self.source_path = None
         cache_file = self.cache_dir / f"{Path(file_path).stem}_docs.pkl"
+        CACHE_LOOKUPS.inc(cache='case_pages', result='hit' if cache_file.exists() else 'miss')
         if cache_file.exists():
             print("   ⚡ Loading from cache...")
             with open(cache_file, 'rb') as f:
                 self.documents = pickle.load(f)
             print(f"   ✓ Loaded {len(self.documents)} pages from cache")
+            TRACER.annotate(pages=len(self.documents), cached=True)
             return self.documents
         
         try:
@@ -143,10 +214,14 @@ class LegalDocSummarizer:
                 print(f"   ⚠️ Could not read file header: {header_exc}")
 
             if is_pdf:
-                # Load PDF
-                loader = PyPDFLoader(file_path)
-                self.documents = loader.load()
-                print(f"   ✓ Loaded {len(self.documents)} pages from PDF")
+                # Register the PDF's pages (parsed once per file content, a page in memory at a
+                # time); chunk_document streams them from the registry instead of a page list
+                pages = sum(1 for _ in DocumentRegistry.default().iter_pages(file_path))
+                self.documents = []
+                self.source_path = file_path
+                print(f"   ✓ Loaded {pages} pages from PDF")
+                TRACER.annotate(pages=pages, cached=False, streamed=True)
+                return self.documents
             else:
                 # Load as text file. Try utf-8, then fall back to latin-1. If both
                 # fail, attempt to treat file as a PDF as a last resort.
@@ -160,8 +235,7 @@ class LegalDocSummarizer:
                         print("   ⚠️ Read text file with latin-1 encoding (fallback)")
                     except Exception as text_exc:
                         print(f"   ⚠️ Text read failed: {text_exc}. Attempting to load as PDF.")
-                        loader = PyPDFLoader(file_path)
-                        self.documents = loader.load()
+                        self.documents = DocumentRegistry.default().load_pages(file_path)
                         print(f"   ✓ Loaded {len(self.documents)} pages from PDF (fallback)")
                         with open(cache_file, 'wb') as f:
                             pickle.dump(self.documents, f)
@@ -174,6 +248,7 @@ class LegalDocSummarizer:
             with open(cache_file, 'wb') as f:
                 pickle.dump(self.documents, f)
             
+            TRACER.annotate(pages=len(self.documents), cached=False)
             return self.documents
             
         except Exception as e:
@@ -182,13 +257,14 @@ class LegalDocSummarizer:
     
     
     # def chunk_document(self, pages_per_chunk: int = 15):
+    @traced('chunk')
     def chunk_document(self, pages_per_chunk: int = 25):
         """
         Smart chunking based on page numbers
         Combines pages into chunks for better context
         """
         
-        if not self.documents:
+        if not self.documents and not self.source_path:
             raise ValueError("No documents loaded. Please run load_document() first.")
         
         print(f"\n📦 Chunking document (pages per chunk={pages_per_chunk})...")
@@ -198,35 +274,15 @@ class LegalDocSummarizer:
         if cache_file.exists():
             os.remove(cache_file)
         
-        # Calculate number of chunks needed (ceiling division)
-        total_pages = len(self.documents)
-        num_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
+        # Combine consecutive pages into page-range chunks; a loaded PDF's pages stream
+        # from the registry, so only the chunk being built is held besides the chunks
+        pages = self.documents or DocumentRegistry.default().iter_pages(self.source_path)
+        self.chunks = list(iter_page_chunks(pages, pages_per_chunk))
+        total_pages = int(self.chunks[-1].metadata['pages'].split('-')[-1]) if self.chunks else 0
         
         print(f"   📄 Total pages: {total_pages}")
-        print(f"   📦 Creating {num_chunks} chunks ({pages_per_chunk} pages per chunk)")
-        
-        # Create chunks by combining pages
-        self.chunks = []
-        for i in range(num_chunks):
-            start_idx = i * pages_per_chunk
-            end_idx = min((i + 1) * pages_per_chunk, total_pages)
-            
-            # Combine the content of these pages
-            combined_content = "\n\n=== PAGE BREAK ===\n\n".join(
-                doc.page_content for doc in self.documents[start_idx:end_idx]
-            )
-            
-            # Create a new document for this chunk
-            chunk = Document(
-                page_content=combined_content,
-                metadata={
-                    'pages': f"{start_idx + 1}-{end_idx}",
-                    'chunk': i + 1
-                }
-            )
-            self.chunks.append(chunk)
-        
-        print(f"   ✓ Created {len(self.chunks)} chunks")
+        print(f"   ✓ Created {len(self.chunks)} chunks ({pages_per_chunk} pages per chunk)")
+        TRACER.annotate(pages=total_pages, chunks=len(self.chunks))
         
         with open(cache_file, 'wb') as f:
             pickle.dump(self.chunks, f)
@@ -234,6 +290,7 @@ class LegalDocSummarizer:
         return self.chunks
     
     
+    @traced('vector_store')
     def create_vector_store(self):
         """
         Create vector store using LOCAL embeddings
@@ -254,24 +311,35 @@ class LegalDocSummarizer:
         print(f"   Processing {len(self.chunks)} chunks locally...")
         print("   (This runs on your CPU, may take 1-2 minutes)")
         
-        # Create embeddings - all local, no API!
-        self.vectorstore = FAISS.from_documents(self.chunks, self.embeddings)
-        
-        print("   ✓ Vector store created (NO API calls used!)")
-        
-        # Cache it
-        self.vectorstore.save_local(str(cache_file))
+        # Create embeddings - all local, no API! (embedded, then indexed: what FAISS.from_documents does)
+        texts = [chunk.page_content for chunk in self.chunks]
+        embeddings = self.embeddings
+        with TRACER.span('embed', chunks=len(texts), chars=sum(len(t) for t in texts)) as span:
+            vectors = embeddings.embed_documents(texts)
+        EMBED_CHUNKS.inc(len(texts))
+        EMBED_CHARS.inc(span.attributes['chars'])
+        EMBED_SECONDS.inc(span.duration_ms / 1000)
+        from langchain_community.vectorstores import FAISS
+        with TRACER.span('index', vectors=len(vectors)):
+            self.vectorstore = FAISS.from_embeddings(
+                list(zip(texts, vectors)), embeddings,
+                metadatas=[chunk.metadata for chunk in self.chunks]
+            )
+            
+            print("   ✓ Vector store created (NO API calls used!)")
+            
+            # Cache it
+            self.vectorstore.save_local(str(cache_file))
         
         return self.vectorstore
     
     
+    @traced('executive_summary')
     def generate_executive_summary_from_chunks(self, chunk_summaries: List[str]) -> str:
         """Generates a 500-600 word executive summary from chunk summaries."""
         
         print("\n   STEP 3: Creating executive summary...")
 
-        combined = "\n\n".join([f"Section {i+1}:\n{s}" for i, s in enumerate(chunk_summaries)])
-        
         # Force cache reset if needed for testing
         summary_cache_file = self.cache_dir / "summaries.pkl"
         if os.environ.get("FORCE_RESUMMARY") == "1" and summary_cache_file.exists():
@@ -281,7 +349,7 @@ class LegalDocSummarizer:
             except Exception as e:
                 print(f"   ⚠️ Could not remove cache: {e}")
                 
-        exec_prompt = f"""Using the combined summaries below, create an executive summary EXACTLY BETWEEN 500 and 600 WORDS TOTAL.
+        exec_template = """Using the combined summaries below, create an executive summary EXACTLY BETWEEN 500 and 600 WORDS TOTAL.
 
 Structure the output into these three sections, using EXACTLY these headings:
 
@@ -316,11 +384,25 @@ Combined summaries:
 {combined}
 """
 
+        # Keep the final prompt within the token budget: condense groups of summaries first
+        def _condense(group: List[str]) -> str:
+            self.rate_limiter.wait_if_needed()
+            try:
+                return self._synthesize_group(group)
+            except Exception as e:
+                print(f"   ⚠️  Error condensing summaries: {e}")
+                return "\n\n".join(group)
+        chunk_summaries = reduce_to_budget(chunk_summaries, estimate_tokens(exec_template), _condense,
+                                           label='executive summary')
+
+        combined = "\n\n".join([f"Section {i+1}:\n{s}" for i, s in enumerate(chunk_summaries)])
+        exec_prompt = exec_template.format(combined=combined)
+
         self.rate_limiter.wait_if_needed()
         callback = ProgressCallback()
 
         try:
-            executive_summary = self.llm.predict(exec_prompt, callbacks=[callback])
+            executive_summary = self._predict(exec_prompt, 'executive_summary', llm=self.summary_llm, callbacks=[callback])
             # Post-process and enforce structure and word count (500-600 words)
             import re
 
@@ -373,62 +455,44 @@ Combined summaries:
                     return text
                 return " ".join(words[:max_words]).rstrip(' ,;:.')
 
-            # Normalize initial output into 3 headings
-            candidate = _ensure_three_headings(executive_summary)
-
-            # Enforce word count by re-prompting LLM if necessary (up to 2 retries)
-            max_retries = 2
-            retries = 0
-            final = candidate
-            wc = _word_count(final)
-            while (wc < 500 or wc > 600) and retries < max_retries:
-                retries += 1
+            with TRACER.span('postprocess', words_before=_word_count(executive_summary)) as span:
+                # Normalize initial output into 3 headings
+                candidate = _ensure_three_headings(executive_summary)
+
+                # Bring the word count into range locally: trim closing sentences or top up
+                # sections from the chunk summaries. Re-prompt only when the summaries hold
+                # too little material to reach 500 words.
+                final, length_stats = fit_summary_length(candidate, chunk_summaries)
+                span.set(words_after=_word_count(final))
+            length_stats['llm_retries'] = 0
+            if _word_count(final) < 500:
+                length_stats['llm_retries'] = 1
                 self.rate_limiter.wait_if_needed()
-                if wc < 500:
-                    # Ask LLM to expand while preserving headings
-                    expand_prompt = (
-                        "The executive summary below is TOO SHORT. Expand it to be between 500 and 600 words. "
-                        "Preserve the three headings exactly. Ensure each section has a complete, self-contained paragraph. "
-                        "Make sure the 'What did the court decide' section clearly explains the legal reasoning and principles. "
-                        "Make sure the 'What are the outcomes' section clearly explains concrete orders and practical implications. "
-                        "IMPORTANT: Each section should be 160-180 words - allow flexibility to complete sentences properly. "
-                        "Start the first section with 'The case explains' rather than 'This Supreme Court case'. "
-                        "EMPHASIZE key legal terms by putting them in ** marks (Acts, Sections, case names, monetary values). "
-                        "ALWAYS end each paragraph with a complete sentence and proper punctuation. "
-                        "NEVER cut off sentences or end with ellipses - always complete the final thought. "
-                        "DO NOT prefix your response with any introduction. "
-                        "ONLY return the expanded summary with exactly the same formatting.\n\n" + final
-                    )
-                    try:
-                        expanded = self.llm.predict(expand_prompt, callbacks=[callback])
-                        final = _ensure_three_headings(expanded)
-                    except Exception as e:
-                        print(f"   ⚠️  Error expanding summary: {e}")
-                        break
-                else:
-                    # Too long: ask LLM to shorten
-                    shorten_prompt = (
-                        "The executive summary below is TOO LONG. Shorten it to be between 500 and 600 words. "
-                        "Preserve the three headings exactly and the main points. Do not add or remove headings. "
-                        "IMPORTANT: Each section should be 160-180 words - allow flexibility to complete sentences properly. "
-                        "Start the first section with 'The case explains' rather than 'This Supreme Court case'. "
-                        "EMPHASIZE key legal terms by putting them in ** marks (Acts, Sections, case names, monetary values). "
-                        "Ensure each section has a complete, self-contained paragraph with a proper conclusion. "
-                        "NEVER cut off sentences or end with ellipses - always complete the thought. "
-                        "Use simple sentences and direct language. NEVER end with ellipses or incomplete sentences. "
-                        "DO NOT prefix your response with any introduction. "
-                        "ONLY return the shortened summary with exactly the same formatting.\n\n" + final
-                    )
-                    try:
-                        shortened = self.llm.predict(shorten_prompt, callbacks=[callback])
-                        final = _ensure_three_headings(shortened)
-                    except Exception as e:
-                        print(f"   ⚠️  Error shortening summary: {e}")
-                        # As a fallback, truncate to 600 words
-                        final = _shorten_to_limit(final, max_words=600)
-                        break
-
-                wc = _word_count(final)
+                expand_prompt = (
+                    "The executive summary below is TOO SHORT. Expand it to be between 500 and 600 words. "
+                    "Preserve the three headings exactly. Ensure each section has a complete, self-contained paragraph. "
+                    "Make sure the 'What did the court decide' section clearly explains the legal reasoning and principles. "
+                    "Make sure the 'What are the outcomes' section clearly explains concrete orders and practical implications. "
+                    "IMPORTANT: Each section should be 160-180 words - allow flexibility to complete sentences properly. "
+                    "Start the first section with 'The case explains' rather than 'This Supreme Court case'. "
+                    "EMPHASIZE key legal terms by putting them in ** marks (Acts, Sections, case names, monetary values). "
+                    "ALWAYS end each paragraph with a complete sentence and proper punctuation. "
+                    "NEVER cut off sentences or end with ellipses - always complete the final thought. "
+                    "DO NOT prefix your response with any introduction. "
+                    "ONLY return the expanded summary with exactly the same formatting.\n\n" + final
+                )
+                try:
+                    expanded = self._predict(expand_prompt, 'summary_expand', llm=self.summary_llm, callbacks=[callback])
+                    final, _ = fit_summary_length(_ensure_three_headings(expanded), chunk_summaries)
+                except Exception as e:
+                    print(f"   ⚠️  Error expanding summary: {e}")
+            length_stats['retry_avoided'] = not length_stats['in_range_before'] and not length_stats['llm_retries']
+            length_stats['final_words'] = _word_count(final)
+            self.length_stats = length_stats
+            TRACER.annotate(words=length_stats['final_words'], llm_retries=length_stats['llm_retries'])
+            print(f"   📏 Length control: {length_stats['words_before']} -> {length_stats['final_words']} words "
+                  f"({length_stats['sentences_trimmed']} sentences trimmed, {length_stats['sentences_added']} added, "
+                  f"{length_stats['llm_retries']} LLM retries)")
 
             # Final cleanup to remove any introductory text and markdown hashes
             def _clean_final_output(text: str) -> str:
@@ -540,22 +604,26 @@ Combined summaries:
             print(f"   ⚠️  Error: {e}")
             return "[Error creating executive summary]"
 
+    @traced('summarize')
     def summarize_hierarchical(self, chunk_summaries_only: bool = False):
         """Hierarchical summarization using Gemini API (with rate limiting)"""
         
         print("\n📝 Starting hierarchical summarization...")
         
         cache_file = self.cache_dir / "summaries.pkl"
+        CACHE_LOOKUPS.inc(cache='summaries', result='hit' if cache_file.exists() else 'miss')
         if cache_file.exists():
             print("   ⚡ Loading summaries from cache...")
             with open(cache_file, 'rb') as f:
                 self.summaries = pickle.load(f)
             print("   ✓ Loaded from cache")
+            TRACER.annotate(cached=True)
             return self.summaries
         
         # STEP 1: Chunk Summaries
         print("\n   STEP 1: Summarizing chunks...")
         
+        from langchain.prompts import PromptTemplate
         chunk_summary_prompt = PromptTemplate(
             template="""You are a Supreme Court case analyst. Summarize this section of the judgment.
 
@@ -581,28 +649,34 @@ Provide a clear, focused summary (300-400 words):""",
             
             self.rate_limiter.wait_if_needed()
             
-            try:
-                summary = self.llm.predict(
-                    chunk_summary_prompt.format(text=chunk.page_content),
-                    callbacks=[callback]
-                )
-                chunk_summaries.append(summary)
-                
-            except Exception as e:
-                if "429" in str(e) or "quota" in str(e).lower():
-                    print(f"   ⏸️  Rate limit hit. Waiting 60s...")
-                    time.sleep(60)
-                    # Retry
-                    summary = self.llm.predict(
+            with TRACER.span('chunk_summary', chunk=i + 1, pages=chunk.metadata.get('pages')):
+                try:
+                    summary = self._predict(
                         chunk_summary_prompt.format(text=chunk.page_content),
+                        'chunk_summary',
                         callbacks=[callback]
                     )
                     chunk_summaries.append(summary)
-                else:
-                    print(f"   ⚠️  Error: {e}")
-                    chunk_summaries.append(f"[Error on chunk {i+1}]")
+                    
+                except Exception as e:
+                    if "429" in str(e) or "quota" in str(e).lower():
+                        print(f"   ⏸️  Rate limit hit. Waiting {self.provider.quota_wait_seconds}s...")
+                        with TRACER.span('quota_wait', seconds=self.provider.quota_wait_seconds):
+                            time.sleep(self.provider.quota_wait_seconds)
+                        RATE_LIMIT_WAITS.inc(limiter='quota')
+                        RATE_LIMIT_WAIT.inc(self.provider.quota_wait_seconds, limiter='quota')
+                        # Retry
+                        summary = self._predict(
+                            chunk_summary_prompt.format(text=chunk.page_content),
+                            'chunk_summary',
+                            callbacks=[callback]
+                        )
+                        chunk_summaries.append(summary)
+                    else:
+                        print(f"   ⚠️  Error: {e}")
+                        chunk_summaries.append(f"[Error on chunk {i+1}]")
             
-            time.sleep(1)  # Extra buffer
+            time.sleep(self.provider.pause_seconds)  # Extra buffer
         
         self.summaries['chunk_summaries'] = chunk_summaries
         
@@ -620,23 +694,18 @@ Provide a clear, focused summary (300-400 words):""",
             
             for i in range(0, len(chunk_summaries), group_size):
                 group = chunk_summaries[i:i+group_size]
-                combined = "\n\n".join([f"Section {j+i+1}:\n{s}" for j, s in enumerate(group)])
-                
                 print(f"   Group {i//group_size + 1}...")
                 
                 self.rate_limiter.wait_if_needed()
                 
                 try:
-                    group_summary = self.llm.predict(
-                        f"Synthesize these summaries:\n\n{combined}\n\nUnified summary:",
-                        callbacks=[callback]
-                    )
+                    group_summary = self._synthesize_group(group, i + 1, callbacks=[callback])
                     group_summaries.append(group_summary)
                 except Exception as e:
                     print(f"   ⚠️  Error: {e}")
                     group_summaries.append("[Error in group summary]")
                 
-                time.sleep(1)
+                time.sleep(self.provider.pause_seconds)
             
             self.summaries['group_summaries'] = group_summaries
             summaries_for_exec = group_summaries
@@ -646,6 +715,7 @@ Provide a clear, focused summary (300-400 words):""",
         # STEP 3: Executive Summary
         executive_summary = self.generate_executive_summary_from_chunks(summaries_for_exec)
         self.summaries['executive_summary'] = executive_summary
+        self.summaries['length_control'] = self.length_stats
         
         # Save cache
         with open(cache_file, 'wb') as f:
@@ -656,6 +726,7 @@ Provide a clear, focused summary (300-400 words):""",
         return self.summaries
     
     
+    @traced('save')
     def save_summaries(self, output_dir: str = None):
         """Save summaries to files"""
         
@@ -700,6 +771,7 @@ Provide a clear, focused summary (300-400 words):""",
         print("   ✓ all_summaries.json")
     
     
+    @traced('qa_setup')
     def setup_qa_chain(self):
         """Setup Q&A system"""
         
@@ -713,6 +785,8 @@ Provide a clear, focused summary (300-400 words):""",
         # We'll handle this through prompt engineering instead
         qa_llm = self.llm
         
+        from langchain.chains import RetrievalQA
+        from langchain.prompts import PromptTemplate
         qa_prompt = PromptTemplate(
             template="""You are a Supreme Court case expert. Answer based on the judgment context provided.
 
@@ -748,6 +822,7 @@ Answer:""",
         return self.qa_chain
     
     
+    @traced('ask')
     def ask(self, question: str) -> Dict:
         """Ask a question - uses direct Gemini API for better control over output length"""
         
@@ -765,10 +840,10 @@ Answer:""",
             context = "\n\n".join([doc.page_content for doc in docs])
             
             # Use direct Gemini API with explicit max_output_tokens for complete answers
-            if genai and self.api_key:
+            genai = _genai()
+            if genai and (self.api_key or not self.provider.requires_api_key):
                 try:
-                    genai.configure(api_key=self.api_key)
-                    model = genai.GenerativeModel('gemini-2.5-flash')
+                    model = self.provider.generative_model('gemini-2.5-flash', self.api_key)
                     
                     prompt = f"""You are a Supreme Court case expert. Answer based on the judgment context provided.
 
@@ -816,7 +891,7 @@ WRITING PROCESS:
 
 Now provide your complete answer:"""
                     
-                    response = model.generate_content(
+                    response = LEDGER.track('qa_answer', getattr(model, 'model_name', 'gemini-2.5-flash'), prompt, lambda: model.generate_content(
                         prompt,
                         generation_config=genai.types.GenerationConfig(
                             temperature=0.3,
@@ -824,7 +899,7 @@ Now provide your complete answer:"""
                             top_p=0.8,
                             top_k=40,
                         )
-                    )
+                    ))
                     
                     answer = response.text.strip() if hasattr(response, 'text') else str(response)
                     
@@ -880,7 +955,9 @@ Now provide your complete answer:"""
                     # Fall through to chain-based approach
             
             # Fallback to chain-based approach
-            result = self.qa_chain.invoke({"query": question})
+            # The chain retrieves the same context; count it as the prompt
+            result = LEDGER.track('qa_chain', self.llm.model, context + question,
+                                  lambda: self.qa_chain.invoke({"query": question}))
             answer = result['result']
             answer = re.sub(r'^Based on the judgment.*?[:,\-]\s*', '', answer, flags=re.IGNORECASE)
             answer = answer.strip()
@@ -900,8 +977,14 @@ Now provide your complete answer:"""
             return {'answer': f"Error: {e}", 'sources': []}
     
     
-    def process_full_pipeline(self, pdf_path: str, quick_mode: bool = False, chunk_size: int = 25, output_dir: str = None):
-        """Complete pipeline"""
+    @traced('pipeline')
+    def process_full_pipeline(self, pdf_path: str, quick_mode: bool = False, chunk_size: int = 25, output_dir: str = None,
+                              prefetch_timeline: bool = False):
+        """Complete pipeline
+        Stages run as a dependency graph: local embedding (CPU) overlaps the
+        Gemini summary calls (network), and with prefetch_timeline the timeline
+        is extracted in the same window into timeline_cli's result cache
+        (single-process: the stage runs on a pool thread, alongside embedding)"""
         
         print("\n" + "="*70)
         print("🚀 LEGAL DOCUMENT PIPELINE (FREE TIER - LOCAL EMBEDDINGS)")
@@ -909,22 +992,32 @@ Now provide your complete answer:"""
         
         start_time = time.time()
         
-        self.load_document(pdf_path)
-        self.chunk_document(pages_per_chunk=chunk_size)  # Use user-defined chunk size
-        self.create_vector_store()  # LOCAL - no API!
-        self.summarize_hierarchical(chunk_summaries_only=quick_mode)
-        
         # Use absolute path for output
         if output_dir is None:
             output_dir = str(Path(pdf_path).parent.parent / "output" / "chatbot_summarizer")
-        self.save_summaries(output_dir=output_dir)
         
-        self.setup_qa_chain()
+        graph = StageGraph()
+        graph.add('load', lambda: self.load_document(pdf_path))
+        graph.add('chunk', lambda: self.chunk_document(pages_per_chunk=chunk_size), after=['load'])  # Use user-defined chunk size
+        graph.add('vector_store', self.create_vector_store, after=['chunk'])  # LOCAL - no API!
+        graph.add('summarize', lambda: self.summarize_hierarchical(chunk_summaries_only=quick_mode), after=['chunk'])
+        graph.add('save', lambda: self.save_summaries(output_dir=output_dir), after=['summarize'])
+        graph.add('qa_setup', self.setup_qa_chain, after=['vector_store'])
+        if prefetch_timeline and Path(pdf_path).suffix.lower() == '.pdf':
+            from timeline_analyzer import TimelineAnalyzer, DEFAULT_RESULT_CACHE_DIR
+            # Pages come from the document registry 'load' just filled. One process: forking
+            # worker pools from this multithreaded process can deadlock, and embedding has the cores
+            graph.add('timeline', lambda: TimelineAnalyzer().analyze_document(
+                pdf_path, workers=1, cache_dir=str(DEFAULT_RESULT_CACHE_DIR)), after=['load'], optional=True)
+        graph.run()
         
         elapsed = time.time() - start_time
+        report = graph.report()
+        TRACER.annotate(sequential_s=report['sequential_s'], critical_path=' > '.join(graph.critical_path()))
         
         print("\n" + "="*70)
-        print(f"✅ COMPLETE! (Time: {elapsed/60:.1f} minutes)")
+        print(f"✅ COMPLETE! (Time: {elapsed/60:.1f} minutes; stages overlapped: "
+              f"{report['sequential_s']:.1f}s of work in {report['wall_s']:.1f}s)")
         print("="*70)
         
         return self.summaries
@@ -9,7 +9,8 @@ pip install langchain langchain-google-genai sentence-transformers pypdf faiss-c
 import os
 import time
 import json
-from typing import List, Dict, Any
+import hashlib
+from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
@@ -17,25 +18,90 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv(Path(__file__).parent.parent.parent / '.env')
 
+# The Gemini SDKs are imported by the provider on first use (CLI startup)
 try:
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-    from langchain_google_genai import GoogleGenerativeAI
-    from langchain_community.document_loaders import PyPDFLoader
-    from langchain.docstore.document import Document
+    from langchain_core.documents import Document
 except ImportError as e:
     print(f"Missing required package: {e}")
     print("Install with: pip install langchain langchain-google-genai pypdf")
     raise
 
+from document_registry import DocumentRegistry, file_digest
+from page_stream import iter_page_chunks
+from token_estimator import LEDGER, estimate_tokens, reduce_to_budget
+from llm_provider import get_provider
+from tracing import TRACER, traced
+from metrics import CACHE_LOOKUPS, RATE_LIMIT_WAIT, RATE_LIMIT_WAITS
+
+
+# Chunks, section analyses and executive summaries, keyed by content (CONTRACT_CACHE_DIR overrides).
+# Providers other than Gemini (the offline stand-in) get a directory of their own
+DEFAULT_ANALYSIS_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "cache" / "contracts"
+
+
+def default_analysis_cache_dir(provider_name: str) -> Path:
+    if provider_name == 'gemini':
+        return DEFAULT_ANALYSIS_CACHE_DIR
+    return DEFAULT_ANALYSIS_CACHE_DIR.with_name(f"contracts_{provider_name}")
+
+
+class AnalysisCache:
+    """
+    On-disk LLM responses keyed by provider, model and prompt, one JSON file each.
+
+    Each section analysis is stored as soon as it completes, so a re-run after
+    a failed call only analyzes the sections still missing, and a contract
+    sharing sections with an earlier upload (template NDAs) reuses their
+    analyses. The prompt holds the section text and the instructions, so a
+    prompt change misses instead of serving stale analyses.
+    """
+
+    def __init__(self, root: str, provider: str):
+        self.root = Path(root)
+        # Offline answers must never be served as Gemini's, even from a shared directory
+        self.provider = provider
+
+    def path(self, model: str, prompt: str) -> Path:
+        key = hashlib.sha256(f"{self.provider}\n{model}\n{prompt}".encode('utf-8')).hexdigest()
+        return self.root / "responses" / key[:2] / f"{key}.json"
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        path = self.path(model, prompt)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)['response']
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[contract-analysis] Warning: ignoring unreadable cache {path.name}: {e}")
+            return None
+
+    def put(self, model: str, prompt: str, response: str) -> None:
+        self._write(self.path(model, prompt), {'model': model, 'response': response})
+
+    @staticmethod
+    def _write(path: Path, data: Any) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent runs never read a partial file
+            tmp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[contract-analysis] Warning: could not write cache {path.name}: {e}")
+
 
 class RateLimiter:
     """Handle API rate limits"""
     
     def __init__(self, requests_per_minute=12):
-        self.requests_per_minute = requests_per_minute
+        self.requests_per_minute = requests_per_minute  # 0: no limit
         self.request_times = []
     
     def wait_if_needed(self):
+        if self.requests_per_minute <= 0:
+            return
         now = time.time()
         self.request_times = [t for t in self.request_times if now - t < 60]
         
@@ -44,6 +110,8 @@ class RateLimiter:
             if wait_time > 0:
                 print(f"⏳ Rate limit: waiting {wait_time:.0f}s...")
                 time.sleep(wait_time)
+                RATE_LIMIT_WAITS.inc(limiter='contract')
+                RATE_LIMIT_WAIT.inc(wait_time, limiter='contract')
                 self.request_times = []
         
         self.request_times.append(now)
@@ -55,53 +123,83 @@ class ContractAnalyzer:
     Analyzes contracts for key terms, risks, obligations, and financial details
     """
     
-    def __init__(self, api_key: str):
-        """Initialize with Gemini API key"""
+    def __init__(self, api_key: str, cache_dir: Optional[str] = None):
+        """Initialize with Gemini API key
+        cache_dir: where chunks and LLM responses are cached (CONTRACT_CACHE_DIR, or ai-service/cache/contracts,
+        contracts_<provider> for the offline stand-in)"""
         
         self.api_key = api_key
-        self.rate_limiter = RateLimiter(requests_per_minute=12)
+        # Gemini, or the offline stand-in (LLM_PROVIDER=fake)
+        self.provider = get_provider()
+        self.rate_limiter = RateLimiter(requests_per_minute=12 if self.provider.rate_limited else 0)
         
         # Gemini LLM
-        self.llm = GoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=api_key,
+        self.llm = self.provider.text_model(
+            "gemini-2.5-flash",
+            api_key,
             temperature=0.2,  # Lower temp for accuracy
             max_retries=3
         )
         
+        self.cache = AnalysisCache(cache_dir or os.environ.get("CONTRACT_CACHE_DIR")
+                                   or default_analysis_cache_dir(self.provider.name), self.provider.name)
+        
         self.document_text = ""
         self.chunks = []
         self.analysis_results = {}
     
+    def _predict(self, prompt: str, label: str) -> str:
+        """llm.predict, recorded in the token ledger"""
+        return LEDGER.track(label, self.llm.model, prompt, lambda: self.llm.predict(prompt))
     
-    def load_contract(self, pdf_path: str) -> str:
-        """Load contract PDF with caching"""
-        cache_path = Path(pdf_path).with_suffix('.cache.json')
-
-        if cache_path.exists():
-            print("⚡ Loading contract from cache...")
-            with open(cache_path, 'r', encoding='utf-8') as cache_file:
-                self.document_text = json.load(cache_file)['document_text']
-            return self.document_text
+    def _cached_predict(self, prompt: str, label: str) -> str:
+        """_predict through the response cache; only successful responses are stored"""
+        response = self.cache.get(self.llm.model, prompt)
+        CACHE_LOOKUPS.inc(cache=f'contract_{label}', result='miss' if response is None else 'hit')
+        TRACER.annotate(cached=response is not None)
+        if response is None:
+            self.rate_limiter.wait_if_needed()
+            response = self._predict(prompt, label)
+            self.cache.put(self.llm.model, prompt, response)
+        return response
+    
+    def _combine_sections(self, chunk_analyses: List[Dict], template: str) -> str:
+        """Section analyses joined for a report prompt, merged in groups first if the
+        prompt would exceed the token budget"""
+        sections = [
+            f"SECTION {a['chunk_num']} (Pages {a['pages']}):\n{a['analysis']}"
+            for a in chunk_analyses
+        ]
 
+        def _merge(group: List[str]) -> str:
+            try:
+                merged = self._cached_predict(
+                    "Merge these contract analysis sections into one analysis. Keep every party, amount, "
+                    "date, obligation and risk, and keep the section and page references.\n\n"
+                    + "\n\n".join(group),
+                    'section_merge'
+                )
+            except Exception as e:
+                print(f"Error merging sections: {e}")
+                return "\n\n".join(group)
+            return f"MERGED SECTIONS:\n{merged}"
+
+        sections = reduce_to_budget(sections, estimate_tokens(template), _merge, label='contract sections')
+        return "\n\n" + "="*80 + "\n\n".join(sections)
+    
+    
+    @traced('load')
+    def load_contract(self, pdf_path: str) -> str:
+        """Load contract PDF text from the shared document registry (parsed once per file content)"""
         try:
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
-
-            # Combine all pages
-            self.document_text = "\n\n--- PAGE BREAK ---\n\n".join(
-                [doc.page_content for doc in documents]
-            )
-
-            # Save to cache
-            with open(cache_path, 'w', encoding='utf-8') as cache_file:
-                json.dump({'document_text': self.document_text}, cache_file)
-
+            self.document_text = DocumentRegistry.default().load_text(pdf_path)
+            TRACER.annotate(chars=len(self.document_text))
             return self.document_text
 
         except Exception as e:
             raise ValueError(f"Error loading PDF: {e}")
             
+    @traced('contract_check')
     def is_contract_document(self) -> bool:
         """
         Check if the loaded document appears to be a contract based on key indicators
@@ -132,57 +230,42 @@ class ContractAnalyzer:
         return indicator_count >= 3
     
     
+    @traced('chunk')
     def chunk_contract(self, pdf_path: str, pages_per_chunk: int = 2):
         """
         Smart chunking for contract analysis with caching
         Default: 1-2 pages per chunk for detailed analysis
         """
-        cache_path = Path(pdf_path).with_suffix(f'.chunks_{pages_per_chunk}.cache.json')
+        # Keyed by content: the uploaded file is temporary, and repeat uploads reuse the chunks
+        cache_path = self.cache.root / "chunks" / f"{file_digest(pdf_path)}_{pages_per_chunk}.json"
 
+        CACHE_LOOKUPS.inc(cache='contract_chunks', result='hit' if cache_path.exists() else 'miss')
         if cache_path.exists():
             print("⚡ Loading chunks from cache...")
             with open(cache_path, 'r', encoding='utf-8') as cache_file:
                 self.chunks = [Document(**chunk) for chunk in json.load(cache_file)]
+            TRACER.annotate(chunks=len(self.chunks), cached=True)
             return self.chunks
 
         if not self.document_text:
             raise ValueError("No document loaded. Run load_contract() first.")
 
-        # Load document pages
-        loader = PyPDFLoader(pdf_path)
-        documents = loader.load()
-
-        total_pages = len(documents)
-        num_chunks = (total_pages + pages_per_chunk - 1) // pages_per_chunk
-
-        self.chunks = []
-        for i in range(num_chunks):
-            start_idx = i * pages_per_chunk
-            end_idx = min((i + 1) * pages_per_chunk, total_pages)
-
-            combined_content = "\n\n=== PAGE BREAK ===\n\n".join(
-                doc.page_content for doc in documents[start_idx:end_idx]
-            )
-
-            chunk = Document(
-                page_content=combined_content,
-                metadata={
-                    'pages': f"{start_idx + 1}-{end_idx}",
-                    'chunk': i + 1
-                }
-            )
-            self.chunks.append(chunk)
+        # Pages come from the registry entry load_contract created, so the PDF is not parsed again
+        self.chunks = list(iter_page_chunks(DocumentRegistry.default().iter_pages(pdf_path), pages_per_chunk))
 
         # Save chunks to cache
-        with open(cache_path, 'w', encoding='utf-8') as cache_file:
-            json.dump([chunk.__dict__ for chunk in self.chunks], cache_file)
+        AnalysisCache._write(cache_path, [chunk.__dict__ for chunk in self.chunks])
 
+        TRACER.annotate(chunks=len(self.chunks), cached=False)
         return self.chunks
     
     
+    @traced('chunk_analysis')
     def analyze_chunk(self, chunk: Document, chunk_num: int) -> Dict[str, Any]:
         """Analyze individual chunk for contract elements"""
         
+        TRACER.annotate(chunk=chunk_num, pages=chunk.metadata['pages'])
+        
         analysis_prompt = f"""You are a contract analysis expert. Analyze this section of a contract and extract key information.
 
 CONTRACT SECTION (Pages {chunk.metadata['pages']}):
@@ -245,10 +328,9 @@ Extract and categorize the following (use "Not found" if not present in this sec
 Provide detailed, specific information. Quote exact amounts, dates, and key phrases where relevant.
 Format your response clearly with headers and bullet points."""
 
-        self.rate_limiter.wait_if_needed()
-        
         try:
-            response = self.llm.predict(analysis_prompt)
+            # Sections analyzed by an earlier (possibly failed) run are not sent again
+            response = self._cached_predict(analysis_prompt, 'chunk_analysis')
             return {
                 'chunk_num': chunk_num,
                 'pages': chunk.metadata['pages'],
@@ -256,8 +338,12 @@ Format your response clearly with headers and bullet points."""
             }
         except Exception as e:
             if "429" in str(e) or "quota" in str(e).lower():
-                time.sleep(60)
-                response = self.llm.predict(analysis_prompt)
+                with TRACER.span('quota_wait', seconds=self.provider.quota_wait_seconds):
+                    time.sleep(self.provider.quota_wait_seconds)
+                RATE_LIMIT_WAITS.inc(limiter='quota')
+                RATE_LIMIT_WAIT.inc(self.provider.quota_wait_seconds, limiter='quota')
+                response = self._predict(analysis_prompt, 'chunk_analysis')
+                self.cache.put(self.llm.model, analysis_prompt, response)
                 return {
                     'chunk_num': chunk_num,
                     'pages': chunk.metadata['pages'],
@@ -270,16 +356,11 @@ Format your response clearly with headers and bullet points."""
             }
     
     
+    @traced('synthesis')
     def synthesize_analysis(self, chunk_analyses: List[Dict]) -> Dict[str, str]:
         """Synthesize all chunk analyses into comprehensive report"""
         
-        # Combine all chunk analyses
-        combined_analyses = "\n\n" + "="*80 + "\n\n".join([
-            f"SECTION {a['chunk_num']} (Pages {a['pages']}):\n{a['analysis']}"
-            for a in chunk_analyses
-        ])
-        
-        synthesis_prompt = f"""You are a senior contract lawyer. Review all the analyzed sections below and create a COMPREHENSIVE CONTRACT ANALYSIS REPORT.
+        synthesis_template = """You are a senior contract lawyer. Review all the analyzed sections below and create a COMPREHENSIVE CONTRACT ANALYSIS REPORT.
 
 {combined_analyses}
 
@@ -394,10 +475,14 @@ Create a detailed report with these sections:
 
 Provide a thorough, professional analysis. Be specific and reference actual terms from the contract."""
 
+        # Combine all chunk analyses (merged in groups if they exceed the prompt budget)
+        combined_analyses = self._combine_sections(chunk_analyses, synthesis_template)
+        synthesis_prompt = synthesis_template.format(combined_analyses=combined_analyses)
+
         self.rate_limiter.wait_if_needed()
         
         try:
-            comprehensive_report = self.llm.predict(synthesis_prompt)
+            comprehensive_report = self._predict(synthesis_prompt, 'comprehensive_report')
             return {
                 'comprehensive_report': comprehensive_report,
                 'chunk_analyses': chunk_analyses
@@ -409,6 +494,7 @@ Provide a thorough, professional analysis. Be specific and reference actual term
             }
     
     
+    @traced('executive_summary')
     def generate_executive_summary(self, comprehensive_report: str) -> str:
         """Generate a quick executive summary"""
         
@@ -429,12 +515,13 @@ Make it scannable with bullet points and clear sections."""
         self.rate_limiter.wait_if_needed()
         
         try:
-            summary = self.llm.predict(summary_prompt)
+            summary = self._predict(summary_prompt, 'executive_summary')
             return summary
         except Exception as e:
             return "Error generating executive summary"
     
     
+    @traced('save')
     def save_analysis(self, output_dir: str = None):
         """Save analysis to files"""
         
@@ -481,6 +568,7 @@ Make it scannable with bullet points and clear sections."""
             json.dump(json_data, f, indent=2, ensure_ascii=False)
     
     
+    @traced('analyze_chunks')
     def analyze_chunks_parallel(self):
         """Analyze all chunks in parallel for faster processing"""
         from concurrent.futures import ThreadPoolExecutor
@@ -489,11 +577,13 @@ Make it scannable with bullet points and clear sections."""
             chunk, chunk_num = chunk_data
             return self.analyze_chunk(chunk, chunk_num)
 
+        # Chunk spans nest under this one in the worker threads
         with ThreadPoolExecutor() as executor:
-            chunk_analyses = list(executor.map(analyze_single_chunk, zip(self.chunks, range(1, len(self.chunks) + 1))))
+            chunk_analyses = list(executor.map(TRACER.propagate(analyze_single_chunk), zip(self.chunks, range(1, len(self.chunks) + 1))))
 
         return chunk_analyses
 
+    @traced('pipeline')
     def analyze_contract(self, pdf_path: str, pages_per_chunk: int = 2, output_dir: str = None):
         """Complete contract analysis pipeline with parallel chunk analysis, prioritizing executive summary"""
 
@@ -514,12 +604,7 @@ Make it scannable with bullet points and clear sections."""
 
         # Step 4: Generate executive summary directly from chunk analyses
         # This is more efficient than generating a comprehensive report first
-        combined_analyses = "\n\n" + "="*80 + "\n\n".join([
-            f"SECTION {a['chunk_num']} (Pages {a['pages']}):\n{a['analysis']}"
-            for a in chunk_analyses
-        ])
-
-        executive_summary_prompt = f"""Based on these contract analysis sections, create a concise EXECUTIVE SUMMARY (300-400 words) for a busy executive.
+        executive_summary_template = """Based on these contract analysis sections, create a concise EXECUTIVE SUMMARY (300-400 words) for a busy executive.
 
 {combined_analyses}
 
@@ -531,13 +616,15 @@ Focus on:
 5. Overall recommendation (Sign/Negotiate/Reject)
 
 Make it scannable with bullet points and clear sections."""
-
-        self.rate_limiter.wait_if_needed()
-        
-        try:
-            executive_summary = self.llm.predict(executive_summary_prompt)
-        except Exception as e:
-            executive_summary = f"Error generating executive summary: {e}"
+        with TRACER.span('executive_summary', sections=len(chunk_analyses)):
+            combined_analyses = self._combine_sections(chunk_analyses, executive_summary_template)
+            executive_summary_prompt = executive_summary_template.format(combined_analyses=combined_analyses)
+
+            try:
+                # Same section analyses (a re-run, or a repeat upload of a template) give the same prompt
+                executive_summary = self._cached_predict(executive_summary_prompt, 'executive_summary')
+            except Exception as e:
+                executive_summary = f"Error generating executive summary: {e}"
 
         # Store results
         self.analysis_results = {
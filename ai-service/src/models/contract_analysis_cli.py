@@ -27,6 +27,10 @@ sys.path.insert(0, str(Path(__file__).parent))
 # Import contract analyzer
 try:
     from contract_analysis import ContractAnalyzer
+    from token_estimator import LEDGER
+    from tracing import TRACER
+    from metrics import track_request
+    from llm_provider import get_provider
 except ImportError as e:
     print(json.dumps({
         "error": f"Failed to import ContractAnalyzer: {e}",
@@ -52,7 +56,7 @@ def main():
     
     try:
         api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        if not api_key and get_provider().requires_api_key:
             print(json.dumps({
                 "error": "GEMINI_API_KEY not found in environment",
                 "session": None
@@ -125,11 +129,14 @@ def main():
         output = {
             "executive_summary": results.get('executive_summary', ''),
             "detailed_analysis": results.get('chunk_analyses', []),
-            "session": session_id
+            "session": session_id,
+            "tokens": LEDGER.totals(),
+            "timings": TRACER.timings()
         }
         
         # Print ONLY the JSON, nothing else
         print(json.dumps(output))
+        TRACER.export()
         sys.exit(0)
         
     except Exception as e:
@@ -141,4 +148,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with track_request('contract'):
+        main()
@@ -0,0 +1,193 @@
+"""
+Document Registry
+Parses each PDF once and shares its pages with the summary, QA, timeline and
+contract flows, which run as separate CLI processes
+"""
+
+import os
+import sys
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from boilerplate import BoilerplateStripper, find_boilerplate
+from page_stream import PAGE_SEPARATOR, iter_pdf_pages_parallel, join_pages
+from pdf_backends import resolve_backend
+from metrics import CACHE_LOOKUPS
+
+# Bump when the stored page format or the extraction settings change
+REGISTRY_VERSION = 1
+DEFAULT_REGISTRY_DIR = Path(__file__).resolve().parent.parent.parent / "cache" / "documents"
+
+# (resolved path, mtime_ns, size) -> sha256, so one process hashes a file once
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: str) -> str:
+    """sha256 of a file's content"""
+    st = os.stat(path)
+    key = (str(Path(path).resolve()), st.st_mtime_ns, st.st_size)
+    if key not in _DIGESTS:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        _DIGESTS[key] = digest.hexdigest()
+    return _DIGESTS[key]
+
+
+class DocumentRegistry:
+    """
+    On-disk store of parsed PDF pages, keyed by file content.
+
+    Each document is one JSON-lines file holding a page per line with the
+    page_content/metadata PyPDFLoader produces, plus a cleaned variant with
+    repeated headers/footers stripped (what the analyzers read by default). The first reader parses the
+    PDF and writes the entry while streaming pages to its caller; every later
+    reader (any analyzer, any process) streams the stored pages instead of
+    parsing again. Entries appear atomically, so a concurrent reader either
+    sees a complete entry or parses on its own.
+    """
+
+    _default: Optional['DocumentRegistry'] = None
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or os.environ.get("DOCUMENT_REGISTRY_DIR") or DEFAULT_REGISTRY_DIR)
+
+    @classmethod
+    def default(cls) -> 'DocumentRegistry':
+        """Shared registry (DOCUMENT_REGISTRY_DIR, or ai-service/cache/documents)"""
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+    def entry_path(self, pdf_path: str, backend: Optional[str] = None, clean: bool = False) -> Path:
+        """Entry file: one per file content, text backend and cleaning"""
+        kind = resolve_backend(backend) + ('_clean' if clean else '')
+        return self.root / f"{file_digest(pdf_path)}_{kind}_v{REGISTRY_VERSION}.jsonl"
+
+    def iter_pages(self, pdf_path: str, workers: Optional[int] = None,
+                   backend: Optional[str] = None, clean: bool = True) -> Iterator[Document]:
+        """Yield the document's pages, parsing (and registering) it only if it is new.
+
+        clean: strip repeated header/footer lines (see boilerplate.py). The
+        cleaned pages are registered too, so stripping also happens once.
+        Registered entries always stream. Cleaning a new document needs every
+        page's edge lines first, so its first page comes after the raw pass;
+        memory stays one page either way. Callers that need pages while a new
+        PDF is still being parsed use clean=False.
+        """
+        backend = resolve_backend(backend)
+        entry = self.entry_path(pdf_path, backend, clean)
+        if (yield from self._iter_entry(entry, pdf_path)):
+            CACHE_LOOKUPS.inc(cache='document_registry', result='hit')
+            return
+        if not clean:
+            yield from self._parse_and_store(pdf_path, entry, workers, backend)
+            return
+
+        # Two passes over the raw pages (the second reads the entry the first registered)
+        boilerplate = find_boilerplate(page.page_content
+                                       for page in self.iter_pages(pdf_path, workers, backend, clean=False))
+        stripper = BoilerplateStripper(boilerplate)
+        cleaned = (stripper.strip(page) for page in self.iter_pages(pdf_path, workers, backend, clean=False))
+        if (yield from self._store_pages(cleaned, entry, pdf_path)):
+            report = stripper.report()
+            print(f"[document-registry] Stripped {report['lines_removed']} header/footer lines from "
+                  f"{Path(pdf_path).name}: {report['bytes_removed']} bytes, ~{report['tokens_removed']} tokens",
+                  file=sys.stderr)
+            self._write_file(entry.with_suffix('.report.json'), json.dumps(report, indent=2))
+
+    def load_pages(self, pdf_path: str, workers: Optional[int] = None,
+                   backend: Optional[str] = None, clean: bool = True) -> List[Document]:
+        return list(self.iter_pages(pdf_path, workers, backend, clean))
+
+    def load_text(self, pdf_path: str, workers: Optional[int] = None, separator: str = PAGE_SEPARATOR,
+                  backend: Optional[str] = None, clean: bool = True) -> str:
+        return join_pages(self.iter_pages(pdf_path, workers, backend, clean), separator)
+
+    def boilerplate_report(self, pdf_path: str, backend: Optional[str] = None) -> Optional[Dict]:
+        """What cleaning removed from a registered document (bytes, tokens, lines), if it was cleaned"""
+        report_file = self.entry_path(pdf_path, backend, clean=True).with_suffix('.report.json')
+        try:
+            with open(report_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _page_line(page: Document) -> str:
+        return json.dumps({'page_content': page.page_content, 'metadata': page.metadata}, default=str) + '\n'
+
+    @staticmethod
+    def _iter_entry(entry: Path, pdf_path: str):
+        """Stream a registered entry; returns False (nothing yielded) when there is no usable entry"""
+        if not entry.exists():
+            return False
+        yielded = False
+        try:
+            with open(entry, 'r', encoding='utf-8') as f:
+                for line in f:
+                    page = json.loads(line)
+                    yielded = True
+                    # Same content, possibly another upload path: report this caller's path
+                    metadata = page['metadata']
+                    if 'source' in metadata:
+                        metadata['source'] = pdf_path
+                    yield Document(page_content=page['page_content'], metadata=metadata)
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            if yielded:
+                raise
+            print(f"[document-registry] Warning: re-parsing unreadable entry {entry.name}: {e}", file=sys.stderr)
+            return False
+
+    @staticmethod
+    def _write_file(path: Path, content: str) -> None:
+        """Write then rename so concurrent readers never see a partial file"""
+        tmp_file = path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_file, path)
+        except OSError as e:
+            print(f"[document-registry] Warning: could not write {path.name}: {e}", file=sys.stderr)
+
+    def _parse_and_store(self, pdf_path: str, entry: Path, workers: Optional[int], backend: str) -> Iterator[Document]:
+        CACHE_LOOKUPS.inc(cache='document_registry', result='miss')
+        yield from self._store_pages(iter_pdf_pages_parallel(pdf_path, workers, backend), entry, pdf_path)
+
+    def _store_pages(self, pages: Iterable[Document], entry: Path, pdf_path: str):
+        """Yield pages while writing them to an entry; returns True once the entry is registered"""
+        tmp_file = entry.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            out = open(tmp_file, 'w', encoding='utf-8')
+        except OSError as e:
+            print(f"[document-registry] Warning: not registering {Path(pdf_path).name}: {e}", file=sys.stderr)
+            yield from pages
+            return False
+
+        complete = False
+        try:
+            with out:
+                for page in pages:
+                    out.write(self._page_line(page))
+                    yield page
+            # Only a fully parsed document is registered; write then rename
+            try:
+                os.replace(tmp_file, entry)
+                complete = True
+            except OSError as e:
+                print(f"[document-registry] Warning: could not register {Path(pdf_path).name}: {e}", file=sys.stderr)
+        finally:
+            if not complete:
+                try:
+                    tmp_file.unlink()
+                except OSError:
+                    pass
+        return complete
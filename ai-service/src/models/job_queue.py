@@ -0,0 +1,503 @@
+#!/usr/bin/env python3
+"""
+Job Queue
+Local SQLite-backed queue for long analyses (no external broker). Jobs run the
+existing CLIs in worker processes, highest priority first; identical in-flight
+jobs (same kind, same document content, same options) collapse into one run
+that every submitter shares; results are persisted for polling.
+
+Usage:
+  python job_queue.py submit summary --pdf path/to/file.pdf [--set chunk_size=25] [--priority N] [--wait]
+  python job_queue.py submit precedent --stdin < input.json
+  python job_queue.py status <job_id> | wait <job_id> [--timeout S] | cancel <job_id>
+  python job_queue.py worker [--concurrency 2] [--once]
+All commands print JSON to stdout.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import socket
+import sqlite3
+import hashlib
+import argparse
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+CURRENT_DIR = Path(__file__).parent.resolve()
+if str(CURRENT_DIR) not in sys.path:
+    sys.path.insert(0, str(CURRENT_DIR))
+
+from document_registry import file_digest
+from metrics import JOBS, QUEUE_DEPTH, REGISTRY, MetricsStore
+from single_flight import normalize_question
+
+DEFAULT_QUEUE_DB = CURRENT_DIR.parent.parent / "cache" / "jobs.sqlite"
+# Uploaded PDFs are copied here (by content hash) so the client can delete its temp file
+DEFAULT_SPOOL_DIR = CURRENT_DIR.parent.parent / "cache" / "job_files"
+
+# Higher runs first: interactive chat ahead of batch summaries
+PRIORITY_INTERACTIVE = 100
+PRIORITY_NORMAL = 50
+PRIORITY_BATCH = 10
+
+# A running job whose worker has not checked in for LEASE_SECONDS is requeued
+# (worker crashed or was killed), up to MAX_ATTEMPTS runs in total
+HEARTBEAT_SECONDS = 5
+LEASE_SECONDS = 60
+MAX_ATTEMPTS = 2
+
+IN_FLIGHT = ('queued', 'running')
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+class JobKind:
+    """How to run one kind of job: a CLI script, its flags (payload keys) or a JSON stdin payload"""
+
+    def __init__(self, script: str, flags: Tuple[str, ...] = (), stdin: bool = False, priority: int = PRIORITY_NORMAL):
+        self.script = script
+        self.flags = flags
+        self.stdin = stdin
+        self.priority = priority
+
+    def command(self, payload: Dict[str, Any]) -> Tuple[List[str], Optional[str]]:
+        """(argv, stdin text)"""
+        script = self.script if Path(self.script).is_absolute() else str(CURRENT_DIR / self.script)
+        argv = [sys.executable, script]
+        if self.stdin:
+            return argv, json.dumps(payload)
+        for flag in self.flags:
+            value = payload.get(flag)
+            if value is None or value is False:
+                continue
+            argv.append(f"--{flag}")
+            if value is not True:
+                argv.append(str(value))
+        return argv, None
+
+
+# Named after the CLI entry points (see metrics.py operations)
+JOB_KINDS: Dict[str, JobKind] = {
+    'summary': JobKind('summarize_cli.py', ('pdf', 'text', 'chunk_size', 'quick'), priority=PRIORITY_BATCH),
+    'contract': JobKind('contract_analysis_cli.py', ('pdf', 'text', 'quick'), priority=PRIORITY_BATCH),
+    'timeline': JobKind('timeline_cli.py', ('pdf', 'output', 'workers'), priority=PRIORITY_NORMAL),
+    'qa': JobKind('qa_cli.py', ('ask', 'session', 'pdf', 'text'), priority=PRIORITY_INTERACTIVE),
+    'timeline_refactor': JobKind('refactor_timeline_cli.py', stdin=True, priority=PRIORITY_NORMAL),
+    'precedent': JobKind('precedent_search_cli.py', stdin=True, priority=PRIORITY_NORMAL),
+    'refine_context': JobKind('refine_context_cli.py', stdin=True, priority=PRIORITY_INTERACTIVE),
+}
+
+
+def dedup_key(kind: str, payload: Dict[str, Any]) -> str:
+    """Same kind, same document content and same options -> same key (the PDF path does not matter;
+    chat questions are compared normalized)"""
+    basis = dict(payload)
+    if kind == 'qa' and basis.get('ask'):
+        basis['ask'] = normalize_question(basis['ask'])
+    if basis.get('pdf'):
+        basis['pdf'] = file_digest(basis['pdf'])
+    raw = json.dumps([kind, basis], sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class JobQueue:
+    """
+    Jobs table in SQLite: one row per job, in-flight rows unique per
+    (kind, dedup_key). Every state change is a short transaction, so any
+    number of submitting clients and worker processes can share the file.
+    """
+
+    def __init__(self, path: Optional[str] = None, spool_dir: Optional[str] = None):
+        self.path = Path(path or os.environ.get("JOB_QUEUE_DB") or DEFAULT_QUEUE_DB)
+        self.spool_dir = Path(spool_dir or os.environ.get("JOB_SPOOL_DIR") or DEFAULT_SPOOL_DIR)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, kind TEXT NOT NULL, dedup_key TEXT NOT NULL,
+                priority INTEGER NOT NULL, status TEXT NOT NULL, payload TEXT NOT NULL,
+                result TEXT, error TEXT, exit_code INTEGER,
+                refs INTEGER NOT NULL DEFAULT 1, attempts INTEGER NOT NULL DEFAULT 0,
+                cancel_requested INTEGER NOT NULL DEFAULT 0, worker TEXT, lease TEXT,
+                created REAL NOT NULL, started REAL, heartbeat REAL, finished REAL)""")
+            if 'lease' not in {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                conn.execute("ALTER TABLE jobs ADD COLUMN lease TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_pending ON jobs (status, priority DESC, created)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS jobs_in_flight ON jobs (kind, dedup_key) "
+                         "WHERE status IN ('queued', 'running')")
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit; write transactions are opened with BEGIN IMMEDIATE
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _spool(self, pdf_path: str) -> str:
+        """Queue-owned copy of an uploaded file, named by content"""
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        target = self.spool_dir / f"{file_digest(pdf_path)}{Path(pdf_path).suffix.lower() or '.pdf'}"
+        if not target.exists():
+            tmp_file = target.with_suffix(f'.{os.getpid()}.tmp')
+            shutil.copyfile(pdf_path, tmp_file)
+            os.replace(tmp_file, target)
+        return str(target)
+
+    def submit(self, kind: str, payload: Dict[str, Any], priority: Optional[int] = None) -> Dict[str, Any]:
+        """Queue a job, or join the identical job already queued or running.
+        Joining raises the shared job's priority to the higher of the two."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind '{kind}' (choose from {', '.join(JOB_KINDS)})")
+        priority = JOB_KINDS[kind].priority if priority is None else priority
+        key = dedup_key(kind, payload)
+        source = payload.get('pdf')
+        payload = dict(payload)
+        if source:
+            payload['pdf'] = self._spool(source)
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if source and not Path(payload['pdf']).exists():
+                # A finished job sharing the copy released it since: restore it under the lock
+                payload['pdf'] = self._spool(source)
+            row = conn.execute("SELECT id, status FROM jobs WHERE kind = ? AND dedup_key = ? AND status IN (?, ?)",
+                               (kind, key) + IN_FLIGHT).fetchone()
+            if row:
+                conn.execute("UPDATE jobs SET refs = refs + 1, priority = MAX(priority, ?) WHERE id = ?",
+                             (priority, row['id']))
+                conn.execute("COMMIT")
+                JOBS.inc(kind=kind, outcome='deduplicated')
+                return {'job_id': row['id'], 'status': row['status'], 'deduplicated': True}
+            job_id = uuid.uuid4().hex
+            conn.execute("INSERT INTO jobs (id, kind, dedup_key, priority, status, payload, created) "
+                         "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                         (job_id, kind, key, priority, json.dumps(payload), time.time()))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        JOBS.inc(kind=kind, outcome='submitted')
+        return {'job_id': job_id, 'status': 'queued', 'deduplicated': False}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job status; the result (the CLI's JSON output) once finished"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = {k: row[k] for k in ('kind', 'status', 'priority', 'error', 'exit_code', 'attempts',
+                                       'created', 'started', 'finished')}
+            job['job_id'] = row['id']
+            job['result'] = json.loads(row['result']) if row['result'] else None
+            if row['status'] == 'queued':
+                job['position'] = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority > ? OR (priority = ? AND created < ?))",
+                    (row['priority'], row['priority'], row['created'])).fetchone()[0]
+            return job
+        finally:
+            conn.close()
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll: float = 0.2) -> Optional[Dict[str, Any]]:
+        """Block until the job finishes (or timeout); returns its latest status"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job['status'] in FINISHED:
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll)
+            poll = min(poll * 1.5, 2.0)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Withdraw one submitter. The job itself is cancelled when no submitter
+        is left: a queued job at once, a running one by stopping its process."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT status, refs FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row['status'] in FINISHED:
+                conn.execute("COMMIT")
+                return self.get(job_id)
+            if row['refs'] > 1:
+                conn.execute("UPDATE jobs SET refs = refs - 1 WHERE id = ?", (job_id,))
+            elif row['status'] == 'queued':
+                conn.execute("UPDATE jobs SET refs = 0, status = 'cancelled', finished = ? WHERE id = ?",
+                             (time.time(), job_id))
+            else:
+                conn.execute("UPDATE jobs SET refs = 0, cancel_requested = 1 WHERE id = ?", (job_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return self.get(job_id)
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """Take the highest-priority, oldest queued job (requeueing jobs of lost workers first)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                         "error = CASE WHEN attempts >= ? THEN 'worker lost' ELSE error END, "
+                         "finished = CASE WHEN attempts >= ? THEN ? ELSE finished END, worker = NULL, lease = NULL "
+                         "WHERE status = 'running' AND heartbeat < ?",
+                         (MAX_ATTEMPTS, MAX_ATTEMPTS, MAX_ATTEMPTS, now, now - LEASE_SECONDS))
+            row = conn.execute("SELECT * FROM jobs WHERE status = 'queued' "
+                               "ORDER BY priority DESC, created LIMIT 1").fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            lease = uuid.uuid4().hex
+            conn.execute("UPDATE jobs SET status = 'running', worker = ?, lease = ?, started = ?, heartbeat = ?, "
+                         "attempts = attempts + 1 WHERE id = ?", (worker, lease, now, now, row['id']))
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return {'job_id': row['id'], 'kind': row['kind'], 'payload': json.loads(row['payload']), 'lease': lease}
+
+    def heartbeat(self, job_id: str, lease: str) -> bool:
+        """Extend the job's lease; True if the run should stop (cancelled, or its lease
+        expired and the job was requeued for another attempt)"""
+        conn = self._connect()
+        try:
+            updated = conn.execute("UPDATE jobs SET heartbeat = ? WHERE id = ? AND lease = ? AND status = 'running'",
+                                   (time.time(), job_id, lease)).rowcount
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            return not updated or bool(row and row['cancel_requested'])
+        finally:
+            conn.close()
+
+    def finish(self, job_id: str, lease: str, status: str, result: Any = None, error: Optional[str] = None,
+               exit_code: Optional[int] = None) -> None:
+        """Record the outcome of the run holding lease (a run whose lease was lost changes nothing)"""
+        conn = self._connect()
+        try:
+            updated = conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, exit_code = ?, finished = ? "
+                                   "WHERE id = ? AND lease = ? AND status = 'running'",
+                                   (status, None if result is None else json.dumps(result), error, exit_code,
+                                    time.time(), job_id, lease)).rowcount
+            row = conn.execute("SELECT kind, payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if updated and row:
+            JOBS.inc(kind=row['kind'], outcome=status)
+            self._release_spool(json.loads(row['payload']).get('pdf'))
+
+    def _release_spool(self, pdf_path: Optional[str]) -> None:
+        """Delete a spooled file once no in-flight job needs it. Checked and deleted
+        under the write lock, which submit also holds while it makes sure its copy exists."""
+        if not pdf_path or Path(pdf_path).parent != self.spool_dir:
+            return
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            in_use = conn.execute("SELECT COUNT(*) FROM jobs WHERE status IN (?, ?) AND payload LIKE ?",
+                                  IN_FLIGHT + (f'%{Path(pdf_path).name}%',)).fetchone()[0]
+            if not in_use:
+                try:
+                    os.remove(pdf_path)
+                except OSError:
+                    pass
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def depth(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status",
+                                IN_FLIGHT).fetchall()
+        finally:
+            conn.close()
+        depth = {status: 0 for status in IN_FLIGHT}
+        depth.update({status: count for status, count in rows})
+        return depth
+
+
+def _parse_output(stdout: str) -> Any:
+    """The CLI's JSON output (the last JSON document when something else was printed first)"""
+    text = stdout.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        for line in reversed(text.splitlines()):
+            try:
+                return json.loads(line)
+            except ValueError:
+                continue
+    return None
+
+
+class Worker:
+    """Runs claimed jobs as CLI subprocesses, `concurrency` at a time"""
+
+    def __init__(self, queue: JobQueue, concurrency: int = 2, poll: float = 1.0,
+                 metrics_store: Optional[MetricsStore] = None):
+        self.queue = queue
+        # Where queue depth is recorded (None: METRICS_DB or the default store)
+        self.metrics_store = metrics_store
+        self.concurrency = max(1, concurrency)
+        self.poll = poll
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._stop = threading.Event()
+
+    def run_job(self, job: Dict[str, Any]) -> str:
+        argv, stdin = JOB_KINDS[job['kind']].command(job['payload'])
+        print(f"[job-queue] {job['job_id']} {job['kind']} started", file=sys.stderr)
+        env = dict(os.environ, PYTHONIOENCODING='utf-8', PYTHONUTF8='1')
+        proc = subprocess.Popen(argv, cwd=str(CURRENT_DIR), env=env, text=True, encoding='utf-8',
+                                stdin=subprocess.PIPE if stdin is not None else subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        cancelled = False
+        try:
+            while True:
+                try:
+                    stdout, stderr = proc.communicate(input=stdin, timeout=HEARTBEAT_SECONDS)
+                    break
+                except subprocess.TimeoutExpired:
+                    # The input went in on the first call; retries only keep reading
+                    stdin = None
+                    if self.queue.heartbeat(job['job_id'], job['lease']) and not cancelled:
+                        cancelled = True
+                        proc.terminate()
+        except BaseException:
+            # The job is marked failed by the caller: don't leave its CLI running
+            proc.kill()
+            proc.wait()
+            raise
+        result = _parse_output(stdout)
+        if cancelled:
+            status, error = 'cancelled', None
+        elif proc.returncode == 0 and result is not None and not (isinstance(result, dict) and result.get('error')):
+            status, error = 'done', None
+        else:
+            status = 'failed'
+            error = (result.get('error') if isinstance(result, dict) else None) or stderr.strip()[-2000:] \
+                or f"exit code {proc.returncode}"
+        self.queue.finish(job['job_id'], job['lease'], status, result, error, proc.returncode)
+        print(f"[job-queue] {job['job_id']} {job['kind']} {status}", file=sys.stderr)
+        return status
+
+    def _record_depth(self) -> None:
+        for status, count in self.queue.depth().items():
+            QUEUE_DEPTH.set(count, status=status)
+        REGISTRY.flush(self.metrics_store)
+
+    def _loop(self, once: bool) -> None:
+        while not self._stop.is_set():
+            job = self.queue.claim(self.name)
+            if job is None:
+                if once:
+                    return
+                self._stop.wait(self.poll)
+                continue
+            try:
+                self.run_job(job)
+            except Exception as e:
+                self.queue.finish(job['job_id'], job['lease'], 'failed', error=f"worker error: {e}")
+            self._record_depth()
+
+    def run(self, once: bool = False) -> None:
+        """Process jobs until stopped (once: until the queue is empty)"""
+        threads = [threading.Thread(target=self._loop, args=(once,), daemon=True) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self._stop.set()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local job queue for ai-service analyses")
+    parser.add_argument("--db", default=None, help="Queue database (default: JOB_QUEUE_DB or ai-service/cache/jobs.sqlite)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="Queue a job (or join an identical one in flight)")
+    submit.add_argument("kind", choices=list(JOB_KINDS))
+    submit.add_argument("--pdf", type=str, default=None)
+    submit.add_argument("--text", type=str, default=None)
+    submit.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="Other CLI options")
+    submit.add_argument("--stdin", action="store_true", help="Read the JSON payload from stdin")
+    submit.add_argument("--priority", type=int, default=None)
+    submit.add_argument("--wait", action="store_true", help="Wait for the result")
+    submit.add_argument("--timeout", type=float, default=None)
+
+    for name in ("status", "wait", "cancel"):
+        command = commands.add_parser(name)
+        command.add_argument("job_id")
+        if name == "wait":
+            command.add_argument("--timeout", type=float, default=None)
+
+    worker = commands.add_parser("worker", help="Run queued jobs")
+    worker.add_argument("--concurrency", type=int, default=int(os.environ.get("JOB_WORKERS", "2")))
+    worker.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+    args = parser.parse_args()
+
+    queue = JobQueue(args.db)
+    if args.command == "worker":
+        print(f"[job-queue] Worker {os.getpid()} on {queue.path} ({args.concurrency} at a time)", file=sys.stderr)
+        Worker(queue, args.concurrency).run(once=args.once)
+        return 0
+
+    if args.command == "submit":
+        if args.stdin:
+            payload = json.loads(sys.stdin.read() or '{}')
+        else:
+            payload = {'pdf': args.pdf, 'text': args.text}
+            for option in args.set:
+                key, _, value = option.partition('=')
+                payload[key] = True if value == '' else value
+            payload = {k: v for k, v in payload.items() if v is not None}
+        try:
+            response = queue.submit(args.kind, payload, args.priority)
+        except (ValueError, OSError) as e:
+            print(json.dumps({"error": str(e)}))
+            return 1
+        finally:
+            REGISTRY.flush()
+        if args.wait:
+            response = queue.wait(response['job_id'], args.timeout)
+    elif args.command == "status":
+        response = queue.get(args.job_id)
+    elif args.command == "wait":
+        response = queue.wait(args.job_id, args.timeout)
+    else:
+        response = queue.cancel(args.job_id)
+
+    if response is None:
+        print(json.dumps({"error": f"No job {args.job_id}"}))
+        return 1
+    print(json.dumps(response))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
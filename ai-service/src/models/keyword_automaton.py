@@ -0,0 +1,103 @@
+"""
+Keyword Automaton for Event Classification
+Finds every keyword of a fixed vocabulary in a text with a single scan
+"""
+
+import re
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class KeywordAutomaton:
+    """
+    Multi-keyword matcher built once from keyword lists.
+
+    The vocabulary is compiled into a trie-shaped regex whose tail sits in a
+    lookahead, so one finditer pass reports the longest keyword starting at
+    every position (overlapping matches included) and the regex engine does
+    the per-character work in C. Shorter keywords sharing that start are
+    recovered from a precomputed prefix table, giving the same result as
+    testing `keyword in text` for every keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = sorted({kw.lower() for kw in keywords if kw})
+        self._pattern = re.compile(self._build_pattern(self.keywords)) if self.keywords else None
+        self._prefixes: Dict[str, FrozenSet[str]] = {
+            kw: frozenset(other for other in self.keywords if kw.startswith(other))
+            for kw in self.keywords
+        }
+        self._group_names: List[str] = []
+        self._weights: Dict[str, List[Tuple[str, int]]] = {}
+
+    @classmethod
+    def from_groups(cls, groups: Dict[str, List[str]], extra_keywords: Iterable[str] = ()) -> 'KeywordAutomaton':
+        """Build an automaton that can also score named keyword groups.
+
+        extra_keywords are detected by find_all but never contribute to scores.
+        """
+        automaton = cls([kw for keywords in groups.values() for kw in keywords] + list(extra_keywords))
+        automaton._group_names = list(groups)
+        for name, keywords in groups.items():
+            for kw in keywords:
+                automaton._weights.setdefault(kw.lower(), []).append((name, len(kw.split())))
+        return automaton
+
+    @staticmethod
+    def _build_pattern(keywords: List[str]) -> str:
+        """Compile keywords into a trie regex that prefers the longest match"""
+        trie: Dict[str, dict] = {}
+        for kw in keywords:
+            node = trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+
+        def build(node: Dict[str, dict]) -> str:
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            # A keyword ends here: the longer continuation stays optional (greedy)
+            return f'(?:{body})?' if '' in node else body
+
+        # One branch per first character: consuming it lets the regex engine skip
+        # positions by charset, the lookahead captures the rest of the keyword
+        return '|'.join(
+            f'{re.escape(ch)}(?=({build(child)}))'
+            for ch, child in sorted(trie.items())
+        )
+
+    def find_all(self, text: str) -> Set[str]:
+        """Return every keyword that occurs in the (lowercased) text"""
+        if not self._pattern:
+            return set()
+        found: Set[str] = set()
+        for match in self._pattern.finditer(text):
+            found |= self._prefixes[match.group(0) + match.group(match.lastindex)]
+        return found
+
+    def score(self, text: str = '', found: Set[str] = None) -> Dict[str, int]:
+        """Score each group by the word count of its keywords present in the text.
+
+        Groups without hits are left out; the rest keep their definition order
+        so ties resolve the same way as scanning the groups one by one.
+        """
+        if found is None:
+            found = self.find_all(text)
+        totals: Dict[str, int] = {}
+        for kw in found:
+            for name, weight in self._weights.get(kw, ()):
+                totals[name] = totals.get(name, 0) + weight
+        return {name: totals[name] for name in self._group_names if totals.get(name, 0) > 0}
+
+
+def first_rule(text: str, rules: List[Tuple[Iterable[str], str]], default: Optional[str]) -> Optional[str]:
+    """Return the label of the first (keywords, label) rule with a keyword in the text.
+
+    Ordered rule tables usually stop at the first rule or two, so plain substring
+    tests beat a full automaton scan here.
+    """
+    for keywords, label in rules:
+        if any(kw in text for kw in keywords):
+            return label
+    return default
@@ -0,0 +1,217 @@
+"""
+LLM Providers
+Gemini, or a local stand-in (LLM_PROVIDER=fake) that answers offline with
+simulated latency and 429s, for tests and pipeline benchmarks
+"""
+
+import os
+import re
+import json
+import time
+import random
+import functools
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class GeminiProvider:
+    """Google Gemini (the default)"""
+
+    name = 'gemini'
+    requires_api_key = True
+    rate_limited = True
+    # Wait after a 429 before retrying, and spacing between sequential calls
+    quota_wait_seconds = 60
+    pause_seconds = 1
+
+    def text_model(self, model: str, api_key: str, **params):
+        """LangChain LLM (predict/invoke)"""
+        from langchain_google_genai import GoogleGenerativeAI
+        return GoogleGenerativeAI(model=model, google_api_key=api_key, **params)
+
+    def generative_model(self, model: str, api_key: str):
+        """google.generativeai model (generate_content)"""
+        import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        return genai.GenerativeModel(model)
+
+
+class LatencyModel:
+    """
+    Simulated call latency, from a spec string (milliseconds):
+    'fixed:800', 'uniform:200,1500', 'lognormal:900,0.5' (median, sigma), or '0'
+    """
+
+    def __init__(self, spec: str = '0'):
+        kind, _, args = spec.partition(':')
+        if not args:
+            kind, args = 'fixed', kind
+        self.kind = kind
+        self.args = [float(a) for a in args.split(',')]
+        if kind not in ('fixed', 'uniform', 'lognormal'):
+            raise ValueError(f"Unknown latency distribution '{kind}' (fixed, uniform, lognormal)")
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds"""
+        if self.kind == 'fixed':
+            ms = self.args[0]
+        elif self.kind == 'uniform':
+            ms = rng.uniform(self.args[0], self.args[1])
+        else:
+            ms = rng.lognormvariate(0, self.args[1]) * self.args[0]
+        return max(0.0, ms) / 1000
+
+
+class FakeQuotaError(Exception):
+    pass
+
+
+class FakeResponse:
+    """The parts of a generate_content response the callers read"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+EXEC_HEADINGS = ("Case Summary:", "What did the court decide:", "What are the outcomes:")
+
+
+_INSTRUCTION = re.compile(r'\b(?:MUST|NEVER|ALWAYS|IMPORTANT|CRITICAL|DO NOT)\b')
+_NOT_MATERIAL = re.compile(r':\s*$|^\s*[-*•]\s|^\s*[=-]{3} PAGE BREAK [=-]{3}\s*$')
+
+
+def _material(prompt: str) -> str:
+    """The document text inside a prompt: paragraphs after the opening instruction
+    that are not themselves instructions, without 'Label:', bullet and page-break lines"""
+    paragraphs = [p.strip() for p in re.split(r'\n\s*\n', prompt) if p.strip()]
+    material = [p for p in paragraphs[1:] if not _INSTRUCTION.search(p)] or paragraphs
+    lines = [line for p in material for line in p.splitlines() if not _NOT_MATERIAL.search(line)]
+    return ' '.join(lines)
+
+
+def _words(text: str, limit: int) -> str:
+    words = text.split()[:limit]
+    return ' '.join(words).rstrip(' ,;:.') + ('.' if words else '')
+
+
+def fake_reply(prompt: str, json_mode: bool = False, canned: Optional[str] = None, echo_words: int = 150) -> str:
+    """Deterministic answer shaped like what the caller's prompt asks for"""
+    # Timeline batch prompts: a JSON list with one summary per event id
+    ids = re.findall(r'\[id: (\w+)\]', prompt)
+    if ids:
+        contexts = re.findall(r'Event Context: (.*?)(?=\n\n\[id: |\Z)', prompt, re.DOTALL)
+        return json.dumps([
+            {"id": event_id, "summary": _words(context, 40) + "\nThe court recorded this step in the proceedings."}
+            for event_id, context in zip(ids, contexts + [''] * len(ids))
+        ])
+    if json_mode or 'JSON array' in prompt:
+        return '[]'
+    if canned is not None:
+        return canned
+    body = _material(prompt)
+    if all(heading in prompt for heading in EXEC_HEADINGS):
+        thirds = [body[i * len(body) // 3:(i + 1) * len(body) // 3] for i in range(3)]
+        return "\n\n".join(f"{heading}\n{_words(part, echo_words)}" for heading, part in zip(EXEC_HEADINGS, thirds))
+    return _words(body, echo_words)
+
+
+@functools.lru_cache(maxsize=None)
+def _fake_llm_class():
+    """FakeLLM, defined on first use: the LangChain LLM base class costs most of a second to import"""
+    from langchain_core.language_models.llms import LLM
+
+    class FakeLLM(LLM):
+        """
+        Offline stand-in for both GoogleGenerativeAI (predict/invoke, usable in
+        LangChain chains) and google.generativeai models (generate_content).
+        Answers with fake_reply after a simulated latency; a share of calls
+        fails with a 429 error like an exhausted Gemini quota.
+        """
+
+        model: str = 'fake-gemini'
+        provider: Any = None
+
+        @property
+        def _llm_type(self) -> str:
+            return 'fake'
+
+        @property
+        def model_name(self) -> str:
+            return self.model
+
+        def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+            return self.provider.respond(prompt)
+
+        def generate_content(self, prompt: str, generation_config: Any = None, safety_settings: Any = None, **kwargs) -> FakeResponse:
+            json_mode = getattr(generation_config, 'response_mime_type', None) == 'application/json'
+            return FakeResponse(self.provider.respond(prompt, json_mode))
+
+    return FakeLLM
+
+
+def __getattr__(name):
+    if name == 'FakeLLM':
+        return _fake_llm_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class FakeProvider:
+    """
+    Local stand-in for Gemini. Settings (arguments or environment):
+      FAKE_LLM_LATENCY     latency spec, see LatencyModel (default '0')
+      FAKE_LLM_429_RATE    share of calls failing with a 429 (default 0)
+      FAKE_LLM_SEED        random seed for latency and failures (default 0)
+      FAKE_LLM_RESPONSE    canned answer for free-text prompts (default: echo the prompt)
+      FAKE_LLM_QUOTA_WAIT  seconds callers wait after a 429 (default 0.1)
+    """
+
+    name = 'fake'
+    requires_api_key = False
+    rate_limited = False
+    pause_seconds = 0
+
+    def __init__(self, latency: Optional[str] = None, error_rate: Optional[float] = None,
+                 seed: Optional[int] = None, canned: Optional[str] = None):
+        self.latency = LatencyModel(latency or os.environ.get('FAKE_LLM_LATENCY', '0'))
+        self.error_rate = float(error_rate if error_rate is not None else os.environ.get('FAKE_LLM_429_RATE', '0'))
+        self.canned = canned if canned is not None else os.environ.get('FAKE_LLM_RESPONSE')
+        self.quota_wait_seconds = float(os.environ.get('FAKE_LLM_QUOTA_WAIT', '0.1'))
+        self._rng = random.Random(int(seed if seed is not None else os.environ.get('FAKE_LLM_SEED', '0')))
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+
+    def respond(self, prompt: str, json_mode: bool = False) -> str:
+        with self._lock:
+            delay = self.latency.sample(self._rng)
+            fail = self._rng.random() < self.error_rate
+            self.calls += 1
+            self.errors += fail
+        time.sleep(delay)
+        if fail:
+            raise FakeQuotaError("429 Resource has been exhausted (fake quota)")
+        return fake_reply(prompt, json_mode, self.canned)
+
+    def model_id(self, model: str) -> str:
+        """Name the stand-in reports for a Gemini model: caches and the token ledger keep it apart"""
+        return f"{self.name}:{model}"
+
+    def text_model(self, model: str, api_key: str = '', **params) -> 'FakeLLM':
+        return _fake_llm_class()(model=self.model_id(model), provider=self)
+
+    def generative_model(self, model: str, api_key: str = '') -> 'FakeLLM':
+        return _fake_llm_class()(model=self.model_id(model), provider=self)
+
+
+PROVIDERS = {'gemini': GeminiProvider, 'fake': FakeProvider}
+_instances: Dict[str, Any] = {}
+
+
+def get_provider(name: Optional[str] = None):
+    """Provider by name, or LLM_PROVIDER (default gemini); one shared instance per name"""
+    name = (name or os.environ.get('LLM_PROVIDER') or 'gemini').lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}' (choose from {', '.join(PROVIDERS)})")
+    if name not in _instances:
+        _instances[name] = PROVIDERS[name]()
+    return _instances[name]
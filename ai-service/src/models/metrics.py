@@ -0,0 +1,440 @@
+#!/usr/bin/env python3
+"""
+Metrics
+Prometheus-style counters, gauges and histograms for the ai-service. Each CLI
+run records into the in-process registry and merges it into a shared SQLite
+store when it exits (see track_request); `python metrics.py` serves the
+aggregate in the Prometheus text exposition format on localhost.
+
+Usage: python metrics.py [--port 9464] [--host 127.0.0.1] [--db path] [--once]
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+DEFAULT_METRICS_DB = Path(__file__).resolve().parent.parent.parent / "cache" / "metrics.sqlite"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; pipelines run from under a second (cached) to several minutes (rate-limited)
+REQUEST_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+# Kept per process in the store (see MetricsStore.mark_running), not merged as a gauge
+IN_PROGRESS_METRIC = 'kanunai_requests_in_progress'
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _label_text(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+class Metric:
+    """A metric family: name, help text, label names and per-label-set values"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> Iterator[Tuple[str, Tuple[str, ...], LabelValues, float]]:
+        """(sample name, label names, label values, value)"""
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, self.labelnames, key, value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    merge: how processes combine in the shared store. 'sum' adds each
+    process's change (inc/dec, e.g. requests in progress); 'last' keeps
+    the most recently written value (set, e.g. the last run's peak RSS).
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), merge: str = 'sum'):
+        super().__init__(name, documentation, labelnames)
+        self.merge = merge
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        # label values -> [per-bucket counts..., sum]
+        self._observations: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            entry = self._observations.setdefault(key, [0] * len(self.buckets) + [0.0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-1] += value
+
+    def samples(self):
+        with self._lock:
+            observations = {key: list(entry) for key, entry in self._observations.items()}
+        for key, entry in sorted(observations.items()):
+            for bound, count in zip(self.buckets, entry):
+                yield f"{self.name}_bucket", self.labelnames + ('le',), key + (_format_value(bound),), count
+            yield f"{self.name}_sum", self.labelnames, key, entry[-1]
+            yield f"{self.name}_count", self.labelnames, key, entry[len(self.buckets) - 1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._observations = {}
+
+
+class MetricsStore:
+    """
+    Shared SQLite file the CLI processes merge their metrics into: one row
+    per sample (name + labels). Counters, histograms and 'sum' gauges add;
+    'last' gauges overwrite. SQLite serialises concurrent writers.
+
+    Requests in progress are rows per process instead, so a process killed
+    before it could record the end of its request (SIGTERM from the job
+    queue, a backend timeout) is dropped from the count once it is gone.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path or os.environ.get("METRICS_DB") or DEFAULT_METRICS_DB)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        conn.execute("CREATE TABLE IF NOT EXISTS samples ("
+                     "name TEXT NOT NULL, labels TEXT NOT NULL, value REAL NOT NULL, "
+                     "updated REAL NOT NULL, PRIMARY KEY (name, labels))")
+        conn.execute("CREATE TABLE IF NOT EXISTS running ("
+                     "pid INTEGER NOT NULL, operation TEXT NOT NULL, count INTEGER NOT NULL, "
+                     "PRIMARY KEY (pid, operation))")
+        return conn
+
+    def mark_running(self, operation: str, pid: int, delta: int) -> None:
+        """Add delta to the requests process pid has running"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("INSERT INTO running VALUES (?, ?, ?) ON CONFLICT(pid, operation) "
+                             "DO UPDATE SET count = count + excluded.count", (pid, operation, delta))
+                conn.execute("DELETE FROM running WHERE pid = ? AND count <= 0", (pid,))
+        finally:
+            conn.close()
+
+    def merge(self, registry: 'MetricsRegistry') -> None:
+        rows_add, rows_set = [], []
+        now = time.time()
+        for metric in registry.metrics:
+            rows = rows_set if getattr(metric, 'merge', 'sum') == 'last' else rows_add
+            for name, labelnames, labelvalues, value in metric.samples():
+                rows.append((name, json.dumps(dict(zip(labelnames, labelvalues)), sort_keys=True), value, now))
+        if not rows_add and not rows_set:
+            return
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?) ON CONFLICT(name, labels) "
+                                 "DO UPDATE SET value = value + excluded.value, updated = excluded.updated", rows_add)
+                conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?) ON CONFLICT(name, labels) "
+                                 "DO UPDATE SET value = excluded.value, updated = excluded.updated", rows_set)
+        finally:
+            conn.close()
+
+    def read(self) -> Dict[str, List[Tuple[Dict[str, str], float]]]:
+        """sample name -> [(labels, value)]"""
+        if not self.path.exists():
+            return {}
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT name, labels, value FROM samples WHERE name != ? ORDER BY name, labels",
+                                (IN_PROGRESS_METRIC,)).fetchall()
+            running = conn.execute("SELECT pid, operation, count FROM running ORDER BY operation").fetchall()
+            dead = {pid for pid, _, _ in running if not pid_alive(pid)}
+            if dead:
+                with conn:
+                    conn.executemany("DELETE FROM running WHERE pid = ?", [(pid,) for pid in dead])
+        finally:
+            conn.close()
+        samples: Dict[str, List[Tuple[Dict[str, str], float]]] = {}
+        for name, labels, value in rows:
+            samples.setdefault(name, []).append((json.loads(labels), value))
+        in_progress: Dict[str, float] = {}
+        for pid, operation, count in running:
+            if pid not in dead:
+                in_progress[operation] = in_progress.get(operation, 0) + count
+        if in_progress:
+            samples[IN_PROGRESS_METRIC] = [({'operation': operation}, count) for operation, count in in_progress.items()]
+        return samples
+
+
+class MetricsRegistry:
+    """The metric families of this process"""
+
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def _add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), merge: str = 'sum') -> Gauge:
+        return self._add(Gauge(name, documentation, labelnames, merge))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = REQUEST_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def flush(self, store: Optional[MetricsStore] = None) -> bool:
+        """Merge this process's metrics into the shared store and reset them.
+        Never fails the caller: a store that cannot be written is reported on stderr."""
+        store = store or MetricsStore()
+        try:
+            store.merge(self)
+        except (OSError, sqlite3.Error) as e:
+            print(f"[metrics] Could not write {store.path}: {e}", file=sys.stderr)
+            return False
+        for metric in self.metrics:
+            metric.clear()
+        return True
+
+    def render(self, stored: Optional[Dict[str, List[Tuple[Dict[str, str], float]]]] = None) -> str:
+        """Text exposition: stored samples (from MetricsStore.read) or this process's own"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if stored is None:
+                for name, labelnames, labelvalues, value in metric.samples():
+                    lines.append(f"{name}{_label_text(labelnames, labelvalues)} {_format_value(value)}")
+                continue
+            names = [metric.name] if metric.kind != 'histogram' else \
+                [f"{metric.name}_bucket", f"{metric.name}_sum", f"{metric.name}_count"]
+            rows = [(name, labels, value) for name in names for labels, value in stored.get(name, [])]
+            # Group a histogram's bucket/sum/count lines by label set, buckets in order
+            rows.sort(key=lambda row: (json.dumps({k: v for k, v in row[1].items() if k != 'le'}, sort_keys=True),
+                                       names.index(row[0]), float(row[1].get('le', 0))))
+            for name, labels, value in rows:
+                lines.append(f"{name}{_label_text(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Shared registry for the whole process
+REGISTRY = MetricsRegistry()
+
+# Operations are named after the CLI entry points: summary (summarize_cli), qa (qa_cli),
+# timeline (timeline_cli), timeline_refactor, precedent, contract, refine_context
+REQUESTS = REGISTRY.counter('kanunai_requests_total', 'CLI requests handled', ['operation', 'status'])
+REQUEST_SECONDS = REGISTRY.histogram('kanunai_request_duration_seconds', 'CLI request wall time', ['operation'])
+IN_PROGRESS = REGISTRY.gauge(IN_PROGRESS_METRIC, 'CLI requests running now (work queued on the service)',
+                             ['operation'])
+PEAK_RSS = REGISTRY.gauge('kanunai_process_peak_rss_bytes', 'Peak resident memory of the last run',
+                          ['operation'], merge='last')
+CACHE_LOOKUPS = REGISTRY.counter('kanunai_cache_lookups_total', 'Cache lookups by cache and result (hit/miss)',
+                                 ['cache', 'result'])
+RATE_LIMIT_WAIT = REGISTRY.counter('kanunai_rate_limit_wait_seconds_total',
+                                   'Time spent sleeping for rate limits and exhausted quotas', ['limiter'])
+RATE_LIMIT_WAITS = REGISTRY.counter('kanunai_rate_limit_waits_total', 'Rate-limit and quota sleeps', ['limiter'])
+LLM_REQUESTS = REGISTRY.counter('kanunai_llm_requests_total', 'LLM calls by label and status (ok/rate_limited/error)',
+                                ['label', 'status'])
+LLM_SECONDS = REGISTRY.histogram('kanunai_llm_request_duration_seconds', 'LLM call latency', ['label'],
+                                 buckets=LLM_BUCKETS)
+LLM_TOKENS = REGISTRY.counter('kanunai_llm_tokens_total', 'LLM tokens by label and kind (prompt/output)',
+                              ['label', 'kind'])
+EMBED_CHUNKS = REGISTRY.counter('kanunai_embedding_chunks_total', 'Chunks embedded for vector stores')
+EMBED_CHARS = REGISTRY.counter('kanunai_embedding_chars_total', 'Characters embedded for vector stores')
+EMBED_SECONDS = REGISTRY.counter('kanunai_embedding_seconds_total', 'Time spent embedding chunks')
+JOBS = REGISTRY.counter('kanunai_jobs_total', 'Queue jobs by kind and outcome (submitted/deduplicated/done/failed/cancelled)',
+                        ['kind', 'outcome'])
+COALESCED = REGISTRY.counter('kanunai_coalesced_requests_total',
+                             'Single-flight requests by role (leader computed, follower shared its result)',
+                             ['operation', 'role'])
+QUEUE_DEPTH = REGISTRY.gauge('kanunai_queue_depth', 'Jobs queued or running in the job queue', ['status'],
+                             merge='last')
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Gemini quota/429 errors, as the flows detect them"""
+    text = str(error)
+    return "429" in text or "quota" in text.lower()
+
+
+def peak_rss_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def _mark_in_progress(operation: str, delta: int) -> None:
+    """Write the in-progress change straight to the store, so scrapes see running requests"""
+    store = MetricsStore()
+    try:
+        store.mark_running(operation, os.getpid(), delta)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[metrics] Could not write {store.path}: {e}", file=sys.stderr)
+
+
+@contextmanager
+def track_request(operation: str) -> Iterator[None]:
+    """Count and time one CLI request and merge the process's metrics into the store on exit.
+    A non-zero sys.exit or an exception is an error; the exit itself goes ahead."""
+    _mark_in_progress(operation, 1)
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except SystemExit as e:
+        status = 'ok' if e.code in (0, None) else 'error'
+        raise
+    except BaseException:
+        status = 'error'
+        raise
+    finally:
+        REQUESTS.inc(operation=operation, status=status)
+        REQUEST_SECONDS.observe(time.perf_counter() - start, operation=operation)
+        _mark_in_progress(operation, -1)
+        rss = peak_rss_bytes()
+        if rss is not None:
+            PEAK_RSS.set(rss, operation=operation)
+        REGISTRY.flush()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    store: MetricsStore = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = REGISTRY.render(self.store.read()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host: str = '127.0.0.1', port: int = 9464, store: Optional[MetricsStore] = None) -> ThreadingHTTPServer:
+    """Serve /metrics from the shared store; returns the running server (serve_forever in a thread)"""
+    handler = type('Handler', (MetricsHandler,), {'store': store or MetricsStore()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve ai-service metrics for Prometheus")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: localhost only)")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("METRICS_PORT", "9464")))
+    parser.add_argument("--db", default=None, help="Metrics store (default: METRICS_DB or ai-service/cache/metrics.sqlite)")
+    parser.add_argument("--once", action="store_true", help="Print the exposition text and exit")
+    args = parser.parse_args()
+
+    store = MetricsStore(args.db)
+    if args.once:
+        sys.stdout.write(REGISTRY.render(store.read()))
+        return 0
+    server = serve(args.host, args.port, store)
+    print(f"[metrics] Serving {store.path} on http://{args.host}:{server.server_port}/metrics", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
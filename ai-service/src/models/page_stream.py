@@ -0,0 +1,154 @@
+"""
+Streaming PDF Pages
+Yields PDF pages as they are parsed so downstream stages start on page one
+instead of waiting for the whole document
+"""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from pdf_backends import open_backend, resolve_backend
+
+PAGE_SEPARATOR = "\n\n--- PAGE BREAK ---\n\n"
+CHUNK_SEPARATOR = "\n\n=== PAGE BREAK ===\n\n"
+
+
+def iter_pdf_pages(pdf_path: str, backend: Optional[str] = None) -> Iterator[Document]:
+    """Yield one Document per page, parsed on demand.
+
+    backend picks the text engine (see pdf_backends.resolve_backend). With
+    pypdf, pages carry the same page_content/metadata as
+    PyPDFLoader(pdf_path).load(); other engines keep the same one-Document-
+    per-page segmentation and the source/total_pages/page/page_label keys.
+    Only the page being consumed is held in memory.
+    """
+    backend = resolve_backend(backend)
+    if backend == 'pypdf':
+        # Imported here: the loader pulls in langsmith (~0.5 s), which other backends never need
+        try:
+            from langchain_community.document_loaders import PyPDFLoader
+        except ImportError:
+            PyPDFLoader = None
+        if PyPDFLoader is not None:
+            yield from PyPDFLoader(pdf_path).lazy_load()
+            return
+
+    engine = open_backend(pdf_path, backend)
+    for page_num in range(engine.page_count):
+        yield Document(
+            page_content=engine.page_text(page_num),
+            metadata={'source': pdf_path, 'total_pages': engine.page_count,
+                      'page': page_num, 'page_label': engine.page_label(page_num)},
+        )
+
+
+# Parallel parsing only pays off once process start-up is amortized over enough pages
+PARALLEL_MIN_PAGES = 40
+RANGES_PER_WORKER = 4
+
+
+def resolve_pdf_workers(total_pages: int, workers: Optional[int] = None) -> int:
+    """Worker count for a PDF: all cores for long documents unless given"""
+    if workers is None:
+        workers = (os.cpu_count() or 1) if total_pages >= PARALLEL_MIN_PAGES else 1
+    return max(1, min(workers, total_pages))
+
+
+def page_ranges(first_page: int, end_page: int, n_ranges: int) -> List[Tuple[int, int]]:
+    """Split [first_page, end_page) into at most n_ranges contiguous ranges of similar size"""
+    count = end_page - first_page
+    n_ranges = max(1, min(n_ranges, count))
+    bounds = [first_page + count * i // n_ranges for i in range(n_ranges + 1)]
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def iter_pdf_pages_parallel(pdf_path: str, workers: Optional[int] = None,
+                            backend: Optional[str] = None) -> Iterator[Document]:
+    """Yield the same pages as iter_pdf_pages, extracting page ranges in a process pool.
+
+    The first page is parsed in-process (it supplies the document metadata and
+    page count); the rest is split into page ranges extracted by worker
+    processes and yielded in order as each range completes. Short documents
+    and workers=1 stay on the sequential stream.
+    """
+    backend = resolve_backend(backend)
+    pages = iter_pdf_pages(pdf_path, backend)
+    first = next(pages, None)
+    if first is None:
+        return
+    yield first
+
+    total_pages = first.metadata.get('total_pages', 1)
+    workers = resolve_pdf_workers(total_pages, workers)
+    if workers <= 1 or total_pages <= 1:
+        yield from pages
+        return
+    pages.close()
+
+    doc_metadata = {k: v for k, v in first.metadata.items() if k not in ('page', 'page_label')}
+    next_page = 1
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker, initargs=(pdf_path, backend)) as pool:
+            for extracted in pool.map(_extract_page_range, page_ranges(1, total_pages, workers * RANGES_PER_WORKER)):
+                for text, page_label in extracted:
+                    yield Document(page_content=text, metadata={**doc_metadata, 'page': next_page, 'page_label': page_label})
+                    next_page += 1
+    except (OSError, BrokenProcessPool) as e:
+        # No usable process pool here: extract the remaining pages in this process
+        print(f"Parallel PDF parsing unavailable ({e}); continuing sequentially", file=sys.stderr)
+        _init_pdf_worker(pdf_path, backend)
+        for text, page_label in _extract_page_range((next_page, total_pages)):
+            yield Document(page_content=text, metadata={**doc_metadata, 'page': next_page, 'page_label': page_label})
+            next_page += 1
+
+
+def join_pages(pages: Iterable[Document], separator: str = PAGE_SEPARATOR) -> str:
+    """Concatenate page texts as they arrive (page Documents are dropped right away)"""
+    return separator.join(page.page_content for page in pages)
+
+
+def iter_page_chunks(pages: Iterable[Document], pages_per_chunk: int,
+                     separator: str = CHUNK_SEPARATOR) -> Iterator[Document]:
+    """Group a page stream into chunks of pages_per_chunk pages.
+
+    Only the pages of the chunk being built are held, and each chunk is
+    yielded as soon as its last page arrives. Chunk metadata matches the
+    analyzers' page-range chunks: {'pages': 'first-last', 'chunk': n}.
+    """
+    window = []
+    first_page = 1
+    chunk_num = 0
+    for page in pages:
+        window.append(page.page_content)
+        if len(window) == pages_per_chunk:
+            chunk_num += 1
+            yield Document(
+                page_content=separator.join(window),
+                metadata={'pages': f"{first_page}-{first_page + len(window) - 1}", 'chunk': chunk_num},
+            )
+            first_page += len(window)
+            window = []
+    if window:
+        yield Document(
+            page_content=separator.join(window),
+            metadata={'pages': f"{first_page}-{first_page + len(window) - 1}", 'chunk': chunk_num + 1},
+        )
+
+
+# Per-process state for parallel PDF parsing (set by the pool initializer)
+_PDF_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_pdf_worker(pdf_path: str, backend: str) -> None:
+    _PDF_WORKER_STATE['engine'] = open_backend(pdf_path, backend)
+
+
+def _extract_page_range(page_range: Tuple[int, int]) -> List[Tuple[str, str]]:
+    """(text, page_label) for pages [start, end)"""
+    engine = _PDF_WORKER_STATE['engine']
+    return [(engine.page_text(page_num), engine.page_label(page_num)) for page_num in range(*page_range)]
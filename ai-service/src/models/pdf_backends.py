@@ -0,0 +1,130 @@
+"""
+PDF Text Extraction Backends
+pdfium (pypdfium2) and MuPDF (pymupdf) when installed, pypdf otherwise
+"""
+
+import os
+from typing import Dict, List, Optional, Type
+
+
+class PypdfBackend:
+    """Pure-Python pypdf, the same engine PyPDFLoader uses"""
+
+    name = 'pypdf'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pypdf  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self, pdf_path: str):
+        from pypdf import PdfReader
+        self.reader = PdfReader(pdf_path)
+        self.page_count = len(self.reader.pages)
+        self._labels: Optional[List[str]] = None
+
+    def page_text(self, page_num: int) -> str:
+        return self.reader.pages[page_num].extract_text().strip()
+
+    def page_label(self, page_num: int) -> str:
+        # page_labels rebuilds the whole list on every access; read it once
+        if self._labels is None:
+            self._labels = self.reader.page_labels
+        return self._labels[page_num]
+
+
+class PdfiumBackend:
+    """Google's pdfium through pypdfium2 (C++, several times faster than pypdf)"""
+
+    name = 'pdfium'
+
+    @staticmethod
+    def available() -> bool:
+        try:
+            import pypdfium2  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def __init__(self, pdf_path: str):
+        import pypdfium2
+        self.pdf = pypdfium2.PdfDocument(pdf_path)
+        self.page_count = len(self.pdf)
+
+    def page_text(self, page_num: int) -> str:
+        page = self.pdf[page_num]
+        textpage = page.get_textpage()
+        try:
+            # pdfium ends lines with \r\n; the analyzers split on \n
+            return textpage.get_text_range().replace('\r\n', '\n').replace('\r', '\n').strip()
+        finally:
+            textpage.close()
+            page.close()
+
+    def page_label(self, page_num: int) -> str:
+        return self.pdf.get_page_label(page_num) or str(page_num + 1)
+
+
+def _import_pymupdf():
+    """pymupdf, or the legacy 'fitz' module name of older releases"""
+    try:
+        import pymupdf
+        return pymupdf
+    except ImportError:
+        try:
+            import fitz
+            return fitz
+        except ImportError:
+            return None
+
+
+class MupdfBackend:
+    """MuPDF through pymupdf"""
+
+    name = 'mupdf'
+
+    @staticmethod
+    def available() -> bool:
+        return _import_pymupdf() is not None
+
+    def __init__(self, pdf_path: str):
+        self.doc = _import_pymupdf().open(pdf_path)
+        self.page_count = self.doc.page_count
+
+    def page_text(self, page_num: int) -> str:
+        return self.doc[page_num].get_text().strip()
+
+    def page_label(self, page_num: int) -> str:
+        return self.doc[page_num].get_label() or str(page_num + 1)
+
+
+# Preference order for 'auto': fastest first, pypdf always last
+EXTRACTION_BACKENDS: Dict[str, Type] = {
+    'pdfium': PdfiumBackend,
+    'mupdf': MupdfBackend,
+    'pypdf': PypdfBackend,
+}
+
+
+def resolve_backend(name: Optional[str] = None) -> str:
+    """Backend name to use: the given one, PDF_TEXT_BACKEND, or the fastest installed ('auto').
+
+    A requested backend that is not installed falls back to pypdf.
+    """
+    name = (name or os.environ.get("PDF_TEXT_BACKEND") or 'auto').lower()
+    if name != 'auto':
+        if name not in EXTRACTION_BACKENDS:
+            raise ValueError(f"Unknown PDF text backend '{name}' (choose from auto, {', '.join(EXTRACTION_BACKENDS)})")
+        return name if EXTRACTION_BACKENDS[name].available() else 'pypdf'
+    for backend_name, backend in EXTRACTION_BACKENDS.items():
+        if backend.available():
+            return backend_name
+    return 'pypdf'
+
+
+def open_backend(pdf_path: str, name: str):
+    return EXTRACTION_BACKENDS[name](pdf_path)
+
@@ -0,0 +1,126 @@
+"""
+Pipeline DAG
+Runs pipeline stages as a dependency graph: each stage starts as soon as the
+stages it needs have finished, so independent work overlaps (local embedding
+runs while chunk summaries wait on Gemini) and wall time approaches the
+longest chain of dependent stages instead of the sum of all of them.
+"""
+
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from tracing import TRACER
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[], Any], after: Iterable[str], optional: bool):
+        self.name = name
+        self.fn = fn
+        self.after = tuple(after)
+        self.optional = optional
+        self.status = 'pending'  # pending / running / done / failed / skipped
+        self.error: Optional[str] = None
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+
+
+class StageGraph:
+    """
+    Stages are added in dependency order (after= names stages already added,
+    so the graph cannot have cycles) and run on a thread pool: the stages
+    here are network- or native-code-bound, which release the GIL.
+
+    A failing optional stage skips the stages that need it; a failing
+    required stage stops new stages from starting and is raised once the
+    running ones finish.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self.stages: Dict[str, Stage] = {}
+        self.results: Dict[str, Any] = {}
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    def add(self, name: str, fn: Callable[[], Any], after: Iterable[str] = (), optional: bool = False) -> None:
+        after = tuple(after)
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' added twice")
+        missing = [dep for dep in after if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stage(s): {', '.join(missing)}")
+        self.stages[name] = Stage(name, fn, after, optional)
+
+    def _run_stage(self, stage: Stage) -> Any:
+        stage.start = time.perf_counter()
+        try:
+            return stage.fn()
+        finally:
+            stage.end = time.perf_counter()
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage; returns results by stage name"""
+        self._started = time.perf_counter()
+        failure: Optional[BaseException] = None
+        running: Dict[Future, Stage] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers or max(1, len(self.stages))) as pool:
+            while True:
+                # Stages are in dependency order, so one pass settles skips and launches
+                for stage in self.stages.values():
+                    if stage.status != 'pending' or failure is not None:
+                        continue
+                    deps = [self.stages[dep].status for dep in stage.after]
+                    if any(status in ('failed', 'skipped') for status in deps):
+                        stage.status = 'skipped'
+                    elif all(status == 'done' for status in deps):
+                        stage.status = 'running'
+                        running[pool.submit(TRACER.propagate(self._run_stage), stage)] = stage
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    stage = running.pop(future)
+                    try:
+                        self.results[stage.name] = future.result()
+                        stage.status = 'done'
+                    except Exception as e:
+                        stage.status = 'failed'
+                        stage.error = f"{type(e).__name__}: {e}"
+                        if stage.optional:
+                            print(f"[pipeline] Optional stage '{stage.name}' failed: {e}", file=sys.stderr)
+                        elif failure is None:
+                            failure = e
+        self._finished = time.perf_counter()
+        if failure is not None:
+            for stage in self.stages.values():
+                if stage.status == 'pending':
+                    stage.status = 'skipped'
+            raise failure
+        return self.results
+
+    def report(self) -> Dict[str, Any]:
+        """Wall time against the stages' summed time (their sequential cost), and each stage's window"""
+        ran = [stage for stage in self.stages.values() if stage.start is not None]
+        return {
+            'wall_s': round((self._finished or time.perf_counter()) - (self._started or 0), 2),
+            'sequential_s': round(sum(stage.end - stage.start for stage in ran if stage.end), 2),
+            'stages': [{
+                'name': stage.name,
+                'status': stage.status,
+                **({'start_s': round(stage.start - self._started, 2), 'end_s': round(stage.end - self._started, 2)}
+                   if stage.start is not None and stage.end is not None else {}),
+                **({'error': stage.error} if stage.error else {}),
+            } for stage in self.stages.values()],
+        }
+
+    def critical_path(self) -> List[str]:
+        """Chain of dependent stages that ended last: the part overlapping cannot shorten"""
+        ends = {name: stage.end or 0 for name, stage in self.stages.items()}
+        if not ends:
+            return []
+        path = [max(ends, key=ends.get)]
+        while self.stages[path[-1]].after:
+            path.append(max(self.stages[path[-1]].after, key=ends.get))
+        return path[::-1]
@@ -18,14 +18,10 @@ load_dotenv(Path(__file__).parent.parent.parent / '.env')
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-try:
-    import google.generativeai as genai
-except ImportError as e:
-    print(json.dumps({
-        "error": f"Failed to import required libraries: {e}",
-        "precedents": []
-    }), file=sys.stderr)
-    sys.exit(1)
+from token_estimator import LEDGER
+from tracing import TRACER
+from metrics import track_request
+from llm_provider import get_provider
 
 
 def search_precedents(summary: str) -> list:
@@ -34,7 +30,8 @@ def search_precedents(summary: str) -> list:
     Works for all court types (Supreme Court, High Courts, District Courts, etc.)
     """
     api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+    provider = get_provider()
+    if not api_key and provider.requires_api_key:
         # Return example data if API key is missing
         return [{
             "caseName": "Example: Rajnesh v. Neha",
@@ -46,8 +43,7 @@ def search_precedents(summary: str) -> list:
     
     try:
         # Initialize Gemini
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-2.5-flash')
+        model = provider.generative_model('gemini-2.5-flash', api_key)
         
         prompt = f"""You are a legal research assistant. Based on the following case summary, find and list the top 5 most relevant legal precedents (cases) from Indian courts.
 
@@ -82,7 +78,7 @@ Return ONLY a valid JSON array with this exact structure:
 
 Make sure the JSON is valid and can be parsed. Return maximum 5 precedents. All cases MUST be from years 1990-2024 only. If you cannot find specific cases within this range, provide well-known relevant precedents from 1990-2024 based on the legal issues in the summary."""
 
-        response = model.generate_content(prompt)
+        response = LEDGER.track('precedent_search', getattr(model, 'model_name', 'gemini-2.5-flash'), prompt, lambda: model.generate_content(prompt))
         response_text = response.text.strip()
         
         # Extract JSON from response (handle markdown code blocks)
@@ -164,10 +160,13 @@ def main():
         # Output JSON result
         result = {
             "precedents": precedents,
-            "count": len(precedents)
+            "count": len(precedents),
+            "tokens": LEDGER.totals(),
+            "timings": TRACER.timings()
         }
         
         print(json.dumps(result))
+        TRACER.export()
         sys.exit(0)
         
     except json.JSONDecodeError as e:
@@ -185,4 +184,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with track_request('precedent'):
+        main()
\ No newline at end of file
@@ -12,6 +12,8 @@ Usage:
   # Ask a question using an existing session
   python qa_cli.py --ask "What are the key holdings?" --session <cache_key>
 
+Both wait for a vector store that summarize_cli is still building in the background.
+
 Stdout returns JSON only.
 """
 
@@ -28,8 +30,12 @@ if str(CURRENT_DIR) not in sys.path:
     sys.path.insert(0, str(CURRENT_DIR))
 
 from case_analysis import LegalDocSummarizer  # type: ignore
-from langchain.docstore.document import Document  # type: ignore
-from langchain_community.document_loaders import PyPDFLoader  # type: ignore
+from token_estimator import LEDGER  # type: ignore
+from tracing import TRACER  # type: ignore
+from metrics import CACHE_LOOKUPS, track_request  # type: ignore
+from single_flight import FLIGHT_TIMEOUT_SECONDS, SingleFlight, flight_key, normalize_question  # type: ignore
+import vector_index  # type: ignore
+from langchain_core.documents import Document  # type: ignore
 
 
 def compute_session_key(pdf: str | None, text: str | None) -> str:
@@ -45,12 +51,30 @@ def compute_session_key(pdf: str | None, text: str | None) -> str:
     return hashlib.sha1(cache_key_src.encode("utf-8", errors="ignore")).hexdigest()
 
 
+def is_shareable_answer(result: dict) -> bool:
+    """LegalDocSummarizer.ask reports failures as an 'Error: ...' answer; those are not shared"""
+    return not str(result.get('answer', '')).startswith('Error:')
+
+
 def ensure_vectorstore(session: str, api_key: str, pdf: str | None, text: str | None) -> bool:
     cache_dir = str(PROJECT_ROOT / "cache" / session)
-    # If FAISS index exists, assume ready
-    vs_dir = Path(cache_dir) / "vectorstore"
-    if vs_dir.exists():
+    # Ready, or being built in the background after the summary: wait for it
+    ready = vector_index.wait_for_build(cache_dir)
+    CACHE_LOOKUPS.inc(cache='vectorstore', result='hit' if ready else 'miss')
+    if ready:
         return True
+    if not vector_index.claim_build(cache_dir):
+        # Another process started building in the meantime
+        return vector_index.wait_for_build(cache_dir)
+    ready = False
+    try:
+        ready = build_vectorstore(cache_dir, api_key, pdf, text)
+    finally:
+        vector_index.finish_build(cache_dir, ready)
+    return ready
+
+
+def build_vectorstore(cache_dir: str, api_key: str, pdf: str | None, text: str | None) -> bool:
     # Build from available inputs
     summarizer = LegalDocSummarizer(api_key=api_key, cache_dir=cache_dir)
     if pdf:
@@ -80,10 +104,20 @@ def ensure_vectorstore(session: str, api_key: str, pdf: str | None, text: str |
         summarizer.create_vector_store()
         summarizer.setup_qa_chain()
         return True
-    except Exception:
+    except Exception as e:
+        print(f"[qa_cli] Vectorstore build failed: {e}", file=sys.stderr)
         return False
 
 
+def load_vectorstore(summarizer: LegalDocSummarizer, cache_dir: str) -> None:
+    print("[qa_cli] Loading FAISS vectorstore...", file=sys.stderr)
+    from langchain_community.vectorstores import FAISS  # type: ignore
+    try:
+        summarizer.vectorstore = FAISS.load_local(str(Path(cache_dir) / "vectorstore"), summarizer.embeddings, allow_dangerous_deserialization=True)
+    except Exception as e:
+        print(f"[qa_cli] Failed to load FAISS: {e}", file=sys.stderr)
+
+
 def main():
     parser = argparse.ArgumentParser(description="QA helper for LegalDocSummarizer")
     parser.add_argument("--init", action="store_true", help="Initialize vector store and QA chain")
@@ -99,29 +133,40 @@ def main():
     if args.init:
         print("[qa_cli] Initializing vectorstore...", file=sys.stderr)
         ready = ensure_vectorstore(session=session, api_key=api_key, pdf=args.pdf, text=args.text)
-        print(json.dumps({"ready": bool(ready), "session": session}))
+        print(json.dumps({"ready": bool(ready), "session": session, "timings": TRACER.timings()}))
+        TRACER.export()
         return 0 if ready else 1
 
     if args.ask:
         print(f"[qa_cli] QA for session: {session}", file=sys.stderr)
-        cache_dir = str(PROJECT_ROOT / "cache" / session)
-        summarizer = LegalDocSummarizer(api_key=api_key, cache_dir=cache_dir)
-        # Try loading an existing vectorstore; if not present, attempt to create from caches
-        vs_dir = Path(cache_dir) / "vectorstore"
-        if vs_dir.exists():
-            print("[qa_cli] Loading FAISS vectorstore...", file=sys.stderr)
-            from langchain_community.vectorstores import FAISS  # type: ignore
-            try:
-                summarizer.vectorstore = FAISS.load_local(str(vs_dir), summarizer.embeddings, allow_dangerous_deserialization=True)
-            except Exception as e:
-                print(f"[qa_cli] Failed to load FAISS: {e}", file=sys.stderr)
-        if not summarizer.vectorstore:
-            print("[qa_cli] Building vectorstore from cache...", file=sys.stderr)
-            ensure_vectorstore(session=session, api_key=api_key, pdf=args.pdf, text=args.text)
 
-        summarizer.setup_qa_chain()
-        result = summarizer.ask(args.ask)
+        def answer() -> dict:
+            cache_dir = str(PROJECT_ROOT / "cache" / session)
+            summarizer = LegalDocSummarizer(api_key=api_key, cache_dir=cache_dir)
+            # Load the vectorstore (waiting for a background build); if not present, attempt to create from caches
+            if vector_index.wait_for_build(cache_dir):
+                load_vectorstore(summarizer, cache_dir)
+            if not summarizer.vectorstore:
+                print("[qa_cli] Building vectorstore from cache...", file=sys.stderr)
+                if ensure_vectorstore(session=session, api_key=api_key, pdf=args.pdf, text=args.text):
+                    load_vectorstore(summarizer, cache_dir)
+
+            summarizer.setup_qa_chain()
+            return summarizer.ask(args.ask)
+
+        # Students asking the same question of the same judgment at the same time share one answer
+        key = flight_key(session, normalize_question(args.ask))
+        # The leader may wait for a background vector-store build (twice, if another
+        # process claims it meanwhile) before answering: not a dead leader
+        flight = SingleFlight(timeout=2 * vector_index.BUILD_WAIT_SECONDS + FLIGHT_TIMEOUT_SECONDS)
+        result, shared = flight.do(key, answer, operation='qa', shareable=is_shareable_answer)
+        if shared:
+            print("[qa_cli] Answer shared with a concurrent identical question", file=sys.stderr)
+        result['coalesced'] = shared
+        result['tokens'] = LEDGER.totals()
+        result['timings'] = TRACER.timings()
         print(json.dumps(result))
+        TRACER.export()
         return 0
 
     print(json.dumps({"error": "Provide --init or --ask"}))
@@ -129,4 +174,5 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    with track_request('qa_init' if '--init' in sys.argv else 'qa'):
+        sys.exit(main())
@@ -9,19 +9,31 @@ import sys
 import os
 import time
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 
 # Add parent directories to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-import google.generativeai as genai
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
+
+from keyword_automaton import first_rule
+from token_estimator import LEDGER
+from llm_provider import get_provider
+from tracing import TRACER
+from metrics import RATE_LIMIT_WAIT, RATE_LIMIT_WAITS, track_request
 
 # Rate limiting settings
 MAX_REQUESTS_PER_MINUTE = 60
 REQUEST_WINDOW = 60  # seconds
 request_timestamps = []
+rate_limit_lock = threading.Lock()
+
+# Batched refactoring: events per Gemini request and requests in flight
+BATCH_SIZE = int(os.getenv('TIMELINE_REFACTOR_BATCH_SIZE', '8'))
+MAX_CONCURRENT_REQUESTS = int(os.getenv('TIMELINE_REFACTOR_CONCURRENCY', '4'))
 
 # Define legal event categories
 LEGAL_CATEGORIES = [
@@ -37,19 +49,28 @@ def check_rate_limit():
     Returns True if we should wait, False if we can proceed.
     """
     global request_timestamps
-    current_time = datetime.now()
-    
-    # Remove timestamps older than our window
-    request_timestamps = [ts for ts in request_timestamps 
-                        if current_time - ts < timedelta(seconds=REQUEST_WINDOW)]
-    
-    # Check if we've hit our limit
-    if len(request_timestamps) >= MAX_REQUESTS_PER_MINUTE:
-        return True
-    
-    # Add current timestamp
-    request_timestamps.append(current_time)
-    return False
+    with rate_limit_lock:
+        current_time = datetime.now()
+        
+        # Remove timestamps older than our window
+        request_timestamps = [ts for ts in request_timestamps 
+                            if current_time - ts < timedelta(seconds=REQUEST_WINDOW)]
+        
+        # Check if we've hit our limit
+        if len(request_timestamps) >= MAX_REQUESTS_PER_MINUTE:
+            return True
+        
+        # Add current timestamp
+        request_timestamps.append(current_time)
+        return False
+
+
+def wait_for_rate_limit():
+    """Block until a request slot is free; shared by all worker threads"""
+    while check_rate_limit():
+        time.sleep(1)
+        RATE_LIMIT_WAITS.inc(limiter='timeline_refactor')
+        RATE_LIMIT_WAIT.inc(1, limiter='timeline_refactor')
 
 def extract_event_date(event: Dict[str, Any]) -> str:
     """Extract and format the event date from the event object"""
@@ -68,13 +89,21 @@ def extract_event_date(event: Dict[str, Any]) -> str:
     return format_date(date_str)
 
 
-def refactor_single_event(event: Dict[str, Any], model: Any) -> Dict[str, Any]:
-    """Refactor a single event with Gemini, using the correct event date"""
-    event_date = extract_event_date(event)
-    context = event.get('context', '')
-    event_type = event.get('eventType', 'Legal Event')
-    event_name = event.get('eventName', '')
-    
+JUDGMENT_TYPES = ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment']
+
+
+def safety_settings() -> List[Dict[str, Any]]:
+    import google.generativeai as genai
+    return [
+        {
+            "category": genai.types.HarmCategory.HARM_CATEGORY_UNSPECIFIED,
+            "threshold": genai.types.HarmBlockThreshold.BLOCK_NONE,
+        },
+    ]
+
+
+def prepare_event_context(context: str) -> Tuple[str, Optional[str]]:
+    """Clean an event context for prompting; returns (clean_context, section_info)"""
     # Clean context - remove noise but preserve complete sentences
     clean_context = context.replace('--- PAGE BREAK ---', ' ').replace('PAGE BREAK', ' ')
     clean_context = ' '.join(clean_context.split())  # Normalize whitespace
@@ -92,11 +121,124 @@ def refactor_single_event(event: Dict[str, Any], model: Any) -> Dict[str, Any]:
         else:
             section_info = f"Section {section_num}"
     
+    return clean_context, section_info
+
+
+def normalize_summary(text: str, event_date: str, event_type: str, clean_context: str,
+                      section_info: Optional[str]) -> str:
+    """Turn raw model output into 2-4 complete sentences, one per line"""
+    summary = text.strip()
+
+    # Clean up the summary - ensure exactly 2 complete sentences
+    # Remove any leading/trailing markers or quotes
+    summary = summary.strip('"').strip("'").strip()
+
+    # Split by newlines and periods to identify sentences
+    lines = [line.strip() for line in summary.split('\n') if line.strip()]
+
+    if not lines:
+        summary = f"Event occurred on {event_date}. See context for details."
+    else:
+        # Reconstruct sentences - split by periods if needed
+        sentences = []
+        for line in lines:
+            # Split by period but keep the period with the sentence
+            parts = line.split('.')
+            for i, part in enumerate(parts):
+                part = part.strip()
+                if part and len(part) > 10:  # Only substantial sentences
+                    if i < len(parts) - 1:  # Not the last part (which may be empty)
+                        sentences.append(part + '.')
+                    elif part.endswith('.'):
+                        sentences.append(part)
+                    elif len(part) > 20:  # Substantial text without period
+                        sentences.append(part + '.')
+
+        # Allow 2-4 sentences for all event types (judgments can use up to 4, others up to 4 as well)
+        max_sentences = 4  # Allow up to 4 sentences for detailed summaries
+
+        if len(sentences) >= max_sentences:
+            summary = '\n'.join(sentences[:max_sentences])
+        elif len(sentences) >= 2:
+            summary = '\n'.join(sentences[:2])
+        elif len(sentences) == 1:
+            # If only one sentence, check if it's too short (less than 15 words)
+            first_sentence = sentences[0]
+            word_count = len(first_sentence.split())
+
+            # If sentence is too short, expand it with details from context
+            if word_count < 15:
+                # Try to extract more details to expand the sentence
+                expanded_parts = [first_sentence.rstrip('.')]
+
+                if event_type in JUDGMENT_TYPES:
+                    if 'passport' in clean_context.lower():
+                        expanded_parts.append("regarding passport impounding and constitutional rights")
+                    elif 'article' in clean_context.lower():
+                        article_match = re.search(r'Article\s+(\d+)', clean_context, re.IGNORECASE)
+                        if article_match:
+                            expanded_parts.append(f"addressing fundamental rights under Article {article_match.group(1)} of the Constitution")
+                    elif section_info:
+                        expanded_parts.append(f"interpreting {section_info}")
+
+                first_sentence = ' '.join(expanded_parts) + '.'
+
+            # Always add a second sentence with meaningful details
+            if event_type in JUDGMENT_TYPES:
+                if 'challenged' in clean_context.lower():
+                    summary = f"{first_sentence}\nThe case involved constitutional and legal challenges regarding fundamental rights and administrative action."
+                elif 'held' in clean_context.lower() or 'decided' in clean_context.lower():
+                    summary = f"{first_sentence}\nThe judgment established important legal principles and clarified the application of relevant statutory provisions."
+                elif section_info:
+                    summary = f"{first_sentence}\nThe judgment interpreted and applied {section_info}, establishing important legal precedents."
+                else:
+                    summary = f"{first_sentence}\nThe judgment addressed significant legal issues and provided important directives for future cases."
+            elif event_type == 'Court Proceeding':
+                if 'passport' in clean_context.lower():
+                    summary = f"{first_sentence}\nThe proceeding involved matters related to passport impounding and constitutional rights under Articles 14, 19, and 21."
+                elif 'writ' in clean_context.lower():
+                    summary = f"{first_sentence}\nThe proceeding addressed a writ petition raising important constitutional and administrative law questions."
+                elif section_info:
+                    summary = f"{first_sentence}\nThe proceeding addressed legal matters under {section_info} and examined relevant statutory provisions."
+                else:
+                    summary = f"{first_sentence}\nThe proceeding involved significant legal actions and court directives addressing key issues in the case."
+            else:
+                if section_info and section_info not in first_sentence:
+                    summary = f"{first_sentence}\nThis action was taken under {section_info} and addressed important compliance and legal requirements."
+                else:
+                    summary = f"{first_sentence}\nThis action was significant in the context of the ongoing legal proceedings."
+        else:
+            # Fallback: use cleaned lines
+            max_lines = max_sentences
+            summary = '\n'.join(lines[:max_lines]) if len(lines) >= max_lines else '\n'.join(lines)
+            # Ensure it ends properly
+            if summary and not summary.rstrip().endswith(('.', '!', '?')):
+                summary = summary.rstrip() + '.'
+
+    return summary
+
+
+def build_improved_event(event: Dict[str, Any], summary: str, event_date: str) -> Dict[str, Any]:
+    """Copy of the event carrying the refactored summary and display date"""
+    improved_event = event.copy()
+    improved_event['summary'] = summary
+    improved_event['date'] = event_date
+    improved_event['eventType'] = event.get('eventType', 'Legal Event')  # Keep the improved event type from timeline_analyzer
+    improved_event['eventName'] = event.get('eventName', '')  # Keep the improved event name
+    return improved_event
+
+
+def refactor_single_event(event: Dict[str, Any], model: Any) -> Dict[str, Any]:
+    """Refactor a single event with Gemini, using the correct event date"""
+    event_date = extract_event_date(event)
+    event_type = event.get('eventType', 'Legal Event')
+    clean_context, section_info = prepare_event_context(event.get('context', ''))
+    
     # Build prompt with date context
     date_context = f"Event Date: {event_date}\n" if event_date else ""
     
     # Increase context window for better understanding
-    context_window = 1200 if event_type in ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment'] else 800
+    context_window = 1200 if event_type in JUDGMENT_TYPES else 800
     
     prompt = f"""You are analyzing a legal document timeline event. Generate a detailed, accurate, and MEANINGFUL summary.
 
@@ -182,13 +324,13 @@ Now generate the detailed, meaningful summary:"""
     
     for attempt in range(1, max_attempts + 1):
         try:
-            if check_rate_limit():
-                time.sleep(2)  # Wait if rate limited
+            wait_for_rate_limit()
             
             # Increase max tokens for court judgments to allow 2-3 detailed sentences
-            max_tokens = 500 if event_type in ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment'] else 300
+            max_tokens = 500 if event_type in JUDGMENT_TYPES else 300
             
-            response = model.generate_content(
+            import google.generativeai as genai
+            response = LEDGER.track('event_summary', getattr(model, 'model_name', 'gemini'), prompt, lambda: model.generate_content(
                 prompt,
                 generation_config=genai.types.GenerationConfig(
                     temperature=0.3,  # Slightly higher for more creative but still factual output
@@ -196,145 +338,175 @@ Now generate the detailed, meaningful summary:"""
                     top_p=0.9,
                     top_k=40,
                 ),
-                safety_settings=[
-                    {
-                        "category": genai.types.HarmCategory.HARM_CATEGORY_UNSPECIFIED,
-                        "threshold": genai.types.HarmBlockThreshold.BLOCK_NONE,
-                    },
-                ]
-            )
+                safety_settings=safety_settings(),
+            ))
 
             text = getattr(response, 'text', None) or str(response)
-            summary = text.strip()
-            
-            # Clean up the summary - ensure exactly 2 complete sentences
-            # Remove any leading/trailing markers or quotes
-            summary = summary.strip('"').strip("'").strip()
-            
-            # Split by newlines and periods to identify sentences
-            lines = [line.strip() for line in summary.split('\n') if line.strip()]
-            
-            if not lines:
-                summary = f"Event occurred on {event_date}. See context for details."
-            else:
-                # Reconstruct sentences - split by periods if needed
-                sentences = []
-                for line in lines:
-                    # Split by period but keep the period with the sentence
-                    parts = line.split('.')
-                    for i, part in enumerate(parts):
-                        part = part.strip()
-                        if part and len(part) > 10:  # Only substantial sentences
-                            if i < len(parts) - 1:  # Not the last part (which may be empty)
-                                sentences.append(part + '.')
-                            elif part.endswith('.'):
-                                sentences.append(part)
-                            elif len(part) > 20:  # Substantial text without period
-                                sentences.append(part + '.')
-                
-                # Allow 2-4 sentences for all event types (judgments can use up to 4, others up to 4 as well)
-                max_sentences = 4  # Allow up to 4 sentences for detailed summaries
-                
-                if len(sentences) >= max_sentences:
-                    summary = '\n'.join(sentences[:max_sentences])
-                elif len(sentences) >= 2:
-                    summary = '\n'.join(sentences[:2])
-                elif len(sentences) == 1:
-                    # If only one sentence, check if it's too short (less than 15 words)
-                    first_sentence = sentences[0]
-                    word_count = len(first_sentence.split())
-                    
-                    # If sentence is too short, expand it with details from context
-                    if word_count < 15:
-                        # Try to extract more details to expand the sentence
-                        expanded_parts = [first_sentence.rstrip('.')]
-                        
-                        if event_type in ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment']:
-                            if 'passport' in clean_context.lower():
-                                expanded_parts.append("regarding passport impounding and constitutional rights")
-                            elif 'article' in clean_context.lower():
-                                article_match = re.search(r'Article\s+(\d+)', clean_context, re.IGNORECASE)
-                                if article_match:
-                                    expanded_parts.append(f"addressing fundamental rights under Article {article_match.group(1)} of the Constitution")
-                            elif section_info:
-                                expanded_parts.append(f"interpreting {section_info}")
-                        
-                        first_sentence = ' '.join(expanded_parts) + '.'
-                    
-                    # Always add a second sentence with meaningful details
-                    if event_type in ['Court Judgment', 'Supreme Court Judgment', 'High Court Judgment']:
-                        if 'challenged' in clean_context.lower():
-                            summary = f"{first_sentence}\nThe case involved constitutional and legal challenges regarding fundamental rights and administrative action."
-                        elif 'held' in clean_context.lower() or 'decided' in clean_context.lower():
-                            summary = f"{first_sentence}\nThe judgment established important legal principles and clarified the application of relevant statutory provisions."
-                        elif section_info:
-                            summary = f"{first_sentence}\nThe judgment interpreted and applied {section_info}, establishing important legal precedents."
-                        else:
-                            summary = f"{first_sentence}\nThe judgment addressed significant legal issues and provided important directives for future cases."
-                    elif event_type == 'Court Proceeding':
-                        if 'passport' in clean_context.lower():
-                            summary = f"{first_sentence}\nThe proceeding involved matters related to passport impounding and constitutional rights under Articles 14, 19, and 21."
-                        elif 'writ' in clean_context.lower():
-                            summary = f"{first_sentence}\nThe proceeding addressed a writ petition raising important constitutional and administrative law questions."
-                        elif section_info:
-                            summary = f"{first_sentence}\nThe proceeding addressed legal matters under {section_info} and examined relevant statutory provisions."
-                        else:
-                            summary = f"{first_sentence}\nThe proceeding involved significant legal actions and court directives addressing key issues in the case."
-                    else:
-                        if section_info and section_info not in first_sentence:
-                            summary = f"{first_sentence}\nThis action was taken under {section_info} and addressed important compliance and legal requirements."
-                        else:
-                            summary = f"{first_sentence}\nThis action was significant in the context of the ongoing legal proceedings."
-                else:
-                    # Fallback: use cleaned lines
-                    max_lines = max_sentences
-                    summary = '\n'.join(lines[:max_lines]) if len(lines) >= max_lines else '\n'.join(lines)
-                    # Ensure it ends properly
-                    if summary and not summary.rstrip().endswith(('.', '!', '?')):
-                        summary = summary.rstrip() + '.'
-            
-            # Build improved event
-            improved_event = event.copy()
-            improved_event['summary'] = summary
-            improved_event['date'] = event_date
-            improved_event['eventType'] = event_type  # Keep the improved event type from timeline_analyzer
-            improved_event['eventName'] = event_name  # Keep the improved event name
-            
-            return improved_event
+            summary = normalize_summary(text, event_date, event_type, clean_context, section_info)
+            return build_improved_event(event, summary, event_date)
             
         except Exception as e:
             print(f"Gemini attempt {attempt} failed for event {event.get('id', 'unknown')}: {e}", file=sys.stderr)
             if attempt == max_attempts:
-                # Fallback to manual cleaning
-                return clean_event_manually(event)
+                # The caller falls back to manual cleaning
+                raise
             time.sleep(backoff)
             backoff *= 2.0
-    
-    return clean_event_manually(event)
 
 
-def process_timeline_with_gemini(timeline: List[Dict[str, Any]], model: Any) -> List[Dict[str, Any]]:
-    """Process timeline events individually with Gemini API for accurate date-aware summaries"""
-    improved_events = []
+BATCH_PROMPT = """You are analyzing events from one legal document timeline. For EACH event below, write a detailed, accurate, and MEANINGFUL summary of what happened on its date.
+
+CRITICAL REQUIREMENTS (apply to every event):
+1. For COURT JUDGMENTS (Court Judgment, Supreme Court Judgment, High Court Judgment): 2-4 COMPLETE sentences explaining what the judgment was about, what the court decided or held, and key legal principles or directives established.
+2. For ALL other events: 2-4 COMPLETE sentences - what happened (court/authority + specific action), key details (amounts, sections, parties, directives, consequences), and further context if applicable.
+3. NEVER write vague summaries like "The Court delivered a judgment in the matter." - explain WHAT judgment, WHAT action, WHAT order and WHY it matters.
+4. Extract specific information from each event's own context only: legal issues, parties, what was challenged or appealed, the holding, sections of acts, directives, amounts, dates or time limits.
+5. Remove ALL noise: citations like "MANU/", URLs, headers, "Refer to", case citation numbers.
+6. Each sentence MUST be grammatically complete, at least 15 words long and end with a period. No truncation markers (..., etc.).
+
+EVENTS:
+{events}
+
+Return ONLY a JSON array with one object per event, putting each sentence of the summary on its own line:
+[{{"id": "<event id>", "summary": "<sentence 1>\\n<sentence 2>"}}]"""
+
+
+def parse_batch_response(text: str, expected_ids) -> Dict[str, str]:
+    """Map event id -> summary from a batch response; malformed or unknown entries are dropped"""
+    text = text.strip()
+    # Strip markdown code fences the model sometimes adds around JSON
+    fence = re.match(r'^```(?:json)?\s*(.*?)\s*```$', text, re.DOTALL)
+    if fence:
+        text = fence.group(1)
+    try:
+        data = json.loads(text)
+    except ValueError:
+        start, end = text.find('['), text.rfind(']')
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+    if isinstance(data, dict):
+        data = data.get('events', data.get('summaries', []))
     
-    print(f"Processing {len(timeline)} events individually...", file=sys.stderr)
+    summaries = {}
+    for item in data if isinstance(data, list) else []:
+        if not isinstance(item, dict):
+            continue
+        event_id = str(item.get('id', ''))
+        summary = item.get('summary')
+        if event_id in expected_ids and isinstance(summary, str) and summary.strip():
+            summaries[event_id] = summary
+    return summaries
+
+
+def refactor_event_batch(batch: List[Tuple[int, Dict[str, Any]]], model: Any) -> Dict[int, Dict[str, Any]]:
+    """Refactor several events with one Gemini request.
+
+    Returns improved events by timeline index; events missing from the response
+    (or a failed request) are left out so the caller can retry them one by one.
+    """
+    prepared = {}
+    blocks = []
+    max_tokens = 256  # JSON framing
+    for idx, event in batch:
+        event_id = f"e{idx}"
+        event_date = extract_event_date(event)
+        event_type = event.get('eventType', 'Legal Event')
+        clean_context, section_info = prepare_event_context(event.get('context', ''))
+        context_window = 1200 if event_type in JUDGMENT_TYPES else 800
+        blocks.append(
+            f"[id: {event_id}]\nEvent Date: {event_date}\nEvent Type: {event_type}\n"
+            f"Event Context: {clean_context[:context_window]}"
+        )
+        max_tokens += 500 if event_type in JUDGMENT_TYPES else 300
+        prepared[event_id] = (idx, event, event_date, event_type, clean_context, section_info)
+    prompt = BATCH_PROMPT.format(events='\n\n'.join(blocks))
     
-    for idx, event in enumerate(timeline, 1):
+    max_attempts = 2
+    backoff = 1.0
+    for attempt in range(1, max_attempts + 1):
         try:
-            improved_event = refactor_single_event(event, model)
-            improved_events.append(improved_event)
-            
-            # Progress indicator
-            if idx % 5 == 0:
-                print(f"Processed {idx}/{len(timeline)} events...", file=sys.stderr)
-            
-            # Small delay to avoid rate limits
-            time.sleep(0.2)
-            
+            wait_for_rate_limit()
+            import google.generativeai as genai
+            response = LEDGER.track('event_batch', getattr(model, 'model_name', 'gemini'), prompt, lambda: model.generate_content(
+                prompt,
+                generation_config=genai.types.GenerationConfig(
+                    temperature=0.3,
+                    max_output_tokens=min(max_tokens, 8192),
+                    top_p=0.9,
+                    top_k=40,
+                    response_mime_type='application/json',
+                ),
+                safety_settings=safety_settings(),
+            ))
+            text = getattr(response, 'text', None) or str(response)
+            break
+        except Exception as e:
+            print(f"Gemini batch attempt {attempt} failed for {len(batch)} events: {e}", file=sys.stderr)
+            if attempt == max_attempts:
+                return {}
+            time.sleep(backoff)
+            backoff *= 2.0
+    
+    improved = {}
+    for event_id, summary in parse_batch_response(text, prepared).items():
+        idx, event, event_date, event_type, clean_context, section_info = prepared[event_id]
+        summary = normalize_summary(summary, event_date, event_type, clean_context, section_info)
+        improved[idx] = build_improved_event(event, summary, event_date)
+    return improved
+
+
+def process_timeline_with_gemini(timeline: List[Dict[str, Any]], model: Any,
+                                 batch_size: int = BATCH_SIZE,
+                                 max_workers: int = MAX_CONCURRENT_REQUESTS,
+                                 fallbacks: Optional[List[int]] = None) -> List[Dict[str, Any]]:
+    """Refactor timeline events with Gemini, several events per request and several requests at once.
+
+    Events a batch response did not cover are retried individually, which in
+    turn falls back to manual cleaning; the indexes of those events are appended
+    to ``fallbacks`` when given. Output keeps the timeline order.
+    """
+    improved_events: List[Optional[Dict[str, Any]]] = [None] * len(timeline)
+    indexed = list(enumerate(timeline))
+    max_workers = max(1, max_workers)
+    
+    def run_batch(batch):
+        try:
+            return refactor_event_batch(batch, model)
+        except Exception as e:
+            print(f"Error processing batch: {e}", file=sys.stderr)
+            return {}
+    
+    def run_single(item):
+        idx, event = item
+        try:
+            return refactor_single_event(event, model), False
         except Exception as e:
-            print(f"Error processing event {idx}: {e}", file=sys.stderr)
+            print(f"Error processing event {idx + 1}: {e}", file=sys.stderr)
             # Fallback to manual cleaning
-            improved_events.append(clean_event_manually(event))
+            return clean_event_manually(event), True
+    
+    if batch_size > 1:
+        batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+        print(f"Processing {len(timeline)} events in {len(batches)} batches "
+              f"({max_workers} concurrent)...", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for done, improved in enumerate(pool.map(TRACER.propagate(run_batch), batches), 1):
+                for idx, improved_event in improved.items():
+                    improved_events[idx] = improved_event
+                print(f"Processed batch {done}/{len(batches)}...", file=sys.stderr)
+    
+    pending = [(idx, event) for idx, event in indexed if improved_events[idx] is None]
+    if pending:
+        print(f"Processing {len(pending)} events individually...", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for (idx, _), (improved_event, fell_back) in zip(pending, pool.map(TRACER.propagate(run_single), pending)):
+                improved_events[idx] = improved_event
+                if fell_back and fallbacks is not None:
+                    fallbacks.append(idx)
     
     return improved_events
         
@@ -351,10 +523,40 @@ def format_date(date_str: str) -> str:
     except ValueError:
         return date_str
 
-def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
+# Manual cleaning pipeline, compiled once for all events
+# Citations then URLs, in this order: a URL ending in a citation leaves a bare "http://"
+MANUAL_CITATION_RE = re.compile(r'MANU/[^\s]+')
+MANUAL_URL_RE = re.compile(r'https?://\S+')
+MANUAL_DATE_RE = re.compile(r'(\d{1,2}\.\d{1,2}\.\d{4})')
+MANUAL_AMOUNT_RE = re.compile(r'Rs\.\s*([0-9,]+(?:\.[0-9]+)?)')
+MANUAL_SECTION_RE = re.compile(r'Section\s+(\d+(?:[A-Za-z])?)', re.IGNORECASE)
+MANUAL_CHALLENGED_RE = re.compile(r'challeng(?:ed|ing)\s+([^.]+?)(?:\.|,|$)', re.IGNORECASE)
+MANUAL_HELD_RE = re.compile(r'held\s+that\s+([^.]+?)(?:\.|$)', re.IGNORECASE)
+MANUAL_DECIDED_RE = re.compile(r'decid(?:ed|ing)\s+([^.]+?)(?:\.|$)', re.IGNORECASE)
+MANUAL_CASE_NAME_RE = re.compile(r'([A-Z][a-z]+\s+(?:v\.?|vs\.?)\s+[A-Z][^.]{10,50})')
+MANUAL_ARTICLE_RE = re.compile(r'Article\s+(\d+)', re.IGNORECASE)
+MANUAL_VIOLATION_RE = re.compile(r'violat(?:es|ion)\s+([^.]+?)(?:\.|$)', re.IGNORECASE)
+MANUAL_DIRECTION_RE = re.compile(r'direct(?:ed|ing)\s+([^.]+?)(?:\.|$)', re.IGNORECASE)
+MANUAL_PERIOD_RE = re.compile(r'(?:from|since|w\.e\.f\.|with effect from)\s+(\d{1,2}\.\d{1,2}\.\d{4})', re.IGNORECASE)
+
+
+# Joins all contexts for one substitution pass; the patterns above stop at
+# whitespace, so nothing matches across it and the result splits back per event
+MANUAL_BATCH_SEPARATOR = '\n\x1e\n'
+
+
+def strip_manual_context(context: str) -> str:
+    """Remove page breaks, citations and URLs (works on one context or a joined batch)"""
+    context = context.replace('--- PAGE BREAK ---', ' ').replace('PAGE BREAK', ' ')
+    context = MANUAL_CITATION_RE.sub('', context)  # Remove citations
+    return MANUAL_URL_RE.sub('', context)  # Remove URLs
+
+
+def clean_event_manually(event: Dict[str, Any], clean_context: Optional[str] = None) -> Dict[str, Any]:
     """
     Fallback: Clean event manually if Gemini API fails
     Generates 2 complete sentences that don't end abruptly
+    (clean_context: the event's context already stripped, as clean_events_manually passes it)
     """
     cleaned_event = event.copy()
     
@@ -370,23 +572,23 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
     context = event.get('context', '')
     if context:
         # Clean context first
-        clean_context = context.replace('--- PAGE BREAK ---', ' ').replace('PAGE BREAK', ' ')
-        clean_context = re.sub(r'MANU/[^\s]+', '', clean_context)  # Remove citations
-        clean_context = re.sub(r'https?://\S+', '', clean_context)  # Remove URLs
+        if clean_context is None:
+            clean_context = strip_manual_context(context)
         clean_context = ' '.join(clean_context.split())  # Normalize whitespace
+        context_lower = clean_context.lower()
         
         lines = []
         
         # Extract date references
-        date_match = re.search(r'(\d{1,2}\.\d{1,2}\.\d{4})', clean_context)
+        date_match = MANUAL_DATE_RE.search(clean_context)
         extracted_date = date_match.group(1) if date_match else event_date
         
         # Extract amounts (complete, not truncated)
-        amount_matches = re.findall(r'Rs\.\s*([0-9,]+(?:\.[0-9]+)?)', clean_context)
+        amount_matches = MANUAL_AMOUNT_RE.findall(clean_context)
         amounts_list = [f"Rs. {amt}" for amt in amount_matches[:2]]  # Limit to 2 amounts
         
         # Extract section references (complete)
-        section_match = re.search(r'Section\s+(\d+(?:[A-Za-z])?)', clean_context, re.IGNORECASE)
+        section_match = MANUAL_SECTION_RE.search(clean_context)
         section_ref = section_match.group(0) if section_match else ""
         
         # For court judgments, try to extract what the judgment was about
@@ -395,22 +597,22 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
             judgment_details = []
             
             # Extract what was challenged or the issue
-            if 'challenged' in clean_context.lower():
-                challenged_match = re.search(r'challeng(?:ed|ing)\s+([^.]+?)(?:\.|,|$)', clean_context, re.IGNORECASE)
+            if 'challenged' in context_lower:
+                challenged_match = MANUAL_CHALLENGED_RE.search(clean_context)
                 if challenged_match:
                     challenged_text = challenged_match.group(1).strip()[:100]
                     judgment_details.append(f"The case involved a challenge to {challenged_text}")
             
             # Extract court holding or decision
-            if 'held' in clean_context.lower():
-                held_match = re.search(r'held\s+that\s+([^.]+?)(?:\.|$)', clean_context, re.IGNORECASE)
+            if 'held' in context_lower:
+                held_match = MANUAL_HELD_RE.search(clean_context)
                 if held_match:
                     held_text = held_match.group(1).strip()[:120]
                     judgment_details.append(f"The Court held that {held_text}")
             
             # Extract what the court decided
-            if 'decided' in clean_context.lower() or 'decision' in clean_context.lower():
-                decided_match = re.search(r'decid(?:ed|ing)\s+([^.]+?)(?:\.|$)', clean_context, re.IGNORECASE)
+            if 'decided' in context_lower or 'decision' in context_lower:
+                decided_match = MANUAL_DECIDED_RE.search(clean_context)
                 if decided_match:
                     decided_text = decided_match.group(1).strip()[:100]
                     judgment_details.append(f"The Court decided regarding {decided_text}")
@@ -424,17 +626,17 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
                 first_sentence = '. '.join(judgment_details[:2]) + "."
             else:
                 # Try to extract case name or parties
-                case_match = re.search(r'([A-Z][a-z]+\s+(?:v\.?|vs\.?)\s+[A-Z][^.]{10,50})', clean_context)
+                case_match = MANUAL_CASE_NAME_RE.search(clean_context)
                 if case_match:
                     case_name = case_match.group(1).strip()
                     first_sentence = f"The Court delivered a judgment in {case_name}."
                 else:
                     # Extract key legal terms
                     legal_terms = []
-                    if 'passport' in clean_context.lower():
+                    if 'passport' in context_lower:
                         legal_terms.append("passport impounding")
-                    if 'constitution' in clean_context.lower() or 'article' in clean_context.lower():
-                        article_match = re.search(r'Article\s+(\d+)', clean_context, re.IGNORECASE)
+                    if 'constitution' in context_lower or 'article' in context_lower:
+                        article_match = MANUAL_ARTICLE_RE.search(clean_context)
                         if article_match:
                             legal_terms.append(f"Article {article_match.group(1)} of the Constitution")
                     if legal_terms:
@@ -446,12 +648,12 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
             
             # Build second sentence - court's decision/holding
             second_parts = []
-            if 'violates' in clean_context.lower() or 'violation' in clean_context.lower():
-                violation_match = re.search(r'violat(?:es|ion)\s+([^.]+?)(?:\.|$)', clean_context, re.IGNORECASE)
+            if 'violates' in context_lower or 'violation' in context_lower:
+                violation_match = MANUAL_VIOLATION_RE.search(clean_context)
                 if violation_match:
                     second_parts.append(f"The Court found violations of {violation_match.group(1).strip()[:80]}.")
-            elif 'directed' in clean_context.lower() or 'direction' in clean_context.lower():
-                direction_match = re.search(r'direct(?:ed|ing)\s+([^.]+?)(?:\.|$)', clean_context, re.IGNORECASE)
+            elif 'directed' in context_lower or 'direction' in context_lower:
+                direction_match = MANUAL_DIRECTION_RE.search(clean_context)
                 if direction_match:
                     second_parts.append(f"The Court directed {direction_match.group(1).strip()[:100]}.")
             elif section_ref:
@@ -465,8 +667,8 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
                 lines.append("The judgment addressed significant constitutional and legal issues.")
             
             # Add third sentence if more context available
-            if 'article' in clean_context.lower() and 'constitution' in clean_context.lower():
-                article_matches = re.findall(r'Article\s+(\d+)', clean_context, re.IGNORECASE)
+            if 'article' in context_lower and 'constitution' in context_lower:
+                article_matches = MANUAL_ARTICLE_RE.findall(clean_context)
                 if article_matches:
                     articles = list(set(article_matches[:3]))
                     if articles:
@@ -481,28 +683,28 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
             
             # Identify court
             court_name = None
-            if 'family court' in clean_context.lower():
+            if 'family court' in context_lower:
                 court_name = "the Family Court"
-            elif 'supreme court' in clean_context.lower() or ' sc ' in clean_context.lower():
+            elif 'supreme court' in context_lower or ' sc ' in context_lower:
                 court_name = "the Supreme Court"
-            elif 'high court' in clean_context.lower() or ' hc ' in clean_context.lower():
+            elif 'high court' in context_lower or ' hc ' in context_lower:
                 court_name = "the High Court"
-            elif 'court' in clean_context.lower():
+            elif 'court' in context_lower:
                 court_name = "the Court"
             
             # Identify action
             action = None
-            if 'awarded' in clean_context.lower() or 'award' in clean_context.lower():
+            if 'awarded' in context_lower or 'award' in context_lower:
                 action = "awarded"
-            elif 'directed' in clean_context.lower() or 'direction' in clean_context.lower():
+            elif 'directed' in context_lower or 'direction' in context_lower:
                 action = "directed"
-            elif 'ordered' in clean_context.lower() or 'order' in clean_context.lower():
+            elif 'ordered' in context_lower or 'order' in context_lower:
                 action = "ordered"
-            elif 'amended' in clean_context.lower() or 'amendment' in clean_context.lower():
+            elif 'amended' in context_lower or 'amendment' in context_lower:
                 action = "amended"
-            elif 'filed' in clean_context.lower() or 'filing' in clean_context.lower():
+            elif 'filed' in context_lower or 'filing' in context_lower:
                 action = "filed"
-            elif 'decided' in clean_context.lower() or 'decision' in clean_context.lower():
+            elif 'decided' in context_lower or 'decision' in context_lower:
                 action = "decided"
             
             # Build first sentence
@@ -512,8 +714,8 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
                 first_parts.append(f"{action}")
             
             # Add event type if relevant
-            if 'maintenance' in clean_context.lower():
-                if 'interim' in clean_context.lower():
+            if 'maintenance' in context_lower:
+                if 'interim' in context_lower:
                     first_parts.append("interim maintenance")
                 else:
                     first_parts.append("maintenance")
@@ -544,8 +746,8 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
                 second_parts.append(f"This relates to {section_ref} of the relevant Act.")
             
             # Add period information for maintenance
-            elif 'maintenance' in clean_context.lower():
-                period_match = re.search(r'(?:from|since|w\.e\.f\.|with effect from)\s+(\d{1,2}\.\d{1,2}\.\d{4})', clean_context, re.IGNORECASE)
+            elif 'maintenance' in context_lower:
+                period_match = MANUAL_PERIOD_RE.search(clean_context)
                 if period_match:
                     period_date = period_match.group(1)
                     second_parts.append(f"This order was effective from {period_date}.")
@@ -554,9 +756,9 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
             
             # Generic fallback for second sentence
             if not second_parts:
-                if 'arrears' in clean_context.lower():
+                if 'arrears' in context_lower:
                     second_parts.append("The matter involved payment of arrears.")
-                elif 'compliance' in clean_context.lower() or 'affidavit' in clean_context.lower():
+                elif 'compliance' in context_lower or 'affidavit' in context_lower:
                     second_parts.append("This involved compliance or filing requirements.")
                 else:
                     second_parts.append("See context for additional details.")
@@ -586,32 +788,100 @@ def clean_event_manually(event: Dict[str, Any]) -> Dict[str, Any]:
     
     return cleaned_event
 
+
+def clean_events_manually(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Manual cleaning for a whole timeline (same output as cleaning each event)
+
+    The substitutions run once over all contexts joined together instead of
+    once per event.
+    """
+    contexts = [event.get('context') or '' for event in events]
+    stripped = strip_manual_context(MANUAL_BATCH_SEPARATOR.join(contexts)).split(MANUAL_BATCH_SEPARATOR)
+    if len(stripped) != len(events):
+        # A context contained the separator itself
+        return [clean_event_manually(event) for event in events]
+    return [clean_event_manually(event, clean_context) for event, clean_context in zip(events, stripped)]
+
+
+# Local summaries scoring at least this are kept instead of being sent to Gemini
+# (set above 1 to send every event)
+SUMMARY_CONFIDENCE_THRESHOLD = float(os.getenv('TIMELINE_SUMMARY_CONFIDENCE', '0.7'))
+
+# Boilerplate the deterministic summarizer falls back to; such lines say nothing specific
+GENERIC_SENTENCE_RE = re.compile('|'.join([
+    r'took action in the .* matter',
+    r'(?:issued an order|delivered a judgment|took action) in the matter',
+    r'conducted legal proceedings addressing important matters',
+    r'was part of the ongoing legal proceedings',
+    r'established important legal principles',
+    r'was significant in the (?:course|context) of (?:the ongoing )?legal proceedings',
+    r'see context for (?:additional )?details',
+    r'^(?:a statutory amendment was made|an order was issued|legal action was taken|a filing was made'
+    r'|a judgment was delivered|directions were issued|the case was dismissed)\.$',
+]))
+
+# Extraction glitches like "of the the Act"
+REPEATED_WORD_RE = re.compile(r'\b(\w+) \1\b', re.IGNORECASE)
+
+# Concrete facts a useful summary carries, each counted once
+SPECIFIC_DETAIL_RES = [
+    re.compile(r'\b(?:petitioner|respondent|appellant|applicant|defendant|plaintiff|accused|wife|husband|union of india|government)\b'),
+    re.compile(r'\b(?:section|article|rule)\s+\d+|\bact\b|\bcode\b'),
+    re.compile(r'(?:rs\.?|₹|\$|inr)\s*\d|\b\d[\d,]*\s*(?:rupees|lakhs?|crores?)\b'),
+    re.compile(r'\b(?:supreme|high|family|district|sessions) court\b|\btribunal\b|\bmagistrate\b'),
+]
+
+
+def score_summary(summary: str) -> float:
+    """Confidence (0-1) that a local summary is good enough to keep as is.
+
+    Rewards complete sentences, 2-4 lines, non-boilerplate length and concrete
+    details (parties, provisions, amounts, courts).
+    """
+    lines = [line.strip() for line in (summary or '').split('\n') if line.strip()]
+    if not lines:
+        return 0.0
+    complete = sum(
+        1 for line in lines
+        if line[0].isupper() and line.endswith(('.', '!', '?')) and not line.endswith('...')
+        and not REPEATED_WORD_RE.search(line)
+    ) / len(lines)
+    specific_lines = [line.lower() for line in lines if not GENERIC_SENTENCE_RE.search(line.lower())]
+    words = sum(len(line.split()) for line in specific_lines)
+    details = sum(1 for pattern in SPECIFIC_DETAIL_RES if any(pattern.search(line) for line in specific_lines))
+    return (0.2 * complete
+            + 0.1 * (2 <= len(lines) <= 4)
+            + 0.3 * min(1.0, words / 25)
+            + 0.4 * min(1.0, details / 2))
+
+
+def route_events(timeline: List[Dict[str, Any]], threshold: float = SUMMARY_CONFIDENCE_THRESHOLD
+                 ) -> Tuple[List[int], List[int]]:
+    """Split event indices into (confident, weak) by the score of their existing summary"""
+    confident, weak = [], []
+    for idx, event in enumerate(timeline):
+        (confident if score_summary(event.get('summary', '')) >= threshold else weak).append(idx)
+    return confident, weak
+
+
+# Summary keywords mapped to categories, checked in order
+CATEGORY_RULES = [
+    (('maintenance',), 'Maintenance Order'),
+    (('appeal',), 'Appeal Filing'),
+    (('affidavit',), 'Affidavit Filing'),
+    (('hearing',), 'Hearing'),
+    (('amendment',), 'Amendment'),
+    (('settlement',), 'Settlement'),
+    (('stay',), 'Stay Order'),
+    (('final', 'judgment'), 'Final Judgment'),
+    (('interim',), 'Interim Order'),
+    (('direct', 'order', 'instruct'), 'Court Direction'),
+]
+
+
 def determine_category(summary: str) -> str:
     """Determine event category from summary content"""
-    summary = summary.lower()
-    
-    if 'maintenance' in summary:
-        return 'Maintenance Order'
-    if 'appeal' in summary:
-        return 'Appeal Filing'
-    if 'affidavit' in summary:
-        return 'Affidavit Filing'
-    if 'hearing' in summary:
-        return 'Hearing'
-    if 'amendment' in summary:
-        return 'Amendment'
-    if 'settlement' in summary:
-        return 'Settlement'
-    if 'stay' in summary:
-        return 'Stay Order'
-    if 'final' in summary or 'judgment' in summary:
-        return 'Final Judgment'
-    if 'interim' in summary:
-        return 'Interim Order'
-    if any(word in summary for word in ['direct', 'order', 'instruct']):
-        return 'Court Direction'
-    
-    return 'Court Order'
+    return first_rule(summary.lower(), CATEGORY_RULES, 'Court Order')
 
 def main():
     """Main entry point"""
@@ -642,21 +912,55 @@ def main():
             json.dump({'error': 'Empty timeline provided', 'refactored': []}, sys.stdout)
             return
         
+        # Keep confident local summaries; only weak ones need rewriting
+        with TRACER.span('route', events=len(timeline)) as span:
+            confident, weak = route_events(timeline)
+            span.set(local=len(confident), weak=len(weak))
+        improved_timeline: List[Optional[Dict[str, Any]]] = [None] * len(timeline)
+        for idx in confident:
+            event = timeline[idx]
+            improved_timeline[idx] = build_improved_event(event, event['summary'], extract_event_date(event))
+        weak_events = [timeline[idx] for idx in weak]
+        
         # Configure Gemini
         api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        provider = get_provider()
+        sent_to_llm = 0
+        fallbacks: List[int] = []
+        if not weak_events:
+            rewritten = []
+        elif not api_key and provider.requires_api_key:
             print("Warning: No GEMINI_API_KEY found, using manual cleaning", file=sys.stderr)
             # Fallback to manual cleaning if no API key
-            improved_timeline = [clean_event_manually(event) for event in timeline]
+            with TRACER.span('manual_clean', events=len(weak_events)):
+                rewritten = clean_events_manually(weak_events)
         else:
             try:
-                genai.configure(api_key=api_key)
-                model = genai.GenerativeModel('gemini-2.5-flash')
-                improved_timeline = process_timeline_with_gemini(timeline, model)
+                model = provider.generative_model('gemini-2.5-flash', api_key)
+                with TRACER.span('llm_refactor', events=len(weak_events)):
+                    rewritten = process_timeline_with_gemini(weak_events, model, fallbacks=fallbacks)
+                # Events whose Gemini calls all failed were cleaned manually
+                sent_to_llm = len(weak_events) - len(fallbacks)
             except Exception as e:
                 print(f"Gemini processing failed: {e}, falling back to manual cleaning", file=sys.stderr)
                 # Fallback to manual cleaning
-                improved_timeline = [clean_event_manually(event) for event in timeline]
+                fallbacks[:] = range(len(weak_events))
+                with TRACER.span('manual_clean', events=len(weak_events)):
+                    rewritten = clean_events_manually(weak_events)
+        for idx, event in zip(weak, rewritten):
+            improved_timeline[idx] = event
+        
+        routing = {
+            'local': len(confident),
+            'llm': sent_to_llm,
+            'manual': len(weak) - sent_to_llm,
+            'llm_fallbacks': len(fallbacks),
+            'llm_ratio': round(sent_to_llm / len(timeline), 3),
+            'threshold': SUMMARY_CONFIDENCE_THRESHOLD,
+        }
+        print(f"Routing: {len(confident)}/{len(timeline)} events kept local, "
+              f"{sent_to_llm} refactored by Gemini, {routing['manual']} cleaned manually "
+              f"({len(fallbacks)} after Gemini failed)", file=sys.stderr)
         
         # Output the result - use 'refactored' key for compatibility
         output = {
@@ -664,9 +968,13 @@ def main():
             'timeline': improved_timeline,  # Also include 'timeline' for compatibility
             'original_count': len(timeline),
             'improved_count': len(improved_timeline),
+            'routing': routing,
+            'tokens': LEDGER.totals(),
+            'timings': TRACER.timings(),
         }
         
         json.dump(output, sys.stdout, indent=2)
+        TRACER.export()
         
     except json.JSONDecodeError as e:
         json.dump({'error': f'Invalid JSON input: {e}', 'refactored': []}, sys.stdout)
@@ -675,4 +983,5 @@ def main():
 
 
 if __name__ == '__main__':
-    main()
+    with track_request('timeline_refactor'):
+        main()
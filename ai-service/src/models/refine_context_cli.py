@@ -15,9 +15,13 @@ from datetime import datetime, timedelta
 # Add parent directories to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-import google.generativeai as genai
 from typing import Dict, Any, Optional, List
 
+from token_estimator import LEDGER
+from tracing import TRACER
+from metrics import track_request
+from llm_provider import get_provider
+
 def check_rate_limit():
     # Basic rate limit check could be added here if needed
     return False
@@ -42,14 +46,15 @@ ORIGINAL TEXT:
 REFINED TEXT:"""
     
     try:
-        response = model.generate_content(
+        import google.generativeai as genai
+        response = LEDGER.track('refine_context', getattr(model, 'model_name', 'gemini'), prompt, lambda: model.generate_content(
             prompt,
             generation_config=genai.types.GenerationConfig(
                 temperature=0.1,  # Low temperature for factual consistency
                 max_output_tokens=1024,
                 top_p=0.9,
             ),
-        )
+        ))
         return response.text.strip()
     except Exception as e:
         print(f"Refine context failed: {e}", file=sys.stderr)
@@ -65,20 +70,22 @@ def main():
             context = " ".join([str(c.get('context', c)) if isinstance(c, dict) else str(c) for c in context])
         
         api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
+        provider = get_provider()
+        if not api_key and provider.requires_api_key:
             # Fallback
             json.dump({'refined': context}, sys.stdout)
             return
 
-        genai.configure(api_key=api_key)
-        model = genai.GenerativeModel('gemini-1.5-flash')
+        model = provider.generative_model('gemini-1.5-flash', api_key)
         
         refined = refine_legal_context(context, model)
         
-        json.dump({'refined': refined}, sys.stdout)
+        json.dump({'refined': refined, 'tokens': LEDGER.totals(), 'timings': TRACER.timings()}, sys.stdout)
+        TRACER.export()
         
     except Exception as e:
         json.dump({'error': str(e)}, sys.stdout)
 
 if __name__ == '__main__':
-    main()
+    with track_request('refine_context'):
+        main()
@@ -0,0 +1,68 @@
+"""
+Regex Rule Bank
+Named, precompiled regex rules with optional per-rule timing
+"""
+
+import re
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class RegexRuleBank:
+    """
+    Table of named regex rules compiled once at import.
+
+    Hot paths call rules by name instead of passing literal patterns to
+    re.search/re.sub, which would go through the small internal re cache on
+    every call. Profiling is off by default; when enabled, every call is
+    timed and accumulated under its rule name so costly rules show up in
+    report().
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[str, int]]):
+        self.patterns: Dict[str, re.Pattern] = {
+            name: re.compile(pattern, flags) for name, (pattern, flags) in rules.items()
+        }
+        self.timings: Optional[Dict[str, List[float]]] = None
+
+    def enable_profiling(self) -> None:
+        """Start (or restart) accumulating per-rule call counts and time"""
+        self.timings = {}
+
+    def disable_profiling(self) -> None:
+        self.timings = None
+
+    def _record(self, name: str, start: float) -> None:
+        entry = self.timings.setdefault(name, [0, 0.0])
+        entry[0] += 1
+        entry[1] += time.perf_counter() - start
+
+    def search(self, name: str, text: str) -> Optional[re.Match]:
+        if self.timings is None:
+            return self.patterns[name].search(text)
+        start = time.perf_counter()
+        result = self.patterns[name].search(text)
+        self._record(name, start)
+        return result
+
+    def sub(self, name: str, repl: str, text: str) -> str:
+        if self.timings is None:
+            return self.patterns[name].sub(repl, text)
+        start = time.perf_counter()
+        result = self.patterns[name].sub(repl, text)
+        self._record(name, start)
+        return result
+
+    def finditer(self, name: str, text: str) -> List[re.Match]:
+        """All matches as a list (so the whole scan is timed, not just the first step)"""
+        if self.timings is None:
+            return list(self.patterns[name].finditer(text))
+        start = time.perf_counter()
+        result = list(self.patterns[name].finditer(text))
+        self._record(name, start)
+        return result
+
+    def report(self) -> Iterator[Tuple[str, int, float]]:
+        """Yield (rule, calls, total_seconds), most expensive first"""
+        for name, (calls, seconds) in sorted((self.timings or {}).items(), key=lambda item: -item[1][1]):
+            yield name, calls, seconds
@@ -0,0 +1,173 @@
+"""
+Single Flight
+Coalesces concurrent identical requests: the first caller for a key (the
+leader) computes, callers arriving while it runs (followers) wait and share
+its result. Works across the one-shot CLI processes through a small SQLite
+table, and across threads of one process.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import sqlite3
+import hashlib
+import unicodedata
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from metrics import COALESCED
+
+DEFAULT_FLIGHT_DB = Path(__file__).resolve().parent.parent.parent / "cache" / "inflight.sqlite"
+# A leader that has not finished in this long is presumed dead and replaced (per flight, see SingleFlight)
+FLIGHT_TIMEOUT_SECONDS = 600
+# A finished flight whose followers never collected the result (they died) is dropped after this
+FOLLOWER_GRACE_SECONDS = 30
+
+
+def normalize_question(question: str) -> str:
+    """Case, spacing, Unicode form and trailing punctuation do not change the question"""
+    text = unicodedata.normalize('NFKC', question).casefold()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text.rstrip(' ?!.').strip()
+
+
+def flight_key(*parts: str) -> str:
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+class SingleFlight:
+    """
+    flights table: one row per in-flight key, inserted by the leader. Followers
+    register on the row while it runs; the leader stores its JSON result only
+    if someone is waiting, and the last follower to read it deletes the row.
+    A request arriving after the leader finished never gets that result: it
+    waits for the row to go and computes afresh (this is not a result cache).
+    A failed leader deletes its row, so one of the waiting followers takes
+    over instead of every one of them retrying; so does a leader whose result
+    is not shareable (an error answer). Each flight's row carries a token, so
+    a leader that outlived its timeout cannot touch the flight that replaced it.
+    """
+
+    def __init__(self, path: Optional[str] = None, poll: float = 0.1, timeout: float = FLIGHT_TIMEOUT_SECONDS):
+        self.path = Path(path or os.environ.get("SINGLE_FLIGHT_DB") or DEFAULT_FLIGHT_DB)
+        self.poll = poll
+        # Longer than fn can legitimately take, or a follower starts a duplicate run
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(flights)")}
+            if columns and 'token' not in columns:
+                # Rows only live while a request runs: an older layout can simply be replaced
+                conn.execute("DROP TABLE flights")
+            conn.execute("CREATE TABLE IF NOT EXISTS flights (key TEXT PRIMARY KEY, token TEXT NOT NULL, "
+                         "expires REAL NOT NULL, waiters INTEGER NOT NULL DEFAULT 0, result TEXT, finished REAL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+
+    def _join(self, key: str) -> Tuple[str, Optional[str]]:
+        """('lead', token) for a new flight, ('follow', token) when registered on a running
+        one, ('wait', None) when one just finished"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM flights WHERE finished < ? OR (finished IS NULL AND expires < ?)",
+                         (now - FOLLOWER_GRACE_SECONDS, now))
+            row = conn.execute("SELECT token, finished FROM flights WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                token = uuid.uuid4().hex
+                conn.execute("INSERT INTO flights (key, token, expires) VALUES (?, ?, ?)",
+                             (key, token, now + self.timeout))
+                role = 'lead'
+            elif row[1] is None:
+                token = row[0]
+                conn.execute("UPDATE flights SET waiters = waiters + 1 WHERE key = ? AND token = ?", (key, token))
+                role = 'follow'
+            else:
+                token, role = None, 'wait'
+            conn.execute("COMMIT")
+            return role, token
+        finally:
+            conn.close()
+
+    def _drop(self, key: str, token: str) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM flights WHERE key = ? AND token = ?", (key, token))
+        finally:
+            conn.close()
+
+    def _finish(self, key: str, token: str, result: Any) -> None:
+        """Hand the result to registered followers; with none, the flight is simply over"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT waiters FROM flights WHERE key = ? AND token = ?", (key, token)).fetchone()
+            if row is not None and row[0] > 0:
+                conn.execute("UPDATE flights SET result = ?, finished = ? WHERE key = ? AND token = ?",
+                             (json.dumps(result), time.time(), key, token))
+            else:
+                conn.execute("DELETE FROM flights WHERE key = ? AND token = ?", (key, token))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _collect(self, key: str, token: str) -> Tuple[bool, bool, Any]:
+        """(flight still exists, finished, result); the last follower to collect deletes the row"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT result, finished, waiters FROM flights WHERE key = ? AND token = ?",
+                               (key, token)).fetchone()
+            if row is not None and row[1] is not None:
+                if row[2] <= 1:
+                    conn.execute("DELETE FROM flights WHERE key = ? AND token = ?", (key, token))
+                else:
+                    conn.execute("UPDATE flights SET waiters = waiters - 1 WHERE key = ? AND token = ?",
+                                 (key, token))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        if row is None:
+            return False, False, None
+        if row[1] is None:
+            return True, False, None
+        return True, True, json.loads(row[0])
+
+    def do(self, key: str, fn: Callable[[], Any], operation: str = 'request',
+           shareable: Callable[[Any], bool] = lambda result: True) -> Tuple[Any, bool]:
+        """fn()'s result for key, computed once among concurrent callers.
+        Returns (result, shared): shared is True when another caller computed it.
+        A result shareable() rejects goes to this caller only; followers compute their own."""
+        poll = self.poll
+        while True:
+            role, token = self._join(key)
+            if role == 'lead':
+                COALESCED.inc(operation=operation, role='leader')
+                try:
+                    result = fn()
+                except BaseException:
+                    self._drop(key, token)
+                    raise
+                if shareable(result):
+                    self._finish(key, token, result)
+                else:
+                    self._drop(key, token)
+                return result, False
+            if role == 'wait':
+                # The previous flight's followers are still collecting its result
+                time.sleep(poll)
+                continue
+            while True:
+                exists, finished, result = self._collect(key, token)
+                if not exists:
+                    break  # leader failed, expired or kept its result: try to lead
+                if finished:
+                    COALESCED.inc(operation=operation, role='follower')
+                    return result, True
+                time.sleep(poll)
+                poll = min(poll * 1.5, 1.0)
@@ -9,6 +9,7 @@ Outputs JSON to stdout: { "executive_summary": "..." }
 import os
 import sys
 import json
+import pickle
 from contextlib import redirect_stdout
 import argparse
 from pathlib import Path
@@ -22,8 +23,13 @@ if str(CURRENT_DIR) not in sys.path:
     sys.path.insert(0, str(CURRENT_DIR))
 
 from case_analysis import LegalDocSummarizer  # type: ignore
-from langchain.docstore.document import Document  # type: ignore
-from langchain_community.document_loaders import PyPDFLoader  # type: ignore
+from langchain_core.documents import Document  # type: ignore
+from document_registry import DocumentRegistry  # type: ignore
+from token_estimator import LEDGER  # type: ignore
+from tracing import TRACER  # type: ignore
+from metrics import track_request  # type: ignore
+from llm_provider import get_provider  # type: ignore
+import vector_index  # type: ignore
 
 
 def main():
@@ -36,7 +42,7 @@ def main():
 
     api_key = os.getenv("GEMINI_API_KEY")
     fallback_local_only = False
-    if not api_key:
+    if not api_key and get_provider().requires_api_key:
         # Fallback to a naive local summarizer so the UI keeps working
         fallback_local_only = True
 
@@ -74,6 +80,19 @@ def main():
                     print(json.dumps({"error": "Provide either --text or --pdf"}))
                     return 1
 
+                # Build and cache vector store for chat/QA (LOCAL embeddings only) in a
+                # background process, overlapping the summary's LLM calls: the summary
+                # is returned without waiting for embeddings
+                try:
+                    if args.text:
+                        # The build reads the chunks from the session cache (chunk_document saves PDF chunks)
+                        with open(Path(cache_dir) / "chunks.pkl", 'wb') as f:
+                            pickle.dump(summarizer.chunks, f)
+                    vector_index.start_background_build(cache_key, cache_dir)
+                except Exception as ve:
+                    # Don't fail the summary if vector store fails; chat can attempt init later
+                    print(f"[warn] vectorstore build could not start: {ve}", file=sys.stderr)
+
                 # Only need summaries; skip vector store and QA
                 # Ensure we don't reuse any previous summaries cache inside this cache dir
                 try:
@@ -95,12 +114,6 @@ def main():
                     summaries = summarizer.summarize_hierarchical(chunk_summaries_only=False)
                     exec_summary = summaries.get("executive_summary", "")
 
-                # Build and cache vector store for chat/QA (LOCAL embeddings only)
-                try:
-                    summarizer.create_vector_store()
-                except Exception as ve:
-                    # Don't fail the summary if vector store fails; chat can attempt init later
-                    print(f"[warn] vectorstore creation failed: {ve}", file=sys.stderr)
         else:
             # Naive local fallback: extract text and truncate
             text_data = ""
@@ -110,9 +123,7 @@ def main():
                     file_path = Path(args.pdf)
                     if file_path.suffix.lower() == '.pdf':
                         # Load PDF content
-                        loader = PyPDFLoader(args.pdf)
-                        docs = loader.load()
-                        text_data = "\n\n".join(d.page_content for d in docs)
+                        text_data = DocumentRegistry.default().load_text(args.pdf, separator="\n\n")
                     else:
                         # Load as text file
                         with open(args.pdf, 'r', encoding='utf-8') as f:
@@ -137,7 +148,14 @@ def main():
             )
 
         # Print pure JSON to stdout, include session key for follow-up QA/chat initialization
-        print(json.dumps({"executive_summary": exec_summary, "session": cache_key}))
+        print(json.dumps({
+            "executive_summary": exec_summary,
+            "session": cache_key,
+            "tokens": LEDGER.totals(),
+            "length_control": summarizer.length_stats if not fallback_local_only else None,
+            "timings": TRACER.timings(),
+        }))
+        TRACER.export()
         return 0
     except Exception as e:
         # Print JSON error on stdout; logs went to stderr inside redirect_stdout scope
@@ -146,6 +164,7 @@ def main():
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    with track_request('summary'):
+        sys.exit(main())
 
 
@@ -0,0 +1,193 @@
+"""
+Executive Summary Length Control
+Brings a three-section executive summary into its word range locally: trims
+whole sentences from long sections and fills short ones with sentences from
+the chunk summaries, instead of re-prompting the model
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+SECTION_HEADINGS = ("Case Summary:", "What did the court decide:", "What are the outcomes:")
+MIN_WORDS = 500
+MAX_WORDS = 600
+# Roughly 1.35 tokens per English word for Gemini; the ceiling leaves room for
+# the model's thinking tokens, which count against max_output_tokens
+TOKENS_PER_WORD = 1.35
+THINKING_HEADROOM_TOKENS = 2048
+SUMMARY_MAX_OUTPUT_TOKENS = int(MAX_WORDS * TOKENS_PER_WORD * 1.25) + THINKING_HEADROOM_TOKENS
+
+# Words whose trailing period does not end a sentence in Indian judgments
+ABBREVIATIONS = {
+    'rs', 'v', 'vs', 'no', 'nos', 'sec', 'secs', 's', 'ss', 'art', 'arts', 'cl', 'sub', 'para', 'paras',
+    'ltd', 'pvt', 'co', 'corp', 'inc', 'mr', 'mrs', 'ms', 'dr', 'smt', 'sh', 'shri', 'hon', 'ors', 'anr',
+    'viz', 'cf', 'vol', 'pp', 'jj', 'cj', 'u/s', 'r/w',
+}
+_BOUNDARY = re.compile(r'[.!?]["\')\]*]*\s+(?=["\'(*\[]*[A-Z0-9])')
+_LAST_WORD = re.compile(r'([\w./]+)[.!?]["\')\]*]*\s*$')
+
+# Sentences from chunk summaries are routed to the section they fit
+OUTCOME_CUES = re.compile(r'\b(ordered|directed|dismissed|allowed|quashed|set aside|awarded|granted|remanded|'
+                          r'disposed|restored|acquitted|convicted|sentenced|costs|compensation|to pay)\b', re.IGNORECASE)
+DECISION_CUES = re.compile(r'\b(held|holds|observed|reasoned|interpreted|ruled|opined|concluded|principle|'
+                           r'found that|noted that|reiterated|clarified)\b', re.IGNORECASE)
+_BULLET = re.compile(r'^\s*(?:#+|[*\-•]|\d+[.)])\s+')
+_PLACEHOLDER = "[See above]"
+
+
+def word_count(text: str) -> int:
+    return len(text.split())
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a paragraph, not splitting after 'Rs.', 'v.', 'Sec.', initials and the like"""
+    sentences = []
+    start = 0
+    for match in _BOUNDARY.finditer(text):
+        last = _LAST_WORD.search(text, start, match.end())
+        word = last.group(1).lower().lstrip('(*') if last else ''
+        # Single letters and dotted forms are initials ('A.K.', 'Cr.P.C.')
+        if word in ABBREVIATIONS or (len(word) == 1 and word.isalpha()) or '.' in word:
+            continue
+        sentences.append(text[start:match.end()].strip())
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def split_sections(text: str) -> Optional[List[str]]:
+    """Bodies of the three sections, or None if a heading is missing"""
+    positions = []
+    for heading in SECTION_HEADINGS:
+        match = re.search(re.escape(heading), text, re.IGNORECASE)
+        if not match:
+            return None
+        positions.append((match.start(), match.end()))
+    if [p[0] for p in positions] != sorted(p[0] for p in positions):
+        return None
+    bodies = []
+    for i, (_, body_start) in enumerate(positions):
+        body_end = positions[i + 1][0] if i + 1 < len(positions) else len(text)
+        body = re.sub(r'\s+', ' ', text[body_start:body_end]).strip(' *#')
+        bodies.append('' if body == _PLACEHOLDER else body)
+    return bodies
+
+
+def join_sections(bodies: List[str]) -> str:
+    return "\n\n\n".join(f"{heading}\n\n{body}" for heading, body in zip(SECTION_HEADINGS, bodies))
+
+
+def _signature(sentence: str) -> set:
+    return set(re.findall(r'[a-z0-9]+', sentence.lower()))
+
+
+def _is_duplicate(sentence: str, existing: List[set]) -> bool:
+    words = _signature(sentence)
+    return any(len(words & other) >= 0.6 * min(len(words), len(other)) for other in existing if other)
+
+
+def candidate_sentences(source_texts: List[str]) -> List[List[str]]:
+    """Usable sentences from the chunk summaries, grouped per section (document order)"""
+    per_section: List[List[str]] = [[], [], []]
+    for source in source_texts:
+        for line in source.splitlines():
+            line = _BULLET.sub('', line).replace('**', '').strip()
+            if not line or line.endswith(':'):
+                continue
+            for sentence in split_sentences(line):
+                # Whole sentences only: capitalised, punctuated, of ordinary length
+                if not 8 <= word_count(sentence) <= 60 or sentence[-1] not in '.!?' or not sentence[0].isupper():
+                    continue
+                if OUTCOME_CUES.search(sentence):
+                    per_section[2].append(sentence)
+                elif DECISION_CUES.search(sentence):
+                    per_section[1].append(sentence)
+                else:
+                    per_section[0].append(sentence)
+    return per_section
+
+
+def _trim_to_words(sentence: str, max_words: int) -> str:
+    """Last resort for one overlong sentence: cut at a clause break within max_words"""
+    words = sentence.split()[:max_words]
+    text = ' '.join(words)
+    clause = max(text.rfind(', '), text.rfind('; '))
+    if clause > len(text) // 2:
+        text = text[:clause]
+    return text.rstrip(' ,;:') + '.'
+
+
+def fit_summary_length(summary: str, source_texts: List[str], min_words: int = MIN_WORDS,
+                       max_words: int = MAX_WORDS) -> Tuple[str, Dict]:
+    """Bring a three-heading summary within [min_words, max_words] at sentence boundaries.
+
+    The three sections share the budget: the longest section loses its
+    closing sentence first (opening sentences are kept), and the shortest
+    is topped up first with sentences from source_texts that match its
+    topic and are not already covered, up to a third of the budget each.
+    A summary already in range is returned unchanged.
+    Returns (summary, stats).
+    """
+    stats = {
+        'words_before': word_count(summary), 'words_after': word_count(summary),
+        'sentences_trimmed': 0, 'sentences_added': 0,
+        'in_range_before': min_words <= word_count(summary) <= max_words,
+    }
+    stats['in_range_after'] = stats['in_range_before']
+    bodies = split_sections(summary)
+    if stats['in_range_before'] or bodies is None:
+        return summary, stats
+
+    sections = [split_sentences(body) for body in bodies]
+    # Headings count towards the total, as in the summary's own word count
+    heading_words = sum(word_count(heading) for heading in SECTION_HEADINGS)
+    min_words -= heading_words
+    max_words -= heading_words
+    section_max = max_words // len(SECTION_HEADINGS)
+
+    def words(i: int) -> int:
+        return sum(word_count(s) for s in sections[i])
+
+    def total() -> int:
+        return sum(words(i) for i in range(len(sections)))
+
+    # Too long: drop closing sentences from the longest sections
+    while total() > max_words:
+        trimmable = [i for i in range(len(sections)) if len(sections[i]) > 1]
+        if not trimmable:
+            for section in sections:
+                if section and word_count(section[0]) > section_max:
+                    section[0] = _trim_to_words(section[0], section_max)
+            break
+        sections[max(trimmable, key=words)].pop()
+        stats['sentences_trimmed'] += 1
+
+    # Too short: top up the shortest sections from the chunk summaries
+    if total() < min_words:
+        pools = candidate_sentences(source_texts)
+        seen = [_signature(s) for section in sections for s in section]
+        while total() < min_words:
+            added = False
+            for i in sorted(range(len(sections)), key=words):
+                while pools[i]:
+                    sentence = pools[i].pop(0)
+                    if _is_duplicate(sentence, seen):
+                        continue
+                    if words(i) + word_count(sentence) > section_max or total() + word_count(sentence) > max_words:
+                        continue
+                    sections[i].append(sentence)
+                    seen.append(_signature(sentence))
+                    stats['sentences_added'] += 1
+                    added = True
+                    break
+                if added:
+                    break
+            if not added:
+                break
+
+    result = join_sections([' '.join(section) if section else _PLACEHOLDER for section in sections])
+    stats['words_after'] = word_count(result)
+    stats['in_range_after'] = min_words + heading_words <= stats['words_after'] <= max_words + heading_words
+    return result, stats
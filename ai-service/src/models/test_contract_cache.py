@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test contract section caching: resumed runs and repeat uploads (offline LLM, no API calls)
+"""
+
+import os
+import tempfile
+
+from langchain_core.documents import Document
+
+from contract_analysis import DEFAULT_ANALYSIS_CACHE_DIR, AnalysisCache, ContractAnalyzer
+
+
+SECTIONS = [
+    "This Non-Disclosure Agreement is made between Acme Ltd and the Recipient.",
+    "The Recipient shall keep all Confidential Information secret for 3 years.",
+    "This Agreement is governed by the laws of India.",
+]
+
+
+def make_analyzer(cache_dir, calls, fail_on=None):
+    analyzer = ContractAnalyzer(api_key='', cache_dir=cache_dir)
+    analyzer.chunks = [Document(page_content=text, metadata={'pages': str(i)}) for i, text in enumerate(SECTIONS, 1)]
+    predict = analyzer._predict
+
+    def counted(prompt, label):
+        if fail_on and fail_on in prompt:
+            raise RuntimeError("connection reset")
+        calls.append(label)
+        return predict(prompt, label)
+    analyzer._predict = counted
+    return analyzer
+
+
+def test_failed_section_resumes_and_template_hits_cache():
+    saved = os.environ.get('LLM_PROVIDER')
+    os.environ['LLM_PROVIDER'] = 'fake'
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            # One of the parallel section calls fails; the others are stored as they complete
+            calls = []
+            first = make_analyzer(tmp, calls, fail_on="3 years")
+            analyses = first.analyze_chunks_parallel()
+            assert calls == ['chunk_analysis', 'chunk_analysis']
+            assert analyses[1]['analysis'].startswith("Error analyzing chunk")
+
+            # The re-run only sends the section that failed
+            calls = []
+            analyses = make_analyzer(tmp, calls).analyze_chunks_parallel()
+            assert calls == ['chunk_analysis']
+            assert [a['chunk_num'] for a in analyses] == [1, 2, 3]
+            assert not any(a['analysis'].startswith("Error") for a in analyses)
+
+            # Another upload of the same template costs no section calls
+            calls = []
+            assert make_analyzer(tmp, calls).analyze_chunks_parallel() == analyses
+            assert calls == []
+
+            # Offline answers are never served to Gemini runs, and stay out of Gemini's directory
+            analyzer = make_analyzer(tmp, [])
+            prompt = "Merge these contract analysis sections."
+            analyzer.cache.put(analyzer.llm.model, prompt, "echo")
+            assert AnalysisCache(tmp, 'fake').get(analyzer.llm.model, prompt) == "echo"
+            assert AnalysisCache(tmp, 'gemini').get(analyzer.llm.model, prompt) is None
+            assert ContractAnalyzer(api_key='').cache.root != DEFAULT_ANALYSIS_CACHE_DIR
+    finally:
+        if saved is None:
+            os.environ.pop('LLM_PROVIDER', None)
+        else:
+            os.environ['LLM_PROVIDER'] = saved
+
+
+if __name__ == "__main__":
+    test_failed_section_resumes_and_template_hits_cache()
@@ -44,5 +44,29 @@ Rajnesh"""
     for date_obj, context, line_num in dates_found:
         print(f"  Date: {date_obj.strftime('%Y-%m-%d')}, Context: '{context}', Line: {line_num}")
 
+def test_single_pass_scan_matches_line_scan():
+    """The whole-text scanner must find the same dates as per-line scanning"""
+
+    text = """Order dated 01/12/2024 and May 5, 2024 were recorded.
+Filed on 3rd March 2019; heard on 15 Sept. 2020 and 2021-02-30.
+Next date January
+15, 2024 (split across lines) and 04.11.1899 (out of range).
+www.manupatra.com 04.11.2020"""
+
+    expected = []
+    for line_num, line in enumerate(text.split('\n'), 1):
+        if any(pattern.search(line) for pattern in DateExtractor._HEADER_RES):
+            continue
+        expected.extend(d for d, _, _ in DateExtractor._extract_dates_from_line(line, line_num))
+
+    # The text is shorter than the context window, so every line shares one
+    # context and duplicates collapse to the first occurrence of each date
+    expected = list(dict.fromkeys(expected))
+    scanned = [d for d, _, _ in DateExtractor.extract_dates_from_text(text)]
+    print(f"\n=== SINGLE PASS SCAN: {len(scanned)} dates ===")
+    assert scanned == expected, (scanned, expected)
+
+
 if __name__ == "__main__":
-    test_date_patterns()
\ No newline at end of file
+    test_date_patterns()
+    test_single_pass_scan_matches_line_scan()
\ No newline at end of file
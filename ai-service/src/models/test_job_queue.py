@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test the job queue: deduplication, priorities, cancellation, lost workers and a worker run (no API calls)
+"""
+
+import time
+import tempfile
+from pathlib import Path
+
+import job_queue
+from job_queue import JOB_KINDS, JobKind, JobQueue, Worker
+from metrics import MetricsStore
+
+
+def test_dedup_priority_and_cancel():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.sqlite"), str(Path(tmp) / "spool"))
+        first, second = Path(tmp) / "a.pdf", Path(tmp) / "b.pdf"
+        first.write_bytes(b"%PDF-1.4 same content")
+        second.write_bytes(b"%PDF-1.4 same content")
+
+        # Same content under another path joins the queued job, and lifts it to the higher priority
+        batch = queue.submit('summary', {'pdf': str(first), 'quick': True})
+        joined = queue.submit('summary', {'pdf': str(second), 'quick': True}, priority=60)
+        assert joined == {'job_id': batch['job_id'], 'status': 'queued', 'deduplicated': True}
+        assert not queue.submit('summary', {'pdf': str(first)})['deduplicated']
+        chat = queue.submit('qa', {'ask': 'Davacı kim?', 'session': 's1'})
+
+        # The client's file may go away: the job runs on the queue's copy
+        first.unlink()
+        second.unlink()
+        claimed = [queue.claim('w1') for _ in range(3)]
+        assert claimed[0]['job_id'] == chat['job_id']
+        assert claimed[1]['job_id'] == batch['job_id']
+        assert Path(claimed[1]['payload']['pdf']).read_bytes() == b"%PDF-1.4 same content"
+        assert queue.claim('w1') is None
+
+        # Two submitters: the first cancel only withdraws one of them
+        assert queue.cancel(batch['job_id'])['status'] == 'running'
+        assert not queue.heartbeat(batch['job_id'], claimed[1]['lease'])
+        queue.cancel(batch['job_id'])
+        assert queue.heartbeat(batch['job_id'], claimed[1]['lease'])
+
+        queued = queue.submit('contract', {'text': 'Kira sözleşmesi'})
+        assert queue.get(queued['job_id'])['position'] == 0
+        assert queue.cancel(queued['job_id'])['status'] == 'cancelled'
+        assert queue.depth() == {'queued': 0, 'running': 3}
+
+
+def test_lost_worker_is_requeued_then_failed():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.sqlite"))
+        job = queue.submit('precedent', {'summary': 'Tapu iptali'})
+        claims = []
+        for attempt in range(job_queue.MAX_ATTEMPTS):
+            claims.append(queue.claim(f'w{attempt}'))
+            assert claims[-1]['job_id'] == job['job_id']
+            if attempt:
+                # The first worker outlived its lease: it is told to stop and cannot touch the new attempt
+                assert queue.heartbeat(job['job_id'], claims[0]['lease'])
+                queue.finish(job['job_id'], claims[0]['lease'], 'done', {'stale': True})
+                assert queue.get(job['job_id'])['status'] == 'running'
+                assert not queue.heartbeat(job['job_id'], claims[-1]['lease'])
+            conn = queue._connect()
+            conn.execute("UPDATE jobs SET heartbeat = ?", (time.time() - job_queue.LEASE_SECONDS - 1,))
+            conn.close()
+        assert queue.claim('w9') is None
+        lost = queue.get(job['job_id'])
+        assert (lost['status'], lost['error'], lost['attempts']) == ('failed', 'worker lost', job_queue.MAX_ATTEMPTS)
+
+
+def test_spooled_file_survives_a_finishing_duplicate():
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = JobQueue(str(Path(tmp) / "jobs.sqlite"), str(Path(tmp) / "spool"))
+        pdf = Path(tmp) / "a.pdf"
+        pdf.write_bytes(b"%PDF-1.4 shared content")
+        first = queue.submit('summary', {'pdf': str(pdf)})
+        running = queue.claim('w1')
+
+        # The job already using the copy finishes between the new job's spooling and its insert
+        spool = queue._spool
+
+        def spool_then_finish(path):
+            target = spool(path)
+            if queue.get(first['job_id'])['status'] == 'running':
+                queue.finish(first['job_id'], running['lease'], 'done', {})
+            return target
+        queue._spool = spool_then_finish
+        queue.submit('summary', {'pdf': str(pdf), 'quick': True})
+
+        assert Path(queue.claim('w2')['payload']['pdf']).read_bytes() == b"%PDF-1.4 shared content"
+
+
+def test_worker_runs_jobs_and_persists_results():
+    with tempfile.TemporaryDirectory() as tmp:
+        script = Path(tmp) / "echo_cli.py"
+        script.write_text("import json, sys\n"
+                          "payload = json.loads(sys.stdin.read())\n"
+                          "print('progress on stdout', flush=True)\n"
+                          "print(json.dumps({'echo': payload['text']} if payload['text'] else {'error': 'empty'}))\n")
+        JOB_KINDS['echo'] = JobKind(str(script), stdin=True)
+        try:
+            queue = JobQueue(str(Path(tmp) / "jobs.sqlite"))
+            ok = queue.submit('echo', {'text': 'merhaba'})
+            bad = queue.submit('echo', {'text': ''})
+            Worker(queue, concurrency=2, metrics_store=MetricsStore(str(Path(tmp) / "metrics.sqlite"))).run(once=True)
+        finally:
+            del JOB_KINDS['echo']
+        done = queue.wait(ok['job_id'], timeout=5)
+        assert (done['status'], done['result'], done['exit_code']) == ('done', {'echo': 'merhaba'}, 0)
+        failed = queue.get(bad['job_id'])
+        assert (failed['status'], failed['error']) == ('failed', 'empty')
+
+
+def test_worker_keeps_slow_stdin_job_alive():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Like the LLM-bound stdin CLIs: runs past several heartbeats before answering
+        script = Path(tmp) / "slow_cli.py"
+        script.write_text("import json, sys, time\n"
+                          "payload = json.loads(sys.stdin.read())\n"
+                          "time.sleep(0.8)\n"
+                          "print(json.dumps({'echo': payload['text']}))\n")
+        JOB_KINDS['slow'] = JobKind(str(script), stdin=True)
+        heartbeat, job_queue.HEARTBEAT_SECONDS = job_queue.HEARTBEAT_SECONDS, 0.2
+        try:
+            queue = JobQueue(str(Path(tmp) / "jobs.sqlite"))
+            job = queue.submit('slow', {'text': 'gerekçeli karar'})
+            Worker(queue, metrics_store=MetricsStore(str(Path(tmp) / "metrics.sqlite"))).run(once=True)
+        finally:
+            job_queue.HEARTBEAT_SECONDS = heartbeat
+            del JOB_KINDS['slow']
+        done = queue.get(job['job_id'])
+        assert (done['status'], done['result'], done['error']) == ('done', {'echo': 'gerekçeli karar'}, None)
+
+
+if __name__ == "__main__":
+    test_dedup_priority_and_cancel()
+    test_lost_worker_is_requeued_then_failed()
+    test_spooled_file_survives_a_finishing_duplicate()
+    test_worker_runs_jobs_and_persists_results()
+    test_worker_keeps_slow_stdin_job_alive()
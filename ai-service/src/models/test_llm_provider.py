@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Test the offline LLM stand-in (no API calls)
+"""
+
+import json
+
+from llm_provider import FakeProvider, FakeQuotaError, LatencyModel, get_provider
+
+
+def test_fake_provider_is_seeded_and_shapes_replies():
+    """Same seed, same latencies and 429s; replies follow what the prompt asks for"""
+    def run(seed):
+        provider = FakeProvider(latency='uniform:0,2', error_rate=0.3, seed=seed)
+        outcomes = []
+        for i in range(20):
+            try:
+                provider.respond(f"Summarize this.\n\nThe Court heard appeal {i}.")
+                outcomes.append('ok')
+            except FakeQuotaError:
+                outcomes.append('429')
+        return provider, outcomes
+
+    provider, outcomes = run(7)
+    print(f"Outcomes: {outcomes}")
+    assert outcomes == run(7)[1]
+    assert provider.calls == 20 and provider.errors == outcomes.count('429') > 0
+    assert LatencyModel('lognormal:900,0.5').kind == 'lognormal'
+
+    model = FakeProvider(seed=1).text_model('gemini-2.5-flash')
+    # Never mistaken for a real Gemini call by caches or the token ledger
+    assert model.model == model.model_name == 'fake:gemini-2.5-flash'
+    assert model.invoke("Summarize this section.\n\nThe appeal was dismissed with costs.") == \
+        "The appeal was dismissed with costs."
+    batch = json.loads(model.invoke("Summarize each event.\n\n[id: e1] Event Context: Notice issued on 3 May."))
+    assert batch[0]['id'] == 'e1'
+    assert get_provider('fake') is get_provider('FAKE')
+
+
+if __name__ == "__main__":
+    test_fake_provider_is_seeded_and_shapes_replies()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test the metrics registry, the shared store and the text endpoint (no API calls)
+"""
+
+import os
+import sys
+import signal
+import tempfile
+import subprocess
+import urllib.request
+from pathlib import Path
+
+from metrics import IN_PROGRESS_METRIC, MetricsRegistry, MetricsStore, serve
+
+# A CLI request that runs until it is stopped
+RUNNING = """
+import time
+from metrics import track_request
+with track_request('summary'):
+    print('started', flush=True)
+    time.sleep(60)
+"""
+
+
+def test_processes_merge_into_store_and_endpoint_serves_it():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MetricsStore(str(Path(tmp) / "metrics.sqlite"))
+
+        def run(seconds, rss):
+            """One CLI process: its own registry, flushed into the shared store"""
+            registry = MetricsRegistry()
+            requests = registry.counter('kanunai_requests_total', 'CLI requests', ['operation', 'status'])
+            latency = registry.histogram('kanunai_request_duration_seconds', 'Wall time', ['operation'],
+                                         buckets=(1, 10))
+            peak = registry.gauge('kanunai_process_peak_rss_bytes', 'Peak RSS', ['operation'], merge='last')
+            requests.inc(operation='summary', status='ok')
+            latency.observe(seconds, operation='summary')
+            peak.set(rss, operation='summary')
+            assert registry.flush(store)
+            return registry
+
+        run(0.5, 100)
+        registry = run(4.0, 80)
+        text = registry.render(store.read())
+        print(text)
+        assert 'kanunai_requests_total{operation="summary",status="ok"} 2' in text
+        assert 'kanunai_request_duration_seconds_bucket{le="1",operation="summary"} 1' in text
+        assert 'kanunai_request_duration_seconds_bucket{le="+Inf",operation="summary"} 2' in text
+        assert 'kanunai_request_duration_seconds_sum{operation="summary"} 4.5' in text
+        assert 'kanunai_process_peak_rss_bytes{operation="summary"} 80' in text
+        assert '# TYPE kanunai_request_duration_seconds histogram' in text
+        # Flushed values are cleared, so they are not merged twice
+        assert all(not list(metric.samples()) for metric in registry.metrics)
+
+        server = serve(port=0, store=store)
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as response:
+                assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+                body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+        assert '# TYPE kanunai_requests_total counter' in body
+        assert 'kanunai_cache_lookups_total' in body
+
+
+def test_in_progress_drops_requests_of_killed_processes():
+    """A request whose process is terminated before its finally runs stops counting as running"""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MetricsStore(str(Path(tmp) / "metrics.sqlite"))
+        env = dict(os.environ, METRICS_DB=str(store.path))
+        procs = [subprocess.Popen([sys.executable, '-c', RUNNING], cwd=str(Path(__file__).parent), env=env,
+                                  stdout=subprocess.PIPE, text=True) for _ in range(2)]
+        try:
+            for proc in procs:
+                assert proc.stdout.readline().strip() == 'started'
+            assert store.read()[IN_PROGRESS_METRIC] == [({'operation': 'summary'}, 2)]
+            procs[0].send_signal(signal.SIGTERM)
+            procs[0].wait()
+            assert store.read()[IN_PROGRESS_METRIC] == [({'operation': 'summary'}, 1)]
+        finally:
+            for proc in procs:
+                proc.kill()
+                proc.wait()
+                proc.stdout.close()
+        assert IN_PROGRESS_METRIC not in store.read()
+
+        # A request that ends normally removes its own row
+        store.mark_running('qa', os.getpid(), 1)
+        assert store.read()[IN_PROGRESS_METRIC] == [({'operation': 'qa'}, 1)]
+        store.mark_running('qa', os.getpid(), -1)
+        assert IN_PROGRESS_METRIC not in store.read()
+
+
+if __name__ == "__main__":
+    test_processes_merge_into_store_and_endpoint_serves_it()
+    test_in_progress_drops_requests_of_killed_processes()
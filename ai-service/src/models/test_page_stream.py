@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test streaming page chunking against the old page-list chunking
+"""
+
+import shutil
+import tempfile
+from pathlib import Path
+
+from langchain.docstore.document import Document
+from langchain_community.document_loaders import PyPDFLoader
+
+from boilerplate import strip_boilerplate
+from document_registry import DocumentRegistry
+from page_stream import iter_page_chunks, iter_pdf_pages, iter_pdf_pages_parallel, page_ranges
+from pdf_backends import EXTRACTION_BACKENDS
+
+TEST_PDF = Path(__file__).parent.parent / "test_pdf" / "legal_short_test.pdf"
+
+
+def legacy_chunks(documents, pages_per_chunk):
+    """chunk_document/chunk_contract as they were: slice a fully loaded page list"""
+    total_pages = len(documents)
+    chunks = []
+    for i in range((total_pages + pages_per_chunk - 1) // pages_per_chunk):
+        start_idx = i * pages_per_chunk
+        end_idx = min((i + 1) * pages_per_chunk, total_pages)
+        chunks.append(Document(
+            page_content="\n\n=== PAGE BREAK ===\n\n".join(doc.page_content for doc in documents[start_idx:end_idx]),
+            metadata={'pages': f"{start_idx + 1}-{end_idx}", 'chunk': i + 1},
+        ))
+    return chunks
+
+
+def test_streamed_chunks_match_page_list_chunks():
+    pages = [Document(page_content=f"Page {n} text", metadata={'page': n}) for n in range(7)]
+    for pages_per_chunk in (1, 2, 3, 7, 25):
+        # A generator proves chunking never needs the whole page list
+        streamed = list(iter_page_chunks((page for page in pages), pages_per_chunk))
+        print(f"{pages_per_chunk} pages/chunk: {[c.metadata['pages'] for c in streamed]}")
+        assert streamed == legacy_chunks(pages, pages_per_chunk)
+    assert list(iter_page_chunks(iter([]), 2)) == []
+
+
+
+def test_parallel_pages_match_pypdfloader():
+    """Page ranges parsed in worker processes come back in order, same text and metadata"""
+    assert page_ranges(1, 6, 8) == [(1, 2), (2, 3), (3, 4), (4, 5), (5, 6)]
+    expected = PyPDFLoader(str(TEST_PDF)).load()
+    pages = list(iter_pdf_pages_parallel(str(TEST_PDF), workers=2, backend='pypdf'))
+    print(f"{len(pages)} pages, metadata keys: {sorted(pages[-1].metadata)}")
+    assert pages == expected
+
+
+
+def test_backends_share_page_segmentation():
+    """Every installed text engine yields one page per PDF page with the same keys"""
+    expected = PyPDFLoader(str(TEST_PDF)).load()
+    for name, backend in EXTRACTION_BACKENDS.items():
+        if not backend.available():
+            print(f"{name}: not installed")
+            continue
+        pages = list(iter_pdf_pages_parallel(str(TEST_PDF), workers=2, backend=name))
+        print(f"{name}: {len(pages)} pages, first line {pages[0].page_content.splitlines()[0]!r}")
+        assert pages == list(iter_pdf_pages(str(TEST_PDF), backend=name))
+        assert [p.metadata['page'] for p in pages] == [p.metadata['page'] for p in expected]
+        assert [p.metadata['page_label'] for p in pages] == [p.metadata['page_label'] for p in expected]
+        assert all('\r' not in p.page_content for p in pages)
+
+
+def test_registry_parses_once_and_shares_pages():
+    """The first load registers the pages; a copy of the same PDF elsewhere reuses them"""
+    root = Path(tempfile.mkdtemp())
+    try:
+        registry = DocumentRegistry(str(root / "documents"))
+        expected = PyPDFLoader(str(TEST_PDF)).load()
+        assert registry.load_pages(str(TEST_PDF), backend='pypdf', clean=False) == expected
+        entries = list((root / "documents").glob("*.jsonl"))
+        assert len(entries) == 1
+        
+        upload = root / "upload_1234.pdf"
+        shutil.copy(TEST_PDF, upload)
+        mtime = entries[0].stat().st_mtime_ns
+        pages = registry.load_pages(str(upload), backend='pypdf', clean=False)
+        print(f"Registered {entries[0].name}: {len(pages)} pages")
+        assert entries[0].stat().st_mtime_ns == mtime
+        assert [p.page_content for p in pages] == [p.page_content for p in expected]
+        assert pages[0].metadata['source'] == str(upload)
+        assert registry.load_text(str(upload), backend='pypdf', clean=False) == "\n\n--- PAGE BREAK ---\n\n".join(p.page_content for p in expected)
+    finally:
+        shutil.rmtree(root)
+
+
+def test_registry_clean_pages_match_strip_boilerplate():
+    """Cleaning streams the registered raw pages twice and gives the in-memory result"""
+    pdf = Path(__file__).parent.parent / "test_pdf" / "legal_doc.pdf"
+    root = Path(tempfile.mkdtemp())
+    try:
+        registry = DocumentRegistry(str(root / "documents"))
+        expected, report = strip_boilerplate(registry.load_pages(str(pdf), backend='pypdf', clean=False))
+        assert report['lines_removed'] > 0
+        pages = registry.load_pages(str(pdf), backend='pypdf')
+        assert [p.page_content for p in pages] == [p.page_content for p in expected]
+        assert registry.boilerplate_report(str(pdf), backend='pypdf') == report
+        # Both entries registered; the next reader streams the cleaned one
+        assert len(list((root / "documents").glob("*.jsonl"))) == 2
+        assert next(registry.iter_pages(str(pdf), backend='pypdf')).page_content == expected[0].page_content
+    finally:
+        shutil.rmtree(root)
+
+
+def test_strip_boilerplate_removes_repeated_edges_only():
+    """Repeated header/footer lines go; body lines (even ones matching a header) stay"""
+    words = ["appeal", "petition", "order", "hearing", "decree", "notice", "affidavit", "reply", "stay", "review"]
+    pages = []
+    for n in range(1, 6):
+        body = [f"The {words[(n + k) % 10]} mentions the {words[(2 * n + k) % 10]} and {words[(3 * n + k) % 10]} {k}."
+                for k in range(10)]
+        if n == 3:
+            body[5] = "Page 7 of 9 www.manupatra.com"
+        pages.append(Document(
+            page_content="\n".join([f"27-09-2023 (Page {n} of 5) www.manupatra.com Library"] + body + [str(n)]),
+            metadata={'page': n - 1},
+        ))
+    cleaned, report = strip_boilerplate(pages)
+    print({k: v for k, v in report.items() if k != 'boilerplate'}, report['boilerplate'])
+    assert cleaned[0].page_content == "\n".join(pages[0].page_content.split("\n")[1:-1])
+    assert "Page 7 of 9 www.manupatra.com" in cleaned[2].page_content
+    assert [page.metadata for page in cleaned] == [page.metadata for page in pages]
+    assert report['lines_removed'] == 10
+    assert report['bytes_removed'] > 0 and report['tokens_removed'] > 0
+
+if __name__ == "__main__":
+    test_streamed_chunks_match_page_list_chunks()
+    test_parallel_pages_match_pypdfloader()
+    test_backends_share_page_segmentation()
+    test_registry_parses_once_and_shares_pages()
+    test_registry_clean_pages_match_strip_boilerplate()
+    test_strip_boilerplate_removes_repeated_edges_only()
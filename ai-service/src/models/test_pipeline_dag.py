@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Test the pipeline stage graph: overlap, dependency order and failure handling (no API calls)
+"""
+
+import time
+
+from pipeline_dag import StageGraph
+from tracing import Tracer
+import pipeline_dag
+
+
+def test_independent_stages_overlap():
+    tracer = Tracer()
+    pipeline_dag.TRACER, saved = tracer, pipeline_dag.TRACER
+    try:
+        order = []
+
+        def stage(name, seconds):
+            def run():
+                with tracer.span(name):
+                    order.append(name)
+                    time.sleep(seconds)
+                    return name
+            return run
+
+        graph = StageGraph()
+        graph.add('load', stage('load', 0.1))
+        graph.add('chunk', stage('chunk', 0.05), after=['load'])
+        graph.add('vector_store', stage('vector_store', 0.4), after=['chunk'])
+        graph.add('summarize', stage('summarize', 0.4), after=['chunk'])
+        graph.add('timeline', stage('timeline', 0.3), after=['load'], optional=True)
+        graph.add('save', stage('save', 0.05), after=['summarize'])
+        with tracer.span('pipeline'):
+            results = graph.run()
+    finally:
+        pipeline_dag.TRACER = saved
+
+    assert results == {name: name for name in graph.stages}
+    assert order[0] == 'load' and order[-1] == 'save'
+    report = graph.report()
+    print(report)
+    # Wall time follows the longest chain (load > chunk > summarize > save = 0.6 s), not the 1.3 s sum
+    assert report['sequential_s'] >= 1.25 and report['wall_s'] < 0.9
+    assert graph.critical_path() == ['load', 'chunk', 'summarize', 'save']
+    # Stage spans stay children of the caller's span, across the pool's threads
+    pipeline = next(span for span in tracer.spans if span.name == 'pipeline')
+    assert all(span.parent_id == pipeline.span_id for span in tracer.spans if span is not pipeline)
+
+
+def test_failures_skip_dependents():
+    def fail():
+        raise RuntimeError("no sentence-transformers")
+
+    ran = []
+    graph = StageGraph()
+    graph.add('chunk', lambda: ran.append('chunk'))
+    graph.add('timeline', fail, after=['chunk'], optional=True)
+    graph.add('timeline_save', lambda: ran.append('timeline_save'), after=['timeline'])
+    graph.add('summarize', lambda: time.sleep(0.2) or ran.append('summarize'), after=['chunk'])
+    graph.add('vector_store', fail, after=['chunk'])
+    graph.add('qa_setup', lambda: ran.append('qa_setup'), after=['vector_store'])
+    try:
+        graph.run()
+        raise AssertionError("required stage failure not raised")
+    except RuntimeError as e:
+        assert str(e) == "no sentence-transformers"
+    # The running summary finished; nothing that needed a failed stage started
+    assert sorted(ran) == ['chunk', 'summarize']
+    statuses = {stage['name']: stage['status'] for stage in graph.report()['stages']}
+    assert statuses == {'chunk': 'done', 'timeline': 'failed', 'timeline_save': 'skipped', 'summarize': 'done',
+                        'vector_store': 'failed', 'qa_setup': 'skipped'}
+
+    try:
+        graph.add('report', lambda: None, after=['missing'])
+        raise AssertionError("unknown dependency accepted")
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_independent_stages_overlap()
+    test_failures_skip_dependents()
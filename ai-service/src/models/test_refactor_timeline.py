@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Test batched timeline refactoring with a stand-in model (no API calls)
+"""
+
+import re
+import json
+import threading
+
+import refactor_timeline_cli as refactor
+
+
+class FakeModel:
+    """Answers batch prompts with JSON, skipping one event, and single prompts with text"""
+
+    def __init__(self, skip_id: str, fail_single: bool = False):
+        self.skip_id = skip_id
+        self.fail_single = fail_single
+        self.batch_calls = 0
+        self.single_calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, prompt, generation_config=None, safety_settings=None):
+        ids = re.findall(r'\[id: (e\d+)\]', prompt)
+        with self.lock:
+            if ids:
+                self.batch_calls += 1
+            else:
+                self.single_calls += 1
+        if not ids and self.fail_single:
+            raise RuntimeError("429 Resource has been exhausted")
+        if ids:
+            text = json.dumps([
+                {"id": event_id, "summary": f"Summary for event {event_id} with enough detail to count.\nThe court recorded the outcome of event {event_id}."}
+                for event_id in ids if event_id != self.skip_id
+            ])
+        else:
+            text = "The court heard the matter and recorded the submissions of both parties.\nThe matter was adjourned for further hearing."
+        return type('Response', (), {'text': text})()
+
+
+def test_batched_refactor_keeps_order_and_retries_missing():
+    """Batches cover most events; the one left out is refactored individually"""
+    timeline = [
+        {
+            'id': f'2020-01-{day:02d}T00:00:00_1',
+            'date': f'2020-01-{day:02d}T00:00:00',
+            'eventType': 'Hearing',
+            'eventName': 'Hearing',
+            'context': f'The matter was heard on {day:02d}.01.2020 under Section 24 of the Hindu Marriage Act.',
+        }
+        for day in range(1, 21)
+    ]
+    model = FakeModel(skip_id='e7')
+
+    improved = refactor.process_timeline_with_gemini(timeline, model, batch_size=8, max_workers=3)
+
+    print(f"Batch calls: {model.batch_calls}, single calls: {model.single_calls}")
+    assert [event['id'] for event in improved] == [event['id'] for event in timeline]
+    assert model.batch_calls == 3
+    assert model.single_calls == 1
+    assert improved[0]['summary'].startswith('Summary for event e0')
+    assert improved[7]['summary'].startswith('The court heard the matter')
+    assert improved[0]['date'] == '01.01.2020'
+
+
+def test_failed_retries_are_reported_as_fallbacks():
+    """An event whose batch and single calls both fail is cleaned manually and counted"""
+    timeline = [
+        {
+            'id': f'2020-01-{day:02d}T00:00:00_1',
+            'date': f'2020-01-{day:02d}T00:00:00',
+            'eventType': 'Hearing',
+            'eventName': 'Hearing',
+            'context': f'The matter was heard on {day:02d}.01.2020 under Section 24 of the Hindu Marriage Act.',
+        }
+        for day in range(1, 5)
+    ]
+    model = FakeModel(skip_id='e2', fail_single=True)
+    fallbacks = []
+
+    improved = refactor.process_timeline_with_gemini(timeline, model, batch_size=8, max_workers=2, fallbacks=fallbacks)
+
+    assert fallbacks == [2]
+    assert improved[2] == refactor.clean_event_manually(timeline[2])
+    assert improved[1]['summary'].startswith('Summary for event e1')
+
+
+def test_batch_manual_cleaning_matches_per_event():
+    """One substitution pass over the joined contexts splits back to each event's own result"""
+    contexts = [
+        'The Court held that the order was void. See MANU/SC/0833/2020',
+        'https://www.manupatra.com/doc?id=42 The Family Court awarded Rs. 15,000 on 01.09.2013.',
+        '',
+        None,
+        'PAGE BREAK --- PAGE BREAK --- The appellant challenged the decree.http://MANU/x',
+        'A record separator \n\x1e\n inside a context, directed the respondent to pay.',
+    ]
+    events = [
+        {'date': '2020-01-01T00:00:00', 'eventType': event_type, 'context': context}
+        for context in contexts for event_type in ('Court Judgment', 'Maintenance Order')
+    ]
+    expected = [refactor.clean_event_manually(event) for event in events]
+    assert refactor.clean_events_manually(events) == expected
+    assert refactor.clean_events_manually(events[:-2]) == expected[:-2]
+
+
+def test_parse_batch_response_tolerates_fences():
+    text = '```json\n[{"id": "e1", "summary": "A."}, {"id": "e9", "summary": "B."}, {"id": "e2"}]\n```'
+    assert refactor.parse_batch_response(text, {'e1', 'e2'}) == {'e1': 'A.'}
+    assert refactor.parse_batch_response('not json', {'e1'}) == {}
+
+
+def test_confidence_routing_keeps_specific_summaries():
+    """Boilerplate summaries go to the LLM; specific, complete ones stay local"""
+    timeline = [
+        {'summary': 'The Court took action in the legal event matter addressing key legal issues.\n'
+                    'This action was part of the ongoing legal proceedings in the case.'},
+        {'summary': 'The Family Court awarded interim maintenance of Rs. 15,000 per month to the wife.\n'
+                    'This order was passed under Section 24 of the Hindu Marriage Act.'},
+        {'summary': ''},
+    ]
+    confident, weak = refactor.route_events(timeline, threshold=0.7)
+    print(f"Scores: {[round(refactor.score_summary(e['summary']), 2) for e in timeline]}")
+    assert confident == [1]
+    assert weak == [0, 2]
+
+
+if __name__ == "__main__":
+    test_batched_refactor_keeps_order_and_retries_missing()
+    test_failed_retries_are_reported_as_fallbacks()
+    test_batch_manual_cleaning_matches_per_event()
+    test_parse_batch_response_tolerates_fences()
+    test_confidence_routing_keeps_specific_summaries()
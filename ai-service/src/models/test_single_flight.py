@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test coalescing of concurrent identical questions (no API calls)
+"""
+
+import time
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from job_queue import dedup_key
+from metrics import COALESCED
+from qa_cli import is_shareable_answer
+from single_flight import SingleFlight, flight_key, normalize_question
+
+
+def test_concurrent_identical_questions_share_one_answer():
+    assert normalize_question("  What are the KEY holdings?? ") == normalize_question("what are the key  holdings")
+    assert dedup_key('qa', {'session': 's', 'ask': 'Key holdings?'}) == dedup_key('qa', {'session': 's', 'ask': 'key holdings'})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(str(Path(tmp) / "inflight.sqlite"), poll=0.01)
+        calls = []
+        lock = threading.Lock()
+
+        def answer():
+            with lock:
+                calls.append(1)
+            time.sleep(0.3)
+            return {'answer': 'The appeal was allowed.'}
+
+        COALESCED.clear()
+        questions = ["What are the key holdings?", "what are the key holdings", "WHAT ARE THE KEY HOLDINGS ?"]
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda q: flight.do(flight_key('s1', normalize_question(q)), answer, 'qa'),
+                                    questions * 2))
+        assert len(calls) == 1
+        assert all(result == {'answer': 'The appeal was allowed.'} for result, _ in results)
+        assert sorted(shared for _, shared in results) == [False] + [True] * 5
+        samples = {labels: value for _, _, labels, value in COALESCED.samples()}
+        assert samples == {('qa', 'leader'): 1, ('qa', 'follower'): 5}
+
+        # A failing leader hands the flight to a waiting follower instead of failing everyone
+        def flaky():
+            if not calls[1:]:
+                calls.append(1)
+                time.sleep(0.1)
+                raise RuntimeError("429 quota")
+            return {'answer': 'retried'}
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, 'k2', flaky) for _ in range(2)]
+        outcomes = [f.exception() or f.result() for f in futures]
+        assert sum(isinstance(o, RuntimeError) for o in outcomes) == 1
+        assert ({'answer': 'retried'}, False) in outcomes
+
+        # Nothing in flight: a later identical question is answered afresh, not from the last answer
+        calls.clear()
+        assert flight.do(flight_key('s1', normalize_question(questions[0])), answer, 'qa') == ({'answer': 'The appeal was allowed.'}, False)
+        assert len(calls) == 1
+        conn = flight._connect()
+        assert conn.execute("SELECT COUNT(*) FROM flights").fetchone()[0] == 0
+        conn.close()
+
+        # An error answer stays with the leader; the follower asks again
+        answers = iter([{'answer': 'Error: 429 quota'}, {'answer': 'Second try.'}])
+
+        def once_failing():
+            time.sleep(0.2)
+            return next(answers)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(flight.do, 'k3', once_failing, 'qa', is_shareable_answer) for _ in range(2)]
+        assert sorted(f.result()[0]['answer'] for f in futures) == ['Error: 429 quota', 'Second try.']
+        assert not any(f.result()[1] for f in futures)
+        COALESCED.clear()
+
+
+def test_expired_leader_cannot_touch_the_replacing_flight():
+    with tempfile.TemporaryDirectory() as tmp:
+        flight = SingleFlight(str(Path(tmp) / "inflight.sqlite"), poll=0.01, timeout=0.05)
+        role, stale = flight._join('k')
+        assert role == 'lead'
+        time.sleep(0.1)
+        # The first leader is presumed dead: a new leader takes over and a follower joins it
+        role, token = flight._join('k')
+        assert role == 'lead' and token != stale
+        assert flight._join('k') == ('follow', token)
+
+        # The old leader comes back: neither its result nor its cleanup reaches the new flight
+        flight._finish('k', stale, {'answer': 'stale'})
+        flight._drop('k', stale)
+        assert flight._collect('k', token) == (True, False, None)
+        flight._finish('k', token, {'answer': 'fresh'})
+        assert flight._collect('k', token) == (True, True, {'answer': 'fresh'})
+
+
+if __name__ == "__main__":
+    test_concurrent_identical_questions_share_one_answer()
+    test_expired_leader_cannot_touch_the_replacing_flight()
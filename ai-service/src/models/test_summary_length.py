@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test local executive-summary length control (no API calls)
+"""
+
+from summary_length import fit_summary_length, split_sections, split_sentences, word_count
+from token_estimator import LEDGER
+
+CHUNK_SUMMARIES = [
+    "The wife filed an application for interim maintenance under Section 24 of the Hindu Marriage Act in 2013.\n"
+    "The parties were married in 2005 and lived together in Delhi until the separation.\n"
+    "The husband claimed that his business had suffered losses and that his income had fallen sharply.\n"
+    "The Family Court recorded that neither party had filed a complete statement of assets and liabilities.",
+    "The Court held that maintenance must be awarded from the date of the application for maintenance.\n"
+    "The Court observed that overlapping proceedings under different statutes led to conflicting orders.\n"
+    "The Court held that an affidavit of disclosure of assets must be filed by both parties in every case.\n"
+    "The Court reiterated that the purpose of maintenance is to prevent destitution of the dependent spouse.",
+    "The Court ordered the husband to pay the entire arrears of maintenance within twelve weeks.\n"
+    "The Court directed all Family Courts to follow the guidelines on disclosure of assets and liabilities.\n"
+    "The appeal was dismissed and the order of the High Court was upheld with costs.\n"
+    "The Court directed that a copy of the judgment be circulated to all High Courts for compliance.",
+]
+
+
+def test_split_sentences_keeps_legal_abbreviations():
+    sentences = split_sentences("The husband paid Rs. 15,000 under Sec. 125 Cr.P.C. in Rajnesh v. Neha. "
+                                "The Court held that A.K. Sharma was liable. Appeal dismissed.")
+    print(f"Sentences: {sentences}")
+    assert len(sentences) == 3
+    assert sentences[0].endswith("Rajnesh v. Neha.")
+
+
+def test_fit_summary_length_trims_and_tops_up():
+    """Long summaries lose closing sentences; short ones gain chunk-summary sentences"""
+    long_summary = (
+        "Case Summary: The case explains a maintenance dispute. "
+        + " ".join(f"Background sentence {i} describes the marriage, the separation and the claims made." for i in range(40))
+        + " What did the court decide: The Court held that maintenance runs from the application date. "
+        + " ".join(f"Reasoning sentence {i} explains why the statutes must be read together." for i in range(15))
+        + " What are the outcomes: The Court ordered the husband to pay the arrears."
+    )
+    fitted, stats = fit_summary_length(long_summary, [])
+    print(f"Trim: {stats}")
+    assert 500 <= word_count(fitted) <= 600
+    assert stats['sentences_trimmed'] > 0
+    assert all(body.endswith('.') for body in split_sections(fitted))
+    assert split_sections(fitted)[0].startswith("The case explains")
+
+    short_summary = (
+        "Case Summary: The case explains a maintenance dispute between two spouses in Delhi. "
+        "What did the court decide: The Court held that disclosure of income is mandatory. "
+        "What are the outcomes: The Court ordered the husband to pay arrears."
+    )
+    fitted, stats = fit_summary_length(short_summary, CHUNK_SUMMARIES, min_words=150, max_words=250)
+    print(f"Top-up: {stats}")
+    assert 150 <= word_count(fitted) <= 250
+    assert stats['sentences_added'] > 0
+    assert "The Court directed all Family Courts" in split_sections(fitted)[2]
+    # Already covered by the summary
+    assert "pay the entire arrears" not in fitted
+
+
+class FakeLLM:
+    """Returns a fixed, too-long executive summary"""
+    model = 'fake-gemini'
+
+    def predict(self, prompt, callbacks=None):
+        return ("Case Summary: The case explains a maintenance dispute. "
+                + " ".join(f"Background point {i} covers the parties, their marriage and the claims." for i in range(30))
+                + " What did the court decide: The Court held that disclosure is mandatory. "
+                + " ".join(f"Reasoning point {i} sets out how the statutes interact with each other." for i in range(25))
+                + " What are the outcomes: The Court ordered payment of arrears within twelve weeks.")
+
+
+def test_executive_summary_needs_one_llm_call():
+    """An over-long first answer is fixed locally instead of re-prompting"""
+    import case_analysis
+    summarizer = case_analysis.LegalDocSummarizer.__new__(case_analysis.LegalDocSummarizer)
+    summarizer.llm = summarizer.summary_llm = FakeLLM()
+    summarizer.rate_limiter = case_analysis.RateLimiter(requests_per_minute=1000)
+    summarizer.cache_dir = case_analysis.Path(".")
+    summarizer.length_stats = None
+
+    LEDGER.reset()
+    summary = summarizer.generate_executive_summary_from_chunks(CHUNK_SUMMARIES)
+    print(f"Length control: {summarizer.length_stats}")
+    assert LEDGER.totals()['calls'] == 1
+    assert summarizer.length_stats['retry_avoided']
+    assert 500 <= summarizer.length_stats['final_words'] <= 600
+    assert "What are the outcomes:" in summary
+
+
+if __name__ == "__main__":
+    test_split_sentences_keeps_legal_abbreviations()
+    test_fit_summary_length_trims_and_tops_up()
+    test_executive_summary_needs_one_llm_call()
@@ -3,7 +3,14 @@
 Test full timeline analysis
 """
 
-from timeline_analyzer import TimelineAnalyzer
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from document_registry import DocumentRegistry
+from pdf_backends import resolve_backend
+from timeline_analyzer import DateExtractor, TimelineAnalyzer, SUMMARY_RULES, PAGE_SEPARATOR
 
 def test_timeline_analysis():
     """Test complete timeline analysis"""
@@ -56,5 +63,114 @@ Final judgment was delivered on 04.11.2020."""
     import json
     print(json.dumps(result, indent=2, default=str))
 
+def test_parallel_extraction_matches_sequential():
+    """Page-sharded extraction must return exactly the single-process events"""
+    # No "Page N of 12" headers: contexts holding one are filler and yield no events
+    pages = []
+    for page in range(12):
+        pages.append(f"""The petition was filed on {page + 1:02d}.03.2019 before the High Court.
+The matter was heard on 25.09.2020 and the interim order dated
+{page + 1:02d}.10.2020 directed payment of maintenance.""")
+    text = "\n\n--- PAGE BREAK ---\n\n".join(pages)
+    
+    analyzer = TimelineAnalyzer()
+    sequential = analyzer.extract_timeline_events(text, workers=1)
+    parallel = analyzer.extract_timeline_events(text, workers=2)
+    
+    print(f"Sequential: {len(sequential)} events, parallel: {len(parallel)} events")
+    assert sequential
+    assert parallel == sequential
+
+def test_streamed_date_scan_matches_full_text():
+    """Scanning pages as they stream gives the whole-text scan, contexts across page breaks included"""
+    pages = [f"""The petition was filed on {page + 1:02d}.03.2019 before the High Court.
+Notice was issued to the respondent and the reply was filed.
+The matter was heard on 25.09.2020""" + ("" if page % 3 else "\nand the order dated 0" + f"{page % 9 + 1}.10.2020 followed.")
+             for page in range(10)] + ["", "Decided on 14.02.2021"]
+    text = PAGE_SEPARATOR.join(pages)
+    lines = text.split('\n')
+    expected = DateExtractor._dates_in_line_range(text, lines, DateExtractor._line_starts(lines),
+                                                 [line.strip() for line in lines], 0, len(lines))
+    streamed = list(DateExtractor.iter_dates_in_pages(pages))
+    print(f"{len(streamed)} dated contexts")
+    assert expected and streamed == expected
+
+def test_document_pages_are_read_once():
+    """Sizing the worker pool reuses the pages it counted instead of reading the document again"""
+    pdf = str(Path(__file__).parent.parent / "test_pdf" / "legal_short_test.pdf")
+    saved = DocumentRegistry._default
+    with tempfile.TemporaryDirectory() as tmp:
+        DocumentRegistry._default = registry = DocumentRegistry(tmp)
+        iter_pages = registry.iter_pages
+        reads = []
+
+        def counted(pdf_path, *args, **kwargs):
+            if kwargs.get('clean', True):
+                reads.append(pdf_path)
+            return iter_pages(pdf_path, *args, **kwargs)
+        registry.iter_pages = counted
+        try:
+            analyzer = TimelineAnalyzer()
+            expected = analyzer.extract_timeline_events(registry.load_text(pdf), workers=1)
+            for min_chars in (TimelineAnalyzer.PARALLEL_MIN_CHARS, 1):
+                # Small enough to stream in one process, then large enough for the pool
+                analyzer.PARALLEL_MIN_CHARS = min_chars
+                reads.clear()
+                assert analyzer._extract_document_events(pdf, None) == expected
+                assert len(reads) == 1
+        finally:
+            DocumentRegistry._default = saved
+    print(f"{len(expected)} events from one read of the pages")
+    assert expected
+
+def test_result_cache_key_follows_extracted_text():
+    """Text backend and header/footer cleaning change the extracted text, so they change the key"""
+    pdf = str(Path(__file__).parent.parent / "test_pdf" / "legal_short_test.pdf")
+    keys = {TimelineAnalyzer.result_cache_path('cache', pdf).name}
+    backends = {resolve_backend(), 'pypdf', resolve_backend('mupdf')}
+    saved = os.environ.get('PDF_TEXT_BACKEND')
+    try:
+        for backend in ('pypdf', 'mupdf'):
+            os.environ['PDF_TEXT_BACKEND'] = backend
+            keys.add(TimelineAnalyzer.result_cache_path('cache', pdf).name)
+        TimelineAnalyzer.CLEAN_PAGES = False
+        keys.add(TimelineAnalyzer.result_cache_path('cache', pdf).name)
+    finally:
+        TimelineAnalyzer.CLEAN_PAGES = True
+        if saved is None:
+            os.environ.pop('PDF_TEXT_BACKEND', None)
+        else:
+            os.environ['PDF_TEXT_BACKEND'] = saved
+    print(sorted(keys))
+    # One key per backend actually used, plus the uncleaned text
+    assert len(keys) == len(backends) + 1
+
+def test_summary_rule_profiling():
+    """Profiled summaries are unchanged and every rule call is counted by name"""
+    context = ("MANU/SC/0833/2020 The Family Court awarded interim maintenance of Rs. 15,000 per month "
+               "to the wife w.e.f. 01.09.2013 under Section 24 of the Hindu Marriage Act.")
+    analyzer = TimelineAnalyzer()
+    expected = analyzer._create_summary_from_context(datetime(2013, 9, 1), context, 'Maintenance Order')
+    
+    SUMMARY_RULES.enable_profiling()
+    try:
+        summary = analyzer._create_summary_from_context(datetime(2013, 9, 1), context, 'Maintenance Order')
+        report = {name: calls for name, calls, _ in SUMMARY_RULES.report()}
+    finally:
+        SUMMARY_RULES.disable_profiling()
+    
+    print(summary)
+    print(f"Rules called: {report}")
+    assert summary == expected
+    assert 'Rs. 15,000 per month to the wife' in summary
+    assert report['clean_manu_citation'] == 1
+    assert report['section'] == 1
+    assert set(report) <= set(SUMMARY_RULES.patterns)
+
 if __name__ == "__main__":
-    test_timeline_analysis()
\ No newline at end of file
+    test_timeline_analysis()
+    test_parallel_extraction_matches_sequential()
+    test_streamed_date_scan_matches_full_text()
+    test_document_pages_are_read_once()
+    test_result_cache_key_follows_extracted_text()
+    test_summary_rule_profiling()
\ No newline at end of file
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the LLM call ledger and the prompt budget helpers (no API calls)
+"""
+
+from token_estimator import TokenLedger, estimate_tokens, reduce_to_budget, split_to_budget
+
+
+def test_ledger_uses_usage_metadata_or_estimates():
+    """API-reported usage wins; plain-text responses are estimated"""
+    usage = type('Usage', (), {'prompt_token_count': 120, 'candidates_token_count': 30})()
+    api_response = type('Response', (), {'text': 'answer', 'usage_metadata': usage})()
+    ledger = TokenLedger()
+
+    ledger.track('qa_answer', 'gemini-2.5-flash', 'x' * 400, lambda: api_response)
+    ledger.track('chunk_summary', 'gemini-2.5-flash', 'x' * 400, lambda: 'y' * 80)
+    ledger.track('chunk_summary', 'gemini-2.5-flash', 'x' * 40, lambda: 'y' * 8)
+    try:
+        ledger.track('chunk_summary', 'gemini-2.5-flash', 'x' * 40, lambda: 1 / 0)
+    except ZeroDivisionError:
+        pass
+
+    totals = ledger.totals()
+    print(f"Totals: {totals}")
+    assert totals['calls'] == 4
+    assert totals['by_label']['qa_answer']['prompt_tokens'] == 120
+    assert totals['by_label']['qa_answer']['output_tokens'] == 30
+    assert totals['by_label']['chunk_summary'] == {
+        'calls': 3, 'prompt_tokens': 120, 'output_tokens': 22,
+        'latency_ms': totals['by_label']['chunk_summary']['latency_ms'],
+    }
+    assert totals['models'] == ['gemini-2.5-flash']
+
+
+def test_reduce_to_budget_condenses_until_prompt_fits():
+    """Oversized inputs are map-reduced; inputs that fit are left alone"""
+    items = [f"Section summary {i}. " * 50 for i in range(40)]
+    calls = []
+
+    def condense(group):
+        calls.append(len(group))
+        return f"Condensed {len(group)} sections."
+
+    assert reduce_to_budget(items[:2], overhead=100, condense=condense, budget=2000) == items[:2]
+    assert calls == []
+
+    groups = split_to_budget(items, budget=2000, overhead=100)
+    assert sum(len(group) for group in groups) == len(items)
+    assert all(sum(estimate_tokens(item) for item in group) <= 1900 for group in groups)
+
+    reduced = reduce_to_budget(items, overhead=100, condense=condense, budget=2000)
+    print(f"Condensed {len(items)} items into {len(reduced)} with {len(calls)} calls")
+    assert calls == [len(group) for group in groups]
+    assert sum(estimate_tokens(item) for item in reduced) + 100 <= 2000
+
+    # A single item larger than the budget is split, not sent whole
+    assert len(split_to_budget(["word " * 4000], budget=2000, overhead=100)) == 3
+
+    # A condense step that barely shrinks anything is cut down after the last pass
+    stubborn = reduce_to_budget(items, overhead=100, condense=lambda group: ' '.join(group)[:-4],
+                                budget=2000)
+    assert sum(estimate_tokens(item) for item in stubborn) + 100 <= 2000
+    assert stubborn and all(stubborn)
+
+
+if __name__ == "__main__":
+    test_ledger_uses_usage_metadata_or_estimates()
+    test_reduce_to_budget_condenses_until_prompt_fits()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test timing spans, the CLI timings summary and OTLP export (no API calls)
+"""
+
+import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from token_estimator import TokenLedger
+from tracing import Tracer
+
+
+def test_spans_nest_across_threads_and_export():
+    tracer = Tracer()
+
+    @tracer.traced('chunk_analysis')
+    def analyze(chunk):
+        tracer.annotate(chunk=chunk)
+        with tracer.span('llm.chunk_analysis', prompt_tokens=100):
+            return chunk
+
+    with tracer.span('pipeline'):
+        with tracer.span('load', pages=12):
+            pass
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            assert list(pool.map(tracer.propagate(analyze), range(1, 5))) == [1, 2, 3, 4]
+        try:
+            with tracer.span('save'):
+                raise OSError("disk full")
+        except OSError:
+            pass
+
+    names = {span.span_id: span.name for span in tracer.spans}
+    parents = {(span.name, names.get(span.parent_id)) for span in tracer.spans}
+    print(f"Parents: {sorted(parents, key=str)}")
+    assert parents == {('pipeline', None), ('load', 'pipeline'), ('save', 'pipeline'),
+                       ('chunk_analysis', 'pipeline'), ('llm.chunk_analysis', 'chunk_analysis')}
+
+    timings = tracer.timings()
+    stages = {stage['name']: stage for stage in timings['stages']}
+    assert [stage['name'] for stage in timings['stages']][:2] == ['pipeline', 'load']
+    assert stages['chunk_analysis']['calls'] == 4
+    assert stages['save']['errors'] == 1
+    assert timings['slowest'][0]['name'] == 'pipeline'
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tracer.export(str(Path(tmp) / "trace.jsonl"))
+        spans = json.loads(Path(path).read_text())['resourceSpans'][0]['scopeSpans'][0]['spans']
+    load = next(span for span in spans if span['name'] == 'load')
+    assert load['attributes'] == [{'key': 'pages', 'value': {'intValue': '12'}}]
+    assert len(load['traceId']) == 32 and len(load['spanId']) == 16
+    assert int(load['endTimeUnixNano']) >= int(load['startTimeUnixNano'])
+    assert next(span for span in spans if span['name'] == 'save')['status']['code'] == 2
+
+
+def test_ledger_calls_are_spans():
+    """Every tracked LLM call shows up as an llm.<label> span with its token counts"""
+    from tracing import TRACER
+    TRACER.reset()
+    TokenLedger().track('chunk_summary', 'gemini-2.5-flash', 'x' * 400, lambda: 'y' * 80)
+    span = TRACER.spans[-1]
+    assert span.name == 'llm.chunk_summary'
+    assert span.attributes == {'model': 'gemini-2.5-flash', 'prompt_tokens': 100, 'output_tokens': 20}
+
+
+if __name__ == "__main__":
+    test_spans_nest_across_threads_and_export()
+    test_ledger_calls_are_spans()
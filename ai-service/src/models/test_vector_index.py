@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test the background vector-store build lock and readiness marker (no embeddings)
+"""
+
+import os
+import sys
+import time
+import subprocess
+import tempfile
+from pathlib import Path
+
+import vector_index
+
+# Stands in for `qa_cli --init`: takes over the lock, "builds", marks ready
+BUILDER = """
+import sys, time
+from pathlib import Path
+import vector_index
+cache_dir = sys.argv[1]
+assert vector_index.claim_build(cache_dir)
+time.sleep(0.5)
+(Path(cache_dir) / "vectorstore").mkdir()
+vector_index.finish_build(cache_dir, True)
+"""
+
+# Runs the real `qa_cli --init` path with the embedding step replaced
+INIT = """
+import sys, time
+from pathlib import Path
+import qa_cli
+qa_cli.PROJECT_ROOT = Path(sys.argv[1])
+
+def build_vectorstore(cache_dir, api_key, pdf, text):
+    time.sleep(0.5)
+    (Path(cache_dir) / "vectorstore").mkdir()
+    return True
+qa_cli.build_vectorstore = build_vectorstore
+assert qa_cli.ensure_vectorstore(sys.argv[2], '', None, 'text')
+"""
+
+
+def test_build_lock_handoff_and_wait():
+    with tempfile.TemporaryDirectory() as tmp:
+        # Indexes cached before the marker existed are ready as they are
+        (Path(tmp) / "old" / "vectorstore").mkdir(parents=True)
+        assert vector_index.is_ready(str(Path(tmp) / "old"))
+
+        cache_dir = str(Path(tmp) / "session")
+        # The summary process takes the lock and hands it to the builder it spawns
+        assert vector_index.claim_build(cache_dir)
+        builder = subprocess.Popen([sys.executable, '-c', BUILDER, cache_dir], cwd=str(Path(__file__).parent),
+                                   env=dict(os.environ, **{vector_index.HANDOFF_ENV: str(os.getpid())}))
+        try:
+            assert vector_index.read_status(cache_dir)['state'] == 'building'
+            while vector_index._lock_owner(cache_dir) == os.getpid():
+                time.sleep(0.01)
+            # A chat request finds the build running and waits for it instead of starting its own
+            assert vector_index.wait_for_build(cache_dir, timeout=30, poll=0.05)
+        finally:
+            builder.wait()
+        assert builder.returncode == 0
+        assert vector_index.read_status(cache_dir)['state'] == 'ready'
+        assert not (Path(cache_dir) / vector_index.LOCK_FILE).exists()
+
+        # A lock left by a dead process is taken over; a failed build is not ready
+        dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                              capture_output=True, text=True).stdout.strip()
+        (Path(cache_dir) / vector_index.LOCK_FILE).write_text(dead)
+        assert vector_index.claim_build(cache_dir)
+        vector_index.finish_build(cache_dir, False, "no chunks")
+        status = vector_index.read_status(cache_dir)
+        assert (status['state'], status['error']) == ('failed', "no chunks")
+        assert not vector_index.wait_for_build(cache_dir)
+
+
+def test_init_builds_while_summary_process_runs():
+    """The spawned init builds right away instead of waiting for the summary process to exit"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = str(Path(tmp) / "cache" / "session")
+        assert vector_index.claim_build(cache_dir)
+        start = time.monotonic()
+        init = subprocess.run([sys.executable, '-c', INIT, tmp, "session"], cwd=str(Path(__file__).parent),
+                              env=dict(os.environ, **{vector_index.HANDOFF_ENV: str(os.getpid()),
+                                                      'VECTORSTORE_WAIT_SECONDS': '20'}))
+        elapsed = time.monotonic() - start
+        print(f"Init finished in {elapsed:.2f}s with the summary process alive")
+        assert init.returncode == 0
+        assert elapsed < 10
+        assert vector_index.is_ready(cache_dir)
+
+
+if __name__ == "__main__":
+    test_build_lock_handoff_and_wait()
+    test_init_builds_while_summary_process_runs()
@@ -3,32 +3,86 @@ Timeline Analyzer for Legal Documents
 Extracts dates and events from legal documents and generates deterministic timelines
 """
 
+import os
 import re
+import sys
 import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Tuple, Optional
+from bisect import bisect_right
 from collections import defaultdict
+from itertools import chain
 from pathlib import Path
 
-try:
-    from langchain_community.document_loaders import PyPDFLoader
-except ImportError:
-    # Fallback for pdf extraction
-    from pypdf import PdfReader
-    
-    class PyPDFLoader:
-        """Fallback PDF loader"""
-        def __init__(self, file_path):
-            self.file_path = file_path
-        
-        def load(self):
-            from langchain.docstore.document import Document
-            reader = PdfReader(self.file_path)
-            documents = []
-            for page in reader.pages:
-                text = page.extract_text()
-                documents.append(Document(page_content=text))
-            return documents
+from keyword_automaton import KeywordAutomaton, first_rule
+from document_registry import DocumentRegistry
+from page_stream import PAGE_SEPARATOR, join_pages
+from rule_bank import RegexRuleBank
+from tracing import TRACER, traced
+from metrics import CACHE_LOOKUPS
+
+# Result cache used by timeline_cli (and filled ahead of time by the summary pipeline)
+DEFAULT_RESULT_CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "cache" / "timeline"
+
+def _pdf_loader():
+    """PyPDFLoader, or a pypdf fallback when langchain_community is missing"""
+    try:
+        from langchain_community.document_loaders import PyPDFLoader
+    except ImportError:
+        # Fallback for pdf extraction
+        from pypdf import PdfReader
+        
+        class PyPDFLoader:
+            """Fallback PDF loader"""
+            def __init__(self, file_path):
+                self.file_path = file_path
+            
+            def load(self):
+                from langchain_core.documents import Document
+                reader = PdfReader(self.file_path)
+                documents = []
+                for page in reader.pages:
+                    text = page.extract_text()
+                    documents.append(Document(page_content=text))
+                return documents
+    return PyPDFLoader
+
+
+def __getattr__(name):
+    # PyPDFLoader (imported from here by the benchmarks) is resolved on first
+    # access: loading it costs the timeline CLI half a second of startup
+    if name == 'PyPDFLoader':
+        return _pdf_loader()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _compile_date_scanner(date_patterns: Dict[str, str]) -> Tuple[re.Pattern, List[Tuple[int, int]]]:
+    """Compile all date patterns into one scanner regex.
+
+    Each pattern sits inside its own optional lookahead so a single pass reports
+    every pattern that matches at a position (US and EU slash dates overlap).
+    Whitespace is restricted to the current line, matching line-based scanning.
+    Returns the compiled scanner and (outer_group, inner_group_count) per pattern.
+    """
+    parts = []
+    layout = []
+    group_idx = 0
+    for pattern in date_patterns.values():
+        line_safe = pattern.replace(r'\s', r'[^\S\n]')
+        group_idx += 1
+        layout.append((group_idx, re.compile(line_safe).groups))
+        parts.append(f'(?:(?=({line_safe}))|)')
+        group_idx += layout[-1][1]
+    # Fail unless at least one of the patterns matched at this position
+    guard = '(?!)'
+    for outer, _ in reversed(layout):
+        guard = f'(?({outer})|{guard})'
+    # Every date starts at a word boundary with a digit or a month name
+    scanner = r'\b(?=[\dJFMASOND])' + ''.join(parts) + guard
+    return re.compile(scanner, re.IGNORECASE), layout
 
 
 class DateExtractor:
@@ -55,7 +109,32 @@ class DateExtractor:
         # Written format with ordinal: 15th October 2024, 1st January 2024, 2nd March 2024, 3rd April 2024
         'written_ordinal': r'\b(\d{1,2})(?:st|nd|rd|th)\s+(January|February|March|April|May|June|July|August|September|October|November|December|Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Sept|Oct|Nov|Dec)[.]*\s+(\d{4})\b',
     }
-    
+
+    NUMERIC_FORMATS = ('iso', 'us_slash', 'us_dash', 'eu_slash', 'eu_dash', 'indian_dot')
+    WRITTEN_FORMATS = ('written_long', 'written_short', 'written_eu', 'written_ordinal')
+
+    # Header, footer and citation lines never carry timeline events
+    HEADER_PATTERNS = [
+        r'www\.manupatra\.com',
+        r'Page \d+ of \d+',
+        r'\(\s*Page \d+ of \d+\s*\)',
+        r'Library \w+',
+        r'©.*All rights reserved',
+        r'https?://',
+        r'\[.*\d+.*\].*\d{4}', # References and citations
+        r'\d{4}\s+\(\d+\)\s+\w+', # Case citation formats
+        r'Manu/.*\d{4}', # Manupatra citation formats
+    ]
+
+    # Compiled once at import time instead of per line
+    _COMPILED_DATE_PATTERNS = {key: re.compile(pattern, re.IGNORECASE) for key, pattern in DATE_PATTERNS.items()}
+    # Searched one by one so each keeps re's literal-prefix scan. Header patterns
+    # are only tested for a match, so they carry no leading/trailing `.*`
+    # (which made every search quadratic in the line length)
+    _HEADER_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in HEADER_PATTERNS)
+    _DATE_SCANNER, _SCANNER_LAYOUT = _compile_date_scanner(DATE_PATTERNS)
+    _PATTERN_TYPES = tuple(DATE_PATTERNS)
+
     MONTH_MAP = {
         'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
         'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
@@ -147,56 +226,79 @@ class DateExtractor:
         except (ValueError, TypeError):
             return None
     
+    @classmethod
+    def _date_from_groups(cls, groups: Tuple[str, ...], pattern_type: str) -> Optional[datetime]:
+        """Build a datetime straight from the capture groups of a date pattern"""
+        if pattern_type in cls.NUMERIC_FORMATS:
+            return cls._parse_numeric_date(groups, pattern_type)
+        if pattern_type in cls.WRITTEN_FORMATS:
+            return cls._parse_written_date(groups, pattern_type)
+        return None
+
     @classmethod
     def normalize_date_string(cls, date_str: str, pattern_type: str) -> Optional[datetime]:
         """Convert extracted date string to datetime object"""
         try:
-            match = re.search(cls.DATE_PATTERNS[pattern_type], date_str, re.IGNORECASE)
+            match = cls._COMPILED_DATE_PATTERNS[pattern_type].search(date_str)
             if not match:
                 return None
-            
-            groups = match.groups()
-            
-            # Numeric formats
-            if pattern_type in ('iso', 'us_slash', 'us_dash', 'eu_slash', 'eu_dash', 'indian_dot'):
-                return cls._parse_numeric_date(groups, pattern_type)
-            
-            # Written formats
-            if pattern_type in ('written_long', 'written_short', 'written_eu', 'written_ordinal'):
-                return cls._parse_written_date(groups, pattern_type)
-            
-            return None
+            return cls._date_from_groups(match.groups(), pattern_type)
         except Exception:
             return None
-    
+
     @classmethod
     def _extract_dates_from_line(cls, line: str, line_num: int) -> List[Tuple[datetime, str, int]]:
         """Extract all dates from a single line"""
         line_dates = []
-        for pattern_type, pattern in cls.DATE_PATTERNS.items():
-            matches = re.finditer(pattern, line, re.IGNORECASE)
-            for match in matches:
-                date_obj = cls.normalize_date_string(match.group(0), pattern_type)
+        for pattern_type, pattern in cls._COMPILED_DATE_PATTERNS.items():
+            for match in pattern.finditer(line):
+                date_obj = cls._date_from_groups(match.groups(), pattern_type)
                 if date_obj and 1900 <= date_obj.year <= 2100:
                     line_dates.append((date_obj, line.strip(), line_num))
         return line_dates
+
+    @classmethod
+    def _scan_dates(cls, text: str) -> List[Tuple[int, int, int, datetime]]:
+        """Find every date in the text in a single scanner pass.
+
+        Returns (start, pattern_index, end, date) hits in text order. Per pattern,
+        hits never overlap, which reproduces running re.finditer for each pattern.
+        """
+        hits = []
+        last_end = [0] * len(cls._SCANNER_LAYOUT)
+        for match in cls._DATE_SCANNER.finditer(text):
+            for pattern_idx, (outer, inner_count) in enumerate(cls._SCANNER_LAYOUT):
+                start, end = match.span(outer)
+                if start < 0 or start < last_end[pattern_idx]:
+                    continue
+                last_end[pattern_idx] = end
+                groups = match.groups()[outer:outer + inner_count]
+                pattern_type = cls._PATTERN_TYPES[pattern_idx]
+                try:
+                    date_obj = cls._date_from_groups(groups, pattern_type)
+                except Exception:
+                    date_obj = None
+                if date_obj and 1900 <= date_obj.year <= 2100:
+                    hits.append((start, pattern_idx, end, date_obj))
+        return hits
     
     @classmethod
-    def _expand_context(cls, lines: List[str], target_line_num: int, window: int = 4) -> str:
+    def _expand_context(cls, lines: List[str], target_line_num: int, window: int = 4,
+                        stripped: Optional[List[str]] = None) -> str:
         """Expand context around a date by including surrounding lines
-        Increased window from 2 to 4 to capture more complete sentences and prevent truncation"""
+        Increased window from 2 to 4 to capture more complete sentences and prevent truncation
+        Pass `stripped` (lines already stripped) to avoid re-stripping shared window lines"""
+        if stripped is None:
+            stripped = [line.strip() for line in lines]
         start_idx = max(0, target_line_num - 1 - window)
         end_idx = min(len(lines), target_line_num + window)
-        context_lines = lines[start_idx:end_idx]
         # Join lines but preserve sentence boundaries - try to end at sentence boundaries if possible
-        context = ' '.join(line.strip() for line in context_lines if line.strip())
+        context = ' '.join(line for line in stripped[start_idx:end_idx] if line)
         # If context ends mid-sentence, try to extend to next sentence boundary
         # But limit total length to avoid excessive context
         if len(context) > 0 and not context.rstrip().endswith(('.', '!', '?', ';')) and end_idx < len(lines):
             # Try to include next line if it helps complete the sentence
-            next_lines = lines[end_idx:end_idx+2]
-            for next_line in next_lines:
-                next_line = next_line.strip()
+            for next_line in stripped[end_idx:end_idx+2]:
                 if not next_line:
                     continue
                 # Check if adding this line would help complete a sentence
@@ -207,44 +309,121 @@ class DateExtractor:
                         break
         return context
     
+    @staticmethod
+    def _line_starts(lines: List[str]) -> List[int]:
+        """Offset of each line start in the text the lines were split from"""
+        line_starts = []
+        offset = 0
+        for line in lines:
+            line_starts.append(offset)
+            offset += len(line) + 1
+        return line_starts
+
     @classmethod
-    def extract_dates_from_text(cls, text: str) -> List[Tuple[datetime, str, int]]:
-        """Extract all dates from text with line numbers and expanded context"""
-        dates_found: List[Tuple[datetime, str, int]] = []
-        lines = text.split('\n')
-        seen_dates = set()  # Track unique date + context combinations
-
-        HEADER_PATTERNS = [
-            r'www\.manupatra\.com',
-            r'Page \d+ of \d+',
-            r'\(\s*Page \d+ of \d+\s*\)',
-            r'Library \w+',
-            r'©.*All rights reserved',
-            r'https?://.*',
-            r'\[.*\d+.*\].*\d{4}', # References and citations
-            r'\d{4}\s+\(\d+\)\s+\w+', # Case citation formats 
-            r'.*Manu/.*\d{4}', # Manupatra citation formats
-        ]
+    def _dates_in_line_range(cls, text: str, lines: List[str], line_starts: List[int],
+                             stripped: List[str], first_line: int, end_line: int) -> List[Tuple[datetime, str, int]]:
+        """Dated contexts for lines [first_line, end_line) in (line, pattern, position) order.
 
-        for line_num, line in enumerate(lines, 1):
-            # Skip very long lines or header-like lines early
-            if len(line) > 1000 or any(re.search(pattern, line, re.IGNORECASE) for pattern in HEADER_PATTERNS):
-                continue
+        Date patterns never cross a line, so any line range can be scanned on its own;
+        context windows still read neighbouring lines outside the range. Duplicates are
+        kept - callers dedup once over the concatenated ranges.
+        """
+        offset = line_starts[first_line]
+        range_end = line_starts[end_line] - 1 if end_line < len(lines) else len(text)
 
-            # Get dates from line
-            line_dates = cls._extract_dates_from_line(line, line_num)
+        # Scan the range once, then keep hits on usable lines in the
+        # original (line, pattern, position) order
+        skip_line: Dict[int, bool] = {}
+        line_hits = []
+        for start, pattern_idx, _, date_obj in cls._scan_dates(text[offset:range_end]):
+            start += offset
+            line_idx = bisect_right(line_starts, start) - 1
+            if line_idx not in skip_line:
+                line = lines[line_idx]
+                # Skip very long lines or header-like lines early
+                skip_line[line_idx] = len(line) > 1000 or any(pattern.search(line) for pattern in cls._HEADER_RES)
+            if not skip_line[line_idx]:
+                line_hits.append((line_idx, pattern_idx, start, date_obj))
+        line_hits.sort(key=lambda hit: hit[:3])
 
-            # Expand context and filter duplicates
-            for date_obj, context, num in line_dates:
+        # The context depends only on the line, so it is built once per line
+        line_contexts: Dict[int, str] = {}
+        dated = []
+        for line_idx, _, _, date_obj in line_hits:
+            if line_idx not in line_contexts:
                 # Use expanded context for better classification - increased window to capture complete sentences
-                expanded_context = cls._expand_context(lines, num, window=4)
-                date_ctx_key = (date_obj.isoformat(), expanded_context)
-                if date_ctx_key not in seen_dates:
-                    seen_dates.add(date_ctx_key)
-                    dates_found.append((date_obj, expanded_context, num))
+                line_contexts[line_idx] = cls._expand_context(lines, line_idx + 1, window=4, stripped=stripped)
+            dated.append((date_obj, line_contexts[line_idx], line_idx + 1))
+        return dated
+
+    @staticmethod
+    def _dedup_dates(dated: Iterable[Tuple[datetime, str, int]]) -> List[Tuple[datetime, str, int]]:
+        """Keep the first of each (date, context) pair, keyed by a small id per distinct context"""
+        dates_found: List[Tuple[datetime, str, int]] = []
+        seen_dates = set()
+        context_ids: Dict[str, int] = {}
+        for date_obj, context, num in dated:
+            date_ctx_key = (date_obj.isoformat(), context_ids.setdefault(context, len(context_ids)))
+            if date_ctx_key not in seen_dates:
+                seen_dates.add(date_ctx_key)
+                dates_found.append((date_obj, context, num))
+        return dates_found
+
+    # Lines _expand_context reads around a date's line (window=4, plus two lines to finish a sentence)
+    CONTEXT_LINES_BEFORE = 4
+    CONTEXT_LINES_AFTER = 6
+
+    @classmethod
+    def iter_dates_in_pages(cls, pages: Iterable[str], separator: str = PAGE_SEPARATOR
+                            ) -> Iterator[Tuple[datetime, str, int]]:
+        """Dated contexts of separator.join(pages), as _dates_in_line_range gives for the
+        whole text, holding only a page's lines plus the context margins around them"""
+        lines: List[str] = []  # complete lines; lines[0] is line number `base` of the whole text
+        base = 0
+        scanned = 0  # next line (whole-text index) to scan
+        partial = ''  # text after the last newline: continues with the next page
+        for page_num, page in enumerate(pages):
+            partial += (separator if page_num else '') + page
+            *complete, partial = partial.split('\n')
+            lines.extend(complete)
+            # Lines far enough from the end have all the context they will ever get
+            end = base + len(lines) - cls.CONTEXT_LINES_AFTER
+            if end > scanned:
+                yield from cls._dates_in_window(lines, base, scanned, end)
+                scanned = end
+                keep_from = max(base, scanned - cls.CONTEXT_LINES_BEFORE)
+                del lines[:keep_from - base]
+                base = keep_from
+        lines.append(partial)
+        yield from cls._dates_in_window(lines, base, scanned, base + len(lines))
+
+    @classmethod
+    def _dates_in_window(cls, lines: List[str], base: int, first_line: int, end_line: int
+                         ) -> List[Tuple[datetime, str, int]]:
+        """_dates_in_line_range over a window of lines starting at whole-text line `base`"""
+        if end_line <= first_line:
+            return []
+        dated = cls._dates_in_line_range('\n'.join(lines), lines, cls._line_starts(lines),
+                                         [line.strip() for line in lines], first_line - base, end_line - base)
+        return [(date_obj, context, line_num + base) for date_obj, context, line_num in dated]
+
+    @classmethod
+    def extract_dates_from_text(cls, text: str, dated: Optional[Iterable[Tuple[datetime, str, int]]] = None
+                                ) -> List[Tuple[datetime, str, int]]:
+        """Extract all dates from text with line numbers and expanded context
+
+        `dated` takes dated contexts already collected by range (see
+        TimelineAnalyzer.extract_timeline_events) in place of scanning here.
+        """
+        if dated is None:
+            lines = text.split('\n')
+            stripped = [line.strip() for line in lines]
+            dated = cls._dates_in_line_range(text, lines, cls._line_starts(lines), stripped, 0, len(lines))
+        dates_found = cls._dedup_dates(dated)
 
         # If nothing found with strict, line-based scanning, use a looser pass
         if not dates_found:
+            seen_dates = set()
             loose = cls._find_dates_loose(text)
             # avoid duplicates
             for date_obj, context in loose:
@@ -384,28 +563,53 @@ class DateExtractor:
     }
     
     FILLER_WORDS = {'page', 'of', 'www', 'com', 'library'}
-    
+
+    # More comprehensive filler word detection
+    FILLER_PATTERNS = [
+        r'page \d+',
+        r'copyright',
+        r'all rights reserved',
+        r'library',
+        r'www\.',
+        r'http',
+        r'citation',
+        r'reference',
+        r'annexure',
+        r'appendix'
+    ]
+
+    # Substrings that mark a context as header/citation material
+    HEADER_INDICATORS = [
+        'page', 'of', 'www', '.com', 'manu', 'citation',
+        'reference', '©', 'copyright', 'library', 'annexure',
+        'appendix', 'exhibit', 'section', 'para'
+    ]
+
+    # More comprehensive header detection
+    HEADER_CONTEXT_PATTERNS = FILLER_PATTERNS + [
+        r'\d+\s*of\s*\d+',  # Page numbers
+        r'exhibit\s+[a-z\d]',
+        r'section\s+\d+',
+        r'para\s+\d+'
+    ]
+
+    # Kept as separate patterns: each one keeps its literal-prefix fast scan,
+    # which a single alternation would lose
+    _FILLER_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in FILLER_PATTERNS)
+    _HEADER_CONTEXT_RES = tuple(re.compile(pattern, re.IGNORECASE) for pattern in HEADER_CONTEXT_PATTERNS)
+
+    # One automaton scores every event type and spots header indicators in a single scan
+    _EVENT_AUTOMATON = KeywordAutomaton.from_groups(EVENT_KEYWORDS, extra_keywords=HEADER_INDICATORS)
+
     @classmethod 
-    def _is_filler_context(cls, words: set[str]) -> bool:
+    def _is_filler_context(cls, context: str) -> bool:
         """Check if context only contains filler words"""
-        # More comprehensive filler word detection
-        filler_patterns = [
-            r'page \d+',
-            r'copyright',
-            r'all rights reserved',
-            r'library',
-            r'www\.',
-            r'http',
-            r'citation',
-            r'reference',
-            r'annexure',
-            r'appendix'
-        ]
-        text = ' '.join(words)
-        return any(re.search(pattern, text, re.IGNORECASE) for pattern in filler_patterns)
+        # Words in their original order: joining a word set made matches depend on the hash seed
+        text = ' '.join(context.split())
+        return any(pattern.search(text) for pattern in cls._FILLER_RES)
     
     @classmethod
-    def _validate_event_type(cls, event_type: str, context: str) -> bool:
+    def _validate_event_type(cls, event_type: str, context: str, found_keywords: Optional[set] = None) -> bool:
         """Validate event type with additional context if needed"""
         # Skip validation for 'other' type
         if event_type == 'other':
@@ -416,32 +620,10 @@ class DateExtractor:
             return True
         
         # First check if it's not a header
-        header_indicators = [
-            'page', 'of', 'www', '.com', 'manu', 'citation',
-            'reference', '©', 'copyright', 'library', 'annexure',
-            'appendix', 'exhibit', 'section', 'para'
-        ]
-        
-        # More comprehensive header detection
-        header_patterns = [
-            r'page \d+',
-            r'copyright',
-            r'all rights reserved',
-            r'library',
-            r'www\.',
-            r'http',
-            r'citation',
-            r'reference',
-            r'annexure',
-            r'appendix',
-            r'\d+\s*of\s*\d+',  # Page numbers
-            r'exhibit\s+[a-z\d]',
-            r'section\s+\d+',
-            r'para\s+\d+'
-        ]
-        
-        is_header = any(w in context.lower() for w in header_indicators) or \
-                   any(re.search(pattern, context, re.IGNORECASE) for pattern in header_patterns)
+        if found_keywords is None:
+            found_keywords = cls._EVENT_AUTOMATON.find_all(context.lower())
+        is_header = not found_keywords.isdisjoint(cls.HEADER_INDICATORS) or \
+                   any(pattern.search(context) for pattern in cls._HEADER_CONTEXT_RES)
                    
         if is_header:
             return False
@@ -454,31 +636,71 @@ class DateExtractor:
     def classify_event_type(cls, context_line: str) -> str:
         """Classify event type based on surrounding context"""
         context_lower = context_line.lower()
-        words = set(context_lower.split())
         
-        if cls._is_filler_context(words):
+        if cls._is_filler_context(context_lower):
             return 'other'
         
-        # Check for event type indicators - prioritize more specific matches
-        scores = {}
-        for event_type, keywords in cls.EVENT_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in context_lower:
-                    # Longer keywords get higher scores
-                    score += len(keyword.split())
-            if score > 0:
-                scores[event_type] = score
+        # Score all event types in one pass - longer keywords get higher scores
+        found_keywords = cls._EVENT_AUTOMATON.find_all(context_lower)
+        scores = cls._EVENT_AUTOMATON.score(found=found_keywords)
         
         # Return the event type with highest score
         if scores:
             best_type = max(scores.items(), key=lambda x: x[1])[0]
-            if cls._validate_event_type(best_type, context_lower):
+            if cls._validate_event_type(best_type, context_lower, found_keywords):
                 return best_type
         
         return 'other'
 
 
+# Every regex used by TimelineAnalyzer._create_summary_from_context, compiled once.
+# Call SUMMARY_RULES.enable_profiling() to time each rule (see benchmark_summary_rules.py).
+SUMMARY_RULES = RegexRuleBank({
+    # Context cleaning, applied in SUMMARY_CLEANING_STEPS order
+    'clean_manu_citation': (r'MANU/[^\s]+', 0),
+    'clean_url': (r'https?://\S+', 0),
+    'clean_decided_by': (r'\d+\s+Decided by.*?High Court', re.IGNORECASE),
+    'clean_case_citation': (r'\d+\s+[A-Z]\.\s+\w+.*?v\.\s+.*?\d{4}', 0),
+    'clean_appeal_citation': (r'(?:Criminal|Civil)\s+Appeal\s+No\.?\s*\d+.*?of \d{4}', 0),
+    'clean_court_heading': (r'IN THE.*?COURT.*?\d{4}', re.IGNORECASE | re.DOTALL),
+    'clean_decided_on': (r'Decided On:.*?\d{2}\.\d{2}\.\d{4}', 0),
+    'clean_decided_vide': (r'decided vide.*?\d{4}', re.IGNORECASE),
+    'clean_date': (r'\d{1,2}\.\d{1,2}\.\d{4}', 0),
+    # Amounts
+    'amount_rupees': (r'Rs\.\s*([0-9,]+(?:\.[0-9]+)?)', re.IGNORECASE),
+    'amount_dollars': (r'\$\s*([0-9,]+(?:\.[0-9]+)?)', re.IGNORECASE),
+    'amount_words': (r'([0-9,]+(?:\.[0-9]+)?)\s*(?:rupees|dollars)', re.IGNORECASE),
+    # Parties near an amount
+    'party_number': (r'(?:petitioner|respondent|appellant|defendant|plaintiff|applicant)\s+no\.?\s*(\d+)', re.IGNORECASE),
+    'role_wife': (r'\bwife\b', re.IGNORECASE),
+    'role_husband': (r'\bhusband\b', re.IGNORECASE),
+    'role_child': (r'\b(?:son|daughter|child|minor)\b', re.IGNORECASE),
+    'role_petitioner': (r'\bpetitioner\b', re.IGNORECASE),
+    'role_respondent': (r'\brespondent\b', re.IGNORECASE),
+    'role_appellant': (r'\bappellant\b', re.IGNORECASE),
+    'role_defendant': (r'\bdefendant\b', re.IGNORECASE),
+    'role_plaintiff': (r'\bplaintiff\b', re.IGNORECASE),
+    'recipient_petitioner_no': (r'petitioner.*?(?:no\.?\s*)?(\d+)', re.IGNORECASE),
+    'recipient_respondent_no': (r'respondent.*?(?:no\.?\s*)?(\d+)', re.IGNORECASE),
+    'recipient_appellant': (r'appellant', re.IGNORECASE),
+    'recipient_defendant': (r'defendant', re.IGNORECASE),
+    'recipient_plaintiff': (r'plaintiff', re.IGNORECASE),
+    # Statutes
+    'section': (r'Section\s+(\d+(?:[A-Za-z])?)', re.IGNORECASE),
+    'act_named': (r'(\w+(?:\s+\w+)?(?:\s+Marriage)?\s+Act)', re.IGNORECASE),
+    'act_procedure_code': (r'(Code\s+of\s+(?:Criminal|Civil)\s+Procedure)', re.IGNORECASE),
+    'act_code': (r'(\w+\s+Code)', re.IGNORECASE),
+    'act_plain': (r'(\w+\s+Act)', re.IGNORECASE),
+    # Details quoted in the summary
+    'appeal_number': (r'(?:Criminal|Civil)\s+Appeal\s+(?:No\.?\s*)?(\d+(?:\/\d+)?)', re.IGNORECASE),
+    'article': (r'Article\s+(\d+)', re.IGNORECASE),
+    'case_name': (r'([A-Z][a-z]+\s+(?:v\.?|vs\.?)\s+[A-Z][^.]{10,40})', 0),
+    'effective_period': (r'(?:from|since|w\.e\.f\.|with effect from)\s+(\d{1,2}\.\d{1,2}\.\d{4})', re.IGNORECASE),
+    'challenged_subject': (r'challeng(?:ed|ing)\s+(?:the\s+)?([^.]+?)(?:\.|$)', 0),
+    'held_that': (r'held\s+that\s+([^.]+?)(?:\.|$)', 0),
+})
+
+
 class TimelineAnalyzer:
     """Generate deterministic timelines from extracted dates"""
     
@@ -489,148 +711,118 @@ class TimelineAnalyzer:
     # Use DateExtractor's EVENT_KEYWORDS for consistency
     EVENT_KEYWORDS = DateExtractor.EVENT_KEYWORDS
     
-    def load_document(self, pdf_path: str) -> str:
-        """Load PDF document text with caching"""
-        cache_path = Path(pdf_path).with_suffix('.cache.json')
-        
-        if cache_path.exists():
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get('document_text', '')
-        
+    # Rule names (in SUMMARY_RULES) used by _create_summary_from_context, in evaluation order
+    SUMMARY_CLEANING_STEPS = (
+        'clean_manu_citation', 'clean_url', 'clean_decided_by', 'clean_case_citation', 'clean_appeal_citation',
+        'clean_court_heading', 'clean_decided_on', 'clean_decided_vide', 'clean_date',
+    )
+    SUMMARY_AMOUNT_RULES = ('amount_rupees', 'amount_dollars', 'amount_words')
+    SUMMARY_ROLE_RULES = [
+        ('role_wife', 'the wife'),
+        ('role_husband', 'the husband'),
+        ('role_child', 'the child'),
+        ('role_petitioner', 'the petitioner'),
+        ('role_respondent', 'the respondent'),
+        ('role_appellant', 'the appellant'),
+        ('role_defendant', 'the defendant'),
+        ('role_plaintiff', 'the plaintiff'),
+    ]
+    # Labels may be callables taking the match (numbered parties)
+    SUMMARY_RECIPIENT_RULES = [
+        ('role_wife', 'the wife'),
+        ('role_husband', 'the husband'),
+        ('role_child', 'the child'),
+        ('recipient_petitioner_no', lambda m: f'the petitioner {m.group(1)}'),
+        ('recipient_respondent_no', lambda m: f'the respondent {m.group(1)}'),
+        ('recipient_appellant', 'the appellant'),
+        ('recipient_defendant', 'the defendant'),
+        ('recipient_plaintiff', 'the plaintiff'),
+    ]
+    SUMMARY_ACT_RULES = ('act_named', 'act_procedure_code', 'act_code', 'act_plain')
+    # Plain phrases, matched as substrings of the lowercased context
+    SUMMARY_COURT_RULES = [
+        (('supreme court',), 'the Supreme Court'),
+        (('high court',), 'the High Court'),
+        (('district court',), 'the District Court'),
+        (('family court',), 'the Family Court'),
+        (('sessions court',), 'the Sessions Court'),
+        (('magistrate',), 'the Magistrate'),
+        (('tribunal',), 'the Tribunal'),
+        (('this court',), 'the Court'),
+        (('court',), 'the Court'),
+    ]
+    
+    @traced('load')
+    def load_document(self, pdf_path: str, workers: Optional[int] = None) -> str:
+        """Load PDF document text (workers: PDF parsing processes, None: by page count).
+        Pages come from the shared DocumentRegistry, so a PDF already parsed by another flow is not parsed again."""
         try:
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
-            text = "\n\n--- PAGE BREAK ---\n\n".join(
-                [doc.page_content for doc in documents]
-            )
-            
-            # Cache the text
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                json.dump({'document_text': text}, f)
-            
-            return text
+            return DocumentRegistry.default().load_text(pdf_path, workers, clean=self.CLEAN_PAGES)
         except Exception as e:
             raise ValueError(f"Failed to load PDF: {str(e)}")
     
-    def _classify_event(self, context_line: str) -> str:
-        """Classify an event based on its context with improved specificity"""
-        context_lower = context_line.lower()
-        
-        # Enhanced classification with more specific event names
+    # Event naming rules, checked in order: (trigger keywords, [(keywords, name)], fallback name).
+    # The first rule with a trigger hit decides, using its first matching refinement or
+    # its fallback; a rule with no fallback lets later rules decide.
+    EVENT_NAME_RULES = [
         # Check for judgment/order keywords first (higher priority)
-        if any(kw in context_lower for kw in ['supreme court', 'sc']):
-            if any(kw in context_lower for kw in ['judgment', 'decided', 'order', 'affirmed']):
-                return 'Supreme Court Judgment'
-            return 'Supreme Court Order'
-        
-        if any(kw in context_lower for kw in ['high court', 'hc']):
-            if any(kw in context_lower for kw in ['judgment', 'decided', 'order', 'affirmed', 'dismissed']):
-                return 'High Court Judgment'
-            return 'High Court Order'
-        
-        if 'family court' in context_lower:
-            if any(kw in context_lower for kw in ['order', 'awarded', 'directed', 'maintenance']):
-                return 'Family Court Order'
-        
+        (('supreme court', 'sc'), [(('judgment', 'decided', 'order', 'affirmed'), 'Supreme Court Judgment')], 'Supreme Court Order'),
+        (('high court', 'hc'), [(('judgment', 'decided', 'order', 'affirmed', 'dismissed'), 'High Court Judgment')], 'High Court Order'),
+        (('family court',), [(('order', 'awarded', 'directed', 'maintenance'), 'Family Court Order')], None),
         # Maintenance-related events
-        if 'maintenance' in context_lower:
-            if 'interim' in context_lower:
-                return 'Interim Maintenance Order'
-            return 'Maintenance Order'
-        
+        (('maintenance',), [(('interim',), 'Interim Maintenance Order')], 'Maintenance Order'),
         # Amendment/Legislative events
-        if any(kw in context_lower for kw in ['amendment', 'amended', 'inserted', 'w.e.f', 'with effect']):
-            if 'section' in context_lower:
-                return 'Legislative Amendment'
-            return 'Statutory Amendment'
-        
+        (('amendment', 'amended', 'inserted', 'w.e.f', 'with effect'), [(('section',), 'Legislative Amendment')], 'Statutory Amendment'),
         # Appeal events
-        if any(kw in context_lower for kw in ['appeal', 'appealed', 'appellate']):
-            if 'criminal appeal' in context_lower:
-                return 'Criminal Appeal'
-            if 'civil appeal' in context_lower:
-                return 'Civil Appeal'
-            return 'Appeal Filing'
-        
+        (('appeal', 'appealed', 'appellate'), [(('criminal appeal',), 'Criminal Appeal'), (('civil appeal',), 'Civil Appeal')], 'Appeal Filing'),
         # Writ/Revision events
-        if any(kw in context_lower for kw in ['writ petition', 'special leave petition', 'slp']):
-            return 'Writ Petition'
-        if any(kw in context_lower for kw in ['revision', 'crl. rev']):
-            return 'Revision Petition'
-        
+        (('writ petition', 'special leave petition', 'slp'), [], 'Writ Petition'),
+        (('revision', 'crl. rev'), [], 'Revision Petition'),
         # Judgment/Order events
-        if any(kw in context_lower for kw in ['judgment', 'decided', 'pronounced']):
-            return 'Court Judgment'
-        
-        if any(kw in context_lower for kw in ['order dated', 'ordered', 'directed', 'awarded']):
-            return 'Court Order'
-        
+        (('judgment', 'decided', 'pronounced'), [], 'Court Judgment'),
+        (('order dated', 'ordered', 'directed', 'awarded'), [], 'Court Order'),
         # Filing events
-        if any(kw in context_lower for kw in ['filed', 'application filed', 'petition filed']):
-            return 'Filing'
-        
+        (('filed', 'application filed', 'petition filed'), [], 'Filing'),
         # Compliance/Arrears
-        if any(kw in context_lower for kw in ['arrears', 'payment', 'compliance', 'affidavit']):
-            if 'arrears' in context_lower or 'payment' in context_lower:
-                return 'Payment/Arrears'
-            return 'Compliance Filing'
-        
-        # Hearing events
-        if any(kw in context_lower for kw in ['hearing', 'heard', 'trial']):
-            return 'Hearing'
-        
-        # Settlement
-        if any(kw in context_lower for kw in ['settlement', 'settled', 'mediation']):
-            return 'Settlement'
-        
-        # Dismissal
-        if any(kw in context_lower for kw in ['dismissed', 'withdrawn', 'quashed']):
-            return 'Case Dismissal'
-        
-        # Interim orders
-        if 'interim' in context_lower:
-            return 'Interim Order'
-        
+        (('arrears', 'payment', 'compliance', 'affidavit'), [(('arrears', 'payment'), 'Payment/Arrears')], 'Compliance Filing'),
+        (('hearing', 'heard', 'trial'), [], 'Hearing'),
+        (('settlement', 'settled', 'mediation'), [], 'Settlement'),
+        (('dismissed', 'withdrawn', 'quashed'), [], 'Case Dismissal'),
+        (('interim',), [], 'Interim Order'),
         # Default to a more specific name based on context patterns
-        if 'section' in context_lower:
-            return 'Statutory Reference'
+        (('section',), [], 'Statutory Reference'),
+        (('court',), [], 'Court Proceeding'),
+    ]
+
+    def _classify_event(self, context_line: str) -> str:
+        """Classify an event based on its context with improved specificity"""
+        context_lower = context_line.lower()
         
-        if 'court' in context_lower:
-            return 'Court Proceeding'
+        for triggers, refinements, fallback in self.EVENT_NAME_RULES:
+            if not any(kw in context_lower for kw in triggers):
+                continue
+            name = first_rule(context_lower, refinements, fallback)
+            if name:
+                return name
         
         # Last resort - use a descriptive name instead of "Other"
         return 'Legal Event'
         
     def _create_summary_from_context(self, date_obj: datetime, context_line: str, event_type: str) -> str:
         """Generate a natural 1-4 line summary from context (no dates, natural language, works for any legal document)"""
-        import re
-        
         # Clean context aggressively - remove all citations and noise
         clean_context = context_line.replace('--- PAGE BREAK ---', ' ').replace('PAGE BREAK', ' ')
-        clean_context = re.sub(r'MANU/[^\s]+', '', clean_context)  # Remove citations
-        clean_context = re.sub(r'https?://\S+', '', clean_context)  # Remove URLs
-        clean_context = re.sub(r'\d+\s+Decided by.*?High Court', '', clean_context, flags=re.IGNORECASE)  # Remove "X Decided by..."
-        clean_context = re.sub(r'\d+\s+[A-Z]\.\s+\w+.*?v\.\s+.*?\d{4}', '', clean_context)  # Remove case citations
-        clean_context = re.sub(r'(?:Criminal|Civil)\s+Appeal\s+No\.?\s*\d+.*?of \d{4}', '', clean_context)  # Remove appeal citations
-        clean_context = re.sub(r'IN THE.*?COURT.*?\d{4}', '', clean_context, flags=re.IGNORECASE | re.DOTALL)
-        clean_context = re.sub(r'Decided On:.*?\d{2}\.\d{2}\.\d{4}', '', clean_context)  # Remove "Decided On: date"
-        clean_context = re.sub(r'decided vide.*?\d{4}', '', clean_context, flags=re.IGNORECASE)
-        clean_context = re.sub(r'\d{1,2}\.\d{1,2}\.\d{4}', '', clean_context)  # Remove all dates from context
+        for rule in self.SUMMARY_CLEANING_STEPS:
+            clean_context = SUMMARY_RULES.sub(rule, '', clean_context)
         clean_context = ' '.join(clean_context.split())  # Normalize whitespace
         
         context_lower = clean_context.lower()
         original_context_lower = context_line.lower()  # Keep original for better recipient detection
         
         # Extract amounts and monetary values (general pattern)
-        amount_patterns = [
-            r'Rs\.\s*([0-9,]+(?:\.[0-9]+)?)',  # Indian Rupees
-            r'\$\s*([0-9,]+(?:\.[0-9]+)?)',  # US Dollars
-            r'([0-9,]+(?:\.[0-9]+)?)\s*(?:rupees|dollars)',  # Amount followed by currency word
-        ]
         amount_matches = []
-        for pattern in amount_patterns:
-            amount_matches.extend(list(re.finditer(pattern, context_line, re.IGNORECASE)))
+        for rule in self.SUMMARY_AMOUNT_RULES:
+            amount_matches.extend(SUMMARY_RULES.finditer(rule, context_line))
         
         # Sort by position in document
         amount_matches.sort(key=lambda x: x.start())
@@ -648,23 +840,11 @@ class TimelineAnalyzer:
             
             # Try to find party references (petitioner, respondent, appellant, etc.)
             # Look for numbered parties (Respondent No. 1, Petitioner No. 2, etc.)
-            party_pattern = r'(?:petitioner|respondent|appellant|defendant|plaintiff|applicant)\s+no\.?\s*(\d+)'
-            party_match = re.search(party_pattern, snippet, re.IGNORECASE)
+            party_match = SUMMARY_RULES.search('party_number', snippet)
             
             # Look for role-based references
-            role_patterns = [
-                (r'\bwife\b', 'the wife'),
-                (r'\bhusband\b', 'the husband'),
-                (r'\b(?:son|daughter|child|minor)\b', 'the child'),
-                (r'\bpetitioner\b', 'the petitioner'),
-                (r'\brespondent\b', 'the respondent'),
-                (r'\bappellant\b', 'the appellant'),
-                (r'\bdefendant\b', 'the defendant'),
-                (r'\bplaintiff\b', 'the plaintiff'),
-            ]
-            
-            for pattern, label in role_patterns:
-                if re.search(pattern, snippet, re.IGNORECASE):
+            for rule, label in self.SUMMARY_ROLE_RULES:
+                if SUMMARY_RULES.search(rule, snippet):
                     recipient = label
                     break
             
@@ -678,22 +858,15 @@ class TimelineAnalyzer:
                 recipients.append((amount_text, recipient))
         
         # Extract sections and statutes (general pattern - works for any act/statute)
-        section_match = re.search(r'Section\s+(\d+(?:[A-Za-z])?)', clean_context, re.IGNORECASE)
+        section_match = SUMMARY_RULES.search('section', clean_context)
         section_info = ""
         act_info = ""
         
         if section_match:
             section_num = section_match.group(1)
             # Try to identify the act/statute (general pattern)
-            act_patterns = [
-                (r'(\w+(?:\s+\w+)?(?:\s+Marriage)?\s+Act)', 'Act'),
-                (r'(Code\s+of\s+(?:Criminal|Civil)\s+Procedure)', 'Code'),
-                (r'(\w+\s+Code)', 'Code'),
-                (r'(\w+\s+Act)', 'Act'),
-            ]
-            
-            for pattern, suffix in act_patterns:
-                act_match = re.search(pattern, clean_context, re.IGNORECASE)
+            for rule in self.SUMMARY_ACT_RULES:
+                act_match = SUMMARY_RULES.search(rule, clean_context)
                 if act_match:
                     act_name = act_match.group(1)
                     section_info = f"Section {section_num} of the {act_name}"
@@ -703,23 +876,7 @@ class TimelineAnalyzer:
                 section_info = f"Section {section_num}"
         
         # Identify authority/court (general pattern - works for any court)
-        authority = None
-        court_patterns = [
-            (r'supreme court', 'the Supreme Court'),
-            (r'high court', 'the High Court'),
-            (r'district court', 'the District Court'),
-            (r'family court', 'the Family Court'),
-            (r'sessions court', 'the Sessions Court'),
-            (r'magistrate', 'the Magistrate'),
-            (r'tribunal', 'the Tribunal'),
-            (r'this court', 'the Court'),
-            (r'court', 'the Court'),
-        ]
-        
-        for pattern, label in court_patterns:
-            if re.search(pattern, context_lower):
-                authority = label
-                break
+        authority = first_rule(context_lower, self.SUMMARY_COURT_RULES, None)
         
         # Build main sentence (no date prefix)
         sentence_parts = []
@@ -765,17 +922,8 @@ class TimelineAnalyzer:
                             
                             recipient = None
                             # Use general party detection
-                            for pattern, label in [
-                                (r'\bwife\b', 'the wife'),
-                                (r'\bhusband\b', 'the husband'),
-                                (r'\b(?:son|daughter|child|minor)\b', 'the child'),
-                                (r'petitioner.*?(?:no\.?\s*)?(\d+)', lambda m: f'the petitioner {m.group(1)}'),
-                                (r'respondent.*?(?:no\.?\s*)?(\d+)', lambda m: f'the respondent {m.group(1)}'),
-                                (r'appellant', 'the appellant'),
-                                (r'defendant', 'the defendant'),
-                                (r'plaintiff', 'the plaintiff'),
-                            ]:
-                                match_result = re.search(pattern, snippet, re.IGNORECASE)
+                            for rule, label in self.SUMMARY_RECIPIENT_RULES:
+                                match_result = SUMMARY_RULES.search(rule, snippet)
                                 if match_result:
                                     if callable(label):
                                         recipient = label(match_result)
@@ -952,7 +1100,7 @@ class TimelineAnalyzer:
                 appeal_num = None
                 
                 # Try to extract appeal number
-                appeal_match = re.search(r'(?:Criminal|Civil)\s+Appeal\s+(?:No\.?\s*)?(\d+(?:\/\d+)?)', context_line, re.IGNORECASE)
+                appeal_match = SUMMARY_RULES.search('appeal_number', context_line)
                 if appeal_match:
                     appeal_num = appeal_match.group(1)
                     if 'criminal' in appeal_match.group(0).lower():
@@ -1010,7 +1158,7 @@ class TimelineAnalyzer:
                         if section_info:
                             judgment_subject = f"passport impounding under {section_info}"
                 elif 'constitution' in context_lower or 'article' in context_lower:
-                    article_match = re.search(r'Article\s+(\d+)', context_line, re.IGNORECASE)
+                    article_match = SUMMARY_RULES.search('article', context_line)
                     if article_match:
                         judgment_subject = f"constitutional rights under Article {article_match.group(1)}"
                     else:
@@ -1043,7 +1191,7 @@ class TimelineAnalyzer:
                     main_sentence = f"{authority if authority else 'The Court'} delivered a judgment on {judgment_subject}."
                 else:
                     # Try to extract case parties or key issue
-                    case_match = re.search(r'([A-Z][a-z]+\s+(?:v\.?|vs\.?)\s+[A-Z][^.]{10,40})', context_line)
+                    case_match = SUMMARY_RULES.search('case_name', context_line)
                     if case_match:
                         case_name = case_match.group(1).strip()
                         main_sentence = f"{authority if authority else 'The Court'} delivered a judgment in {case_name}."
@@ -1134,7 +1282,7 @@ class TimelineAnalyzer:
                     else:
                         main_sentence = f"{authority if authority else 'The Court'} addressed matters related to passport issuance and regulations."
                 elif 'constitution' in context_lower or 'article' in context_lower:
-                    article_match = re.search(r'Article\s+(\d+)', context_line, re.IGNORECASE)
+                    article_match = SUMMARY_RULES.search('article', context_line)
                     if article_match:
                         main_sentence = f"{authority if authority else 'The Court'} addressed issues relating to fundamental rights under Article {article_match.group(1)} of the Constitution."
                     else:
@@ -1150,7 +1298,7 @@ class TimelineAnalyzer:
                         main_sentence = f"{authority if authority else 'The Court'} took action addressing important legal issues in the case."
         
         # Add period information if available
-        period_match = re.search(r'(?:from|since|w\.e\.f\.|with effect from)\s+(\d{1,2}\.\d{1,2}\.\d{4})', context_line, re.IGNORECASE)
+        period_match = SUMMARY_RULES.search('effective_period', context_line)
         if period_match:
             period_date = period_match.group(1)
             additional_info.append(f"The order was effective from {period_date}.")
@@ -1278,7 +1426,7 @@ class TimelineAnalyzer:
                 # For judgments, always add explanation of what was decided
                 if 'challenged' in context_lower or 'challenge' in context_lower:
                     # Extract what was challenged
-                    challenge_match = re.search(r'challeng(?:ed|ing)\s+(?:the\s+)?([^.]+?)(?:\.|$)', context_lower)
+                    challenge_match = SUMMARY_RULES.search('challenged_subject', context_lower)
                     if challenge_match:
                         challenge_text = challenge_match.group(1).strip()[:80]
                         additional_info.append(f"The judgment addressed challenges regarding {challenge_text}.")
@@ -1287,7 +1435,7 @@ class TimelineAnalyzer:
                 
                 # Try to extract court's holding
                 if 'held' in context_lower:
-                    held_match = re.search(r'held\s+that\s+([^.]+?)(?:\.|$)', context_lower)
+                    held_match = SUMMARY_RULES.search('held_that', context_lower)
                     if held_match:
                         held_text = held_match.group(1).strip()[:100]
                         additional_info.append(f"The Court held that {held_text}.")
@@ -1360,27 +1508,52 @@ class TimelineAnalyzer:
             'lineNumber': line_num
         }
         
-    def extract_timeline_events(self, text: str) -> List[Dict[str, Any]]:
-        """Extract all events from document with deterministic sorting"""
-        
-        # Extract all dates using class method
-        dates_with_context = DateExtractor.extract_dates_from_text(text)
-        
-        if not dates_with_context:
-            return []
-        
+    # Documents shorter than this are not worth starting a process pool for
+    PARALLEL_MIN_CHARS = 1_000_000
+    # Shards per worker, so uneven pages still balance across the pool
+    SHARDS_PER_WORKER = 4
+    PAGE_BREAK_LINE = '--- PAGE BREAK ---'
+
+    @classmethod
+    def resolve_workers(cls, text: str, workers: Optional[int] = None) -> int:
+        """Worker count for a document: all cores for large documents unless given"""
+        if workers is None:
+            workers = (os.cpu_count() or 1) if len(text) >= cls.PARALLEL_MIN_CHARS else 1
+        return max(1, workers)
+
+    @classmethod
+    def _shard_line_ranges(cls, lines: List[str], n_shards: int) -> List[Tuple[int, int]]:
+        """Split lines into about n_shards contiguous [first, end) ranges of similar size.
+
+        Ranges are cut at page breaks when the text has them, otherwise at any line.
+        """
+        line_starts = DateExtractor._line_starts(lines)
+        target = (line_starts[-1] + len(lines[-1])) / max(1, n_shards)
+        cuts = [i for i, line in enumerate(lines) if line == cls.PAGE_BREAK_LINE] or range(1, len(lines))
+        ranges = []
+        first = 0
+        for cut in cuts:
+            if line_starts[cut] - line_starts[first] >= target:
+                ranges.append((first, cut))
+                first = cut
+        ranges.append((first, len(lines)))
+        return ranges
+
+    @staticmethod
+    def _index_events(dates_with_context: List[Tuple[datetime, str, int]]) -> List[Tuple[datetime, str, int, int]]:
+        """Drop filler contexts, sort deterministically and number events within each date"""
         # Filter and classify events
         valid_events = []
         for date_obj, context_line, line_num in dates_with_context:
-            if DateExtractor._is_filler_context({word.lower() for word in context_line.split()}):
+            if DateExtractor._is_filler_context(context_line):
                 continue
             valid_events.append((date_obj, context_line, line_num))
         
         # Sort by date, then line number for determinism
         valid_events.sort(key=lambda x: (x[0], x[2]))
         
-        # Create final event list with proper indexing
-        events = []
+        # Proper indexing: the counter resets for each new date
+        indexed = []
         current_date = None
         date_index = 0
         
@@ -1390,39 +1563,176 @@ class TimelineAnalyzer:
                 current_date = date_obj
                 date_index = 1
             
-            event = self._create_event(date_obj, context_line, line_num, date_index)
-            events.append(event)
-            
+            indexed.append((date_obj, context_line, line_num, date_index))
             date_index += 1
             
-        return events
+        return indexed
+
+    @traced('extract')
+    def extract_timeline_events(self, text: str, workers: Optional[int] = 1) -> List[Dict[str, Any]]:
+        """Extract all events from document with deterministic sorting
+
+        With workers > 1 (None picks a count from the document size) date scanning
+        and summary generation run in a process pool over page-aligned shards; the
+        result is identical to the single-process run.
+        """
+        workers = self.resolve_workers(text, workers)
+        TRACER.annotate(chars=len(text), workers=workers)
+        if workers > 1:
+            try:
+                return self._extract_timeline_events_parallel(text, workers)
+            except (OSError, BrokenProcessPool) as e:
+                print(f"[timeline-analyzer] Warning: parallel extraction unavailable ({e}), using one process",
+                      file=sys.stderr)
+        
+        # Extract all dates using class method
+        dates_with_context = DateExtractor.extract_dates_from_text(text)
+        
+        if not dates_with_context:
+            return []
+        
+        # Create final event list with proper indexing
+        return [self._create_event(*item) for item in self._index_events(dates_with_context)]
+
+    def _extract_timeline_events_parallel(self, text: str, workers: int) -> List[Dict[str, Any]]:
+        """Page-sharded extraction; shards are merged in text order before dedup and sorting"""
+        shards = self._shard_line_ranges(text.split('\n'), workers * self.SHARDS_PER_WORKER)
+        workers = min(workers, len(shards))
+        
+        # Each worker gets the whole text once, so context windows at shard edges
+        # read the neighbouring lines exactly as a single-process scan would
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_timeline_worker,
+                                 initargs=(text,)) as pool:
+            dated = chain.from_iterable(pool.map(_dates_in_shard, shards))
+            dates_with_context = DateExtractor.extract_dates_from_text(text, dated=dated)
+            
+            if not dates_with_context:
+                return []
+            
+            indexed = self._index_events(dates_with_context)
+            batch_size = max(1, -(-len(indexed) // (workers * self.SHARDS_PER_WORKER)))
+            batches = [indexed[i:i + batch_size] for i in range(0, len(indexed), batch_size)]
+            return list(chain.from_iterable(pool.map(_events_for_batch, batches)))
         
+    # Events are extracted from pages with repeated headers/footers stripped (see boilerplate.py)
+    CLEAN_PAGES = True
 
-    
-    def analyze_document(self, pdf_path: str, output_dir: Optional[str] = None) -> Dict[str, Any]:
-        """Complete timeline analysis for a document"""
+    # Bump whenever extraction or summary code changes its output; the pattern and
+    # keyword tables are folded into the version stamp automatically
+    EXTRACTOR_REVISION = 3
+    _extractor_version: Optional[str] = None
+
+    @classmethod
+    def extractor_version(cls) -> str:
+        """Short stamp of everything that shapes extracted events"""
+        if cls._extractor_version is None:
+            tables = json.dumps([
+                cls.EXTRACTOR_REVISION,
+                DateExtractor.DATE_PATTERNS,
+                DateExtractor.HEADER_PATTERNS,
+                DateExtractor.EVENT_KEYWORDS,
+                DateExtractor.FILLER_PATTERNS,
+                cls.EVENT_NAME_RULES,
+            ], sort_keys=True)
+            cls._extractor_version = hashlib.sha1(tables.encode('utf-8')).hexdigest()[:12]
+        return cls._extractor_version
+
+    def _extract_document_events(self, pdf_path: str, workers: Optional[int]) -> List[Dict[str, Any]]:
+        """Events of a PDF. One process scans the registry's pages as they stream, holding a
+        window of lines; a process pool (large documents) shards the joined text"""
+        registry = DocumentRegistry.default()
+        if workers is None:
+            # Sized from the pages read so far: a document reaching PARALLEL_MIN_CHARS goes to
+            # the pool, the rest of the stream continues from where the count stopped
+            pages = registry.iter_pages(pdf_path, clean=self.CLEAN_PAGES)
+            head, chars = [], 0
+            for page in pages:
+                head.append(page)
+                chars += len(page.page_content)
+                if chars >= self.PARALLEL_MIN_CHARS:
+                    break
+            workers = (os.cpu_count() or 1) if chars >= self.PARALLEL_MIN_CHARS else 1
+            pages = chain(head, pages)
+        elif max(1, workers) > 1:
+            return self.extract_timeline_events(self.load_document(pdf_path, workers), workers=workers)
+        else:
+            pages = registry.iter_pages(pdf_path, workers, clean=self.CLEAN_PAGES)
+        if workers > 1:
+            return self.extract_timeline_events(join_pages(pages, PAGE_SEPARATOR), workers=workers)
+        with TRACER.span('extract', workers=1, streamed=True):
+            dated = DateExtractor._dedup_dates(DateExtractor.iter_dates_in_pages(page.page_content for page in pages))
+            if not dated:
+                # No strict date anywhere: the loose pass needs the whole text
+                dated = DateExtractor.extract_dates_from_text(self.load_document(pdf_path, workers))
+            return [self._create_event(*item) for item in self._index_events(dated)]
+
+    @classmethod
+    def result_cache_path(cls, cache_dir: str, pdf_path: str) -> Path:
+        """Cache file for a document's timeline: keyed by PDF content, not by its (temporary) path,
+        and by the text it was extracted from (the registry entry: text backend, cleaning, version)"""
+        entry = DocumentRegistry.default().entry_path(pdf_path, clean=cls.CLEAN_PAGES)
+        return Path(cache_dir) / f"{entry.stem}_{cls.extractor_version()}.json"
+
+    @staticmethod
+    def _load_cached_result(cache_file: Path) -> Optional[Dict[str, Any]]:
+        if not cache_file.exists():
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[timeline-analyzer] Warning: ignoring unreadable cache {cache_file.name}: {e}", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def _store_cached_result(cache_file: Path, result: Dict[str, Any]) -> None:
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so concurrent requests never read a partial file
+            tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f, default=str)
+            os.replace(tmp_file, cache_file)
+        except OSError as e:
+            print(f"[timeline-analyzer] Warning: could not cache timeline: {e}", file=sys.stderr)
+
+    @traced('pipeline')
+    def analyze_document(self, pdf_path: str, output_dir: Optional[str] = None,
+                         workers: Optional[int] = None, cache_dir: Optional[str] = None) -> Dict[str, Any]:
+        """Complete timeline analysis for a document
+        workers: process count for PDF parsing and extraction (None: all cores for large documents)
+        cache_dir: reuse results for identical PDFs across runs (keyed by content hash and extractor version)"""
         
         try:
-            # Load document
-            text = self.load_document(pdf_path)
-            
-            # Extract events
-            events = self.extract_timeline_events(text)
+            cache_file = self.result_cache_path(cache_dir, pdf_path) if cache_dir else None
+            result = self._load_cached_result(cache_file) if cache_file else None
+            TRACER.annotate(cached=result is not None)
+            if cache_file:
+                CACHE_LOOKUPS.inc(cache='timeline_result', result='miss' if result is None else 'hit')
             
-            # Create summary statistics
-            summary = {
-                'total_events': len(events),
-                'event_types': self._count_event_types(events),
-                'date_range': self._get_date_range(events),
-                'first_event': events[0] if events else None,
-                'last_event': events[-1] if events else None,
-            }
+            if result is None:
+                events = self._extract_document_events(pdf_path, workers)
+                
+                # Create summary statistics
+                summary = {
+                    'total_events': len(events),
+                    'event_types': self._count_event_types(events),
+                    'date_range': self._get_date_range(events),
+                    'first_event': events[0] if events else None,
+                    'last_event': events[-1] if events else None,
+                }
+                
+                result = {
+                    'events': events,
+                    'summary': summary,
+                    'success': True
+                }
+                
+                if cache_file:
+                    self._store_cached_result(cache_file, result)
             
-            result = {
-                'events': events,
-                'summary': summary,
-                'success': True
-            }
+            events = result['events']
+            TRACER.annotate(events=len(events))
             
             # Cache results if output_dir provided
             if output_dir and len(events) > 0:
@@ -1485,3 +1795,30 @@ class TimelineAnalyzer:
             'start': events[0]['date'],
             'end': events[-1]['date']
         }
+
+
+# Per-process state for parallel extraction, set once per worker by _init_timeline_worker
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_timeline_worker(text: str) -> None:
+    lines = text.split('\n')
+    _WORKER_STATE.update(
+        text=text,
+        lines=lines,
+        line_starts=DateExtractor._line_starts(lines),
+        stripped=[line.strip() for line in lines],
+        analyzer=TimelineAnalyzer(),
+    )
+
+
+def _dates_in_shard(line_range: Tuple[int, int]) -> List[Tuple[datetime, str, int]]:
+    state = _WORKER_STATE
+    return DateExtractor._dates_in_line_range(
+        state['text'], state['lines'], state['line_starts'], state['stripped'], *line_range
+    )
+
+
+def _events_for_batch(batch: List[Tuple[datetime, str, int, int]]) -> List[Dict[str, Any]]:
+    analyzer = _WORKER_STATE['analyzer']
+    return [analyzer._create_event(*item) for item in batch]
@@ -11,15 +11,20 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 
+CURRENT_DIR = Path(__file__).parent.resolve()
+PROJECT_ROOT = CURRENT_DIR.parent.parent
+
 # Load environment variables
-load_dotenv(Path(__file__).parent.parent.parent / '.env')
+load_dotenv(PROJECT_ROOT / '.env')
 
 # Add parent to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(CURRENT_DIR))
 
 # Import timeline analyzer
 try:
-    from timeline_analyzer import TimelineAnalyzer
+    from timeline_analyzer import TimelineAnalyzer, DEFAULT_RESULT_CACHE_DIR
+    from tracing import TRACER
+    from metrics import track_request
 except ImportError as e:
     print(json.dumps({
         "error": f"Failed to import TimelineAnalyzer: {e}",
@@ -33,6 +38,11 @@ def main():
     parser = argparse.ArgumentParser(description="Timeline Analysis CLI")
     parser.add_argument("--pdf", type=str, help="Path to PDF file")
     parser.add_argument("--output", type=str, help="Output directory for caching")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for PDF parsing and extraction (default: all cores for large documents)")
+    parser.add_argument("--cache-dir", type=str, default=str(DEFAULT_RESULT_CACHE_DIR),
+                        help="Timeline result cache, keyed by PDF content and extractor version")
+    parser.add_argument("--no-cache", action="store_true", help="Always re-run extraction")
     
     args = parser.parse_args()
     
@@ -91,7 +101,10 @@ def main():
         # Analyze timeline with timeout protection
         try:
             analyzer = TimelineAnalyzer()
-            result = analyzer.analyze_document(str(pdf_path), output_dir)
+            result = analyzer.analyze_document(
+                str(pdf_path), output_dir, workers=args.workers,
+                cache_dir=None if args.no_cache else args.cache_dir,
+            )
             
             # Ensure result has required fields
             if not isinstance(result, dict):
@@ -102,11 +115,13 @@ def main():
                 result['events'] = []
             if 'success' not in result:
                 result['success'] = False
+            result['timings'] = TRACER.timings()
             
             # Return results - ONLY output valid JSON
             result_json = json.dumps(result, default=str)
             print(result_json)
             sys.stdout.flush()  # Ensure output is flushed immediately
+            TRACER.export()
             sys.exit(0 if result.get('success', False) else 1)
             
         except KeyboardInterrupt:
@@ -138,4 +153,5 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    with track_request('timeline'):
+        main()
@@ -0,0 +1,197 @@
+"""
+Token Estimator
+Local prompt-size estimates for Gemini calls (no API round trip), a ledger of
+every LLM call, and a prompt budget with split/map-reduce helpers
+"""
+
+import os
+import math
+import time
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from tracing import TRACER
+from metrics import LLM_REQUESTS, LLM_SECONDS, LLM_TOKENS, is_rate_limit_error
+
+# Gemini's documented rule of thumb for English text: about 4 characters per token
+CHARS_PER_TOKEN = 4
+
+# Largest prompt (in estimated tokens) sent in one call; bigger inputs are split or map-reduced
+PROMPT_TOKEN_BUDGET = int(os.environ.get("LLM_PROMPT_TOKEN_BUDGET", "100000"))
+# Map-reduce passes before giving up on shrinking an input
+MAX_REDUCE_ROUNDS = 3
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a text"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _response_text(response: Any) -> str:
+    if isinstance(response, str):
+        return response
+    if isinstance(response, dict):
+        # LangChain chain output
+        return str(response.get('result', ''))
+    try:
+        return response.text or ''
+    except Exception:
+        # Blocked or empty candidates make .text raise
+        return ''
+
+
+class TokenLedger:
+    """
+    Per-process record of LLM calls: label, model, prompt/output tokens, latency.
+
+    Token counts come from the response's usage_metadata when the API returns
+    it (google.generativeai responses) and from estimate_tokens otherwise
+    (LangChain's predict returns plain text). Every CLI handles one document
+    per process, so totals() is the per-document cost.
+    """
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, label: str, model: str, prompt_tokens: int, output_tokens: int,
+               latency_ms: float, estimated: bool = True) -> None:
+        with self._lock:
+            self.calls.append({
+                'label': label, 'model': model,
+                'prompt_tokens': prompt_tokens, 'output_tokens': output_tokens,
+                'latency_ms': round(latency_ms, 1), 'estimated': estimated,
+            })
+
+    def track(self, label: str, model: str, prompt: str, call: Callable[[], Any]) -> Any:
+        """Run call() (which sends prompt) in an 'llm.<label>' span, record it, and return its response.
+
+        Failed calls are recorded with no output tokens and the error re-raised.
+        """
+        with TRACER.span(f'llm.{label}', model=model) as span:
+            start = time.perf_counter()
+            try:
+                response = call()
+            except Exception as e:
+                self.record(label, model, estimate_tokens(prompt), 0, (time.perf_counter() - start) * 1000)
+                span.set(prompt_tokens=estimate_tokens(prompt))
+                LLM_REQUESTS.inc(label=label, status='rate_limited' if is_rate_limit_error(e) else 'error')
+                raise
+            latency_ms = (time.perf_counter() - start) * 1000
+
+            usage = getattr(response, 'usage_metadata', None)
+            if usage is not None and getattr(usage, 'prompt_token_count', None):
+                prompt_tokens, output_tokens = usage.prompt_token_count, getattr(usage, 'candidates_token_count', 0) or 0
+                self.record(label, model, prompt_tokens, output_tokens, latency_ms, estimated=False)
+            else:
+                prompt_tokens, output_tokens = estimate_tokens(prompt), estimate_tokens(_response_text(response))
+                self.record(label, model, prompt_tokens, output_tokens, latency_ms)
+            span.set(prompt_tokens=prompt_tokens, output_tokens=output_tokens)
+        LLM_REQUESTS.inc(label=label, status='ok')
+        LLM_SECONDS.observe(latency_ms / 1000, label=label)
+        LLM_TOKENS.inc(prompt_tokens, label=label, kind='prompt')
+        LLM_TOKENS.inc(output_tokens, label=label, kind='output')
+        return response
+
+    def totals(self) -> Dict[str, Any]:
+        """Call count, token and latency sums, overall and per label"""
+        with self._lock:
+            calls = list(self.calls)
+        by_label: Dict[str, Dict[str, Any]] = {}
+        for call in calls:
+            entry = by_label.setdefault(call['label'], {'calls': 0, 'prompt_tokens': 0,
+                                                        'output_tokens': 0, 'latency_ms': 0.0})
+            entry['calls'] += 1
+            entry['prompt_tokens'] += call['prompt_tokens']
+            entry['output_tokens'] += call['output_tokens']
+            entry['latency_ms'] = round(entry['latency_ms'] + call['latency_ms'], 1)
+        return {
+            'calls': len(calls),
+            'prompt_tokens': sum(c['prompt_tokens'] for c in calls),
+            'output_tokens': sum(c['output_tokens'] for c in calls),
+            'latency_ms': round(sum(c['latency_ms'] for c in calls), 1),
+            'models': sorted({c['model'] for c in calls}),
+            'by_label': by_label,
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = []
+
+
+# Shared ledger for the whole process
+LEDGER = TokenLedger()
+
+
+def split_text(text: str, budget: int) -> List[str]:
+    """Cut a text into pieces of at most budget tokens, at paragraph breaks where possible"""
+    max_chars = max(1, budget * CHARS_PER_TOKEN)
+    pieces = []
+    while len(text) > max_chars:
+        cut = text.rfind('\n\n', 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text:
+        pieces.append(text)
+    return pieces
+
+
+def split_to_budget(items: List[str], budget: int, overhead: int = 0) -> List[List[str]]:
+    """Group consecutive items so each group's text plus overhead fits in budget.
+
+    An item too large on its own is split (split_text) into several groups.
+    """
+    room = max(1, budget - overhead)
+    groups: List[List[str]] = []
+    current: List[str] = []
+    current_tokens = 0
+    for item in items:
+        tokens = estimate_tokens(item)
+        if tokens > room:
+            if current:
+                groups.append(current)
+                current, current_tokens = [], 0
+            groups.extend([piece] for piece in split_text(item, room))
+            continue
+        if current and current_tokens + tokens > room:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(item)
+        current_tokens += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+
+def reduce_to_budget(items: List[str], overhead: int, condense: Callable[[List[str]], str],
+                     budget: Optional[int] = None, label: str = 'prompt') -> List[str]:
+    """Map-reduce items until they fit in one prompt of budget tokens (with overhead).
+
+    Each pass condenses budget-sized groups with condense(group) -> text.
+    Items that already fit are returned unchanged, so small documents make no
+    extra calls. Items still over the budget after MAX_REDUCE_ROUNDS passes
+    are cut down (truncate_to_budget), so the prompt always fits.
+    """
+    budget = budget or PROMPT_TOKEN_BUDGET
+    for round_num in range(1, MAX_REDUCE_ROUNDS + 1):
+        if sum(estimate_tokens(item) for item in items) + overhead <= budget:
+            return items
+        groups = split_to_budget(items, budget, overhead)
+        print(f"   ✂️  {label}: {len(items)} parts over the {budget}-token budget, "
+              f"condensing into {len(groups)} (pass {round_num})")
+        items = [condense(group) for group in groups]
+    if sum(estimate_tokens(item) for item in items) + overhead <= budget:
+        return items
+    print(f"   ⚠️  {label}: still over the {budget}-token budget after {MAX_REDUCE_ROUNDS} passes, truncating")
+    return truncate_to_budget(items, budget, overhead)
+
+
+def truncate_to_budget(items: List[str], budget: int, overhead: int = 0) -> List[str]:
+    """Cut every item by the same share so all of them plus overhead fit in budget"""
+    room = max(0, budget - overhead)
+    total = sum(estimate_tokens(item) for item in items)
+    if total <= room:
+        return items
+    return [item[:(estimate_tokens(item) * room // total) * CHARS_PER_TOKEN] for item in items]
@@ -0,0 +1,195 @@
+"""
+Tracing
+Nested timing spans for pipeline stages (load, chunk, embed, index, LLM calls,
+post-processing, save), a per-run timings summary for CLI output, and optional
+OpenTelemetry-compatible export (OTLP JSON, one line per run) to a file
+"""
+
+import os
+import sys
+import json
+import time
+import secrets
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+SERVICE_NAME = "kanunai-ai-service"
+# OTLP JSON lines are appended here at the end of each CLI run when set
+TRACE_EXPORT_FILE_ENV = "TRACE_EXPORT_FILE"
+# Spans listed individually in timings() (with their attributes)
+SLOWEST_SPANS = 5
+
+
+class Span:
+    """One timed operation: name, parent, attributes and duration"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._start = time.perf_counter()
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes (chunk id, pages, tokens, ...)"""
+        self.attributes.update(attributes)
+
+    def end(self) -> None:
+        self.duration_ms = round((time.perf_counter() - self._start) * 1000, 1)
+        self.end_ns = self.start_ns + int(self.duration_ms * 1e6)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        # OTLP JSON carries 64-bit integers as strings
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Tracer:
+    """
+    Per-process span recorder. Spans nest through a context variable, so
+    a span opened inside another becomes its child; worker threads see the
+    caller's span when their function is wrapped with propagate(). Every CLI
+    handles one document per process, so one tracer run is one trace.
+    """
+
+    def __init__(self, service_name: str = SERVICE_NAME):
+        self.service_name = service_name
+        self.trace_id = secrets.token_hex(16)
+        self.spans: List[Span] = []
+        self._current: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        """Time the enclosed block as a child of the current span"""
+        parent = self._current.get()
+        span = Span(name, self.trace_id, parent.span_id if parent else None, attributes)
+        token = self._current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current.reset(token)
+            span.end()
+            with self._lock:
+                self.spans.append(span)
+
+    def traced(self, name: str) -> Callable:
+        """Decorator: run the function inside span(name)"""
+        def decorator(fn: Callable) -> Callable:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def current(self) -> Optional[Span]:
+        return self._current.get()
+
+    def annotate(self, **attributes: Any) -> None:
+        """Add attributes to the current span, if any"""
+        span = self._current.get()
+        if span is not None:
+            span.set(**attributes)
+
+    def propagate(self, fn: Callable) -> Callable:
+        """fn running under the caller's current span (for thread pools)"""
+        context = contextvars.copy_context()
+
+        @functools.wraps(fn)
+        def run(*args, **kwargs):
+            # Each call gets its own copy: a Context can only be entered by one thread at a time
+            return context.copy().run(fn, *args, **kwargs)
+        return run
+
+    def timings(self) -> Dict[str, Any]:
+        """Summary for CLI output: run wall time, per-stage call counts and time
+        (in order of first start; nested stages overlap their parents, and
+        concurrent calls add up past wall time), and the slowest spans"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start_ns)
+        if not spans:
+            return {'total_ms': 0.0, 'stages': [], 'slowest': []}
+        stages: Dict[str, Dict[str, Any]] = {}
+        for span in spans:
+            entry = stages.setdefault(span.name, {'name': span.name, 'calls': 0, 'total_ms': 0.0,
+                                                  'max_ms': 0.0, 'errors': 0})
+            entry['calls'] += 1
+            entry['total_ms'] = round(entry['total_ms'] + span.duration_ms, 1)
+            entry['max_ms'] = max(entry['max_ms'], span.duration_ms)
+            entry['errors'] += span.error is not None
+        slowest = sorted(spans, key=lambda s: -s.duration_ms)[:SLOWEST_SPANS]
+        return {
+            'total_ms': round((max(s.end_ns for s in spans) - spans[0].start_ns) / 1e6, 1),
+            'stages': list(stages.values()),
+            'slowest': [{'name': s.name, 'ms': s.duration_ms, **s.attributes} for s in slowest],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        """Finished spans as an OTLP/JSON ExportTraceServiceRequest"""
+        with self._lock:
+            spans = list(self.spans)
+        return {'resourceSpans': [{
+            'resource': {'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': self.service_name}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}},
+            ]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [{
+                    'traceId': span.trace_id,
+                    'spanId': span.span_id,
+                    **({'parentSpanId': span.parent_id} if span.parent_id else {}),
+                    'name': span.name,
+                    'kind': 1,  # SPAN_KIND_INTERNAL
+                    'startTimeUnixNano': str(span.start_ns),
+                    'endTimeUnixNano': str(span.end_ns),
+                    'attributes': [{'key': key, 'value': _otlp_value(value)}
+                                   for key, value in span.attributes.items() if value is not None],
+                    # STATUS_CODE_ERROR = 2, STATUS_CODE_UNSET = 0
+                    'status': {'code': 2, 'message': span.error} if span.error else {'code': 0},
+                } for span in spans],
+            }],
+        }]}
+
+    def export(self, path: Optional[str] = None) -> Optional[str]:
+        """Append this run's spans as one OTLP JSON line to path (default: $TRACE_EXPORT_FILE).
+        Does nothing without a path; export failures never fail the run."""
+        path = path or os.environ.get(TRACE_EXPORT_FILE_ENV)
+        if not path or not self.spans:
+            return None
+        try:
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.to_otlp()) + "\n")
+        except OSError as e:
+            print(f"[tracing] Could not export trace to {path}: {e}", file=sys.stderr)
+            return None
+        return path
+
+    def reset(self) -> None:
+        """Drop finished spans and start a new trace"""
+        with self._lock:
+            self.spans = []
+        self.trace_id = secrets.token_hex(16)
+
+
+# Shared tracer for the whole process
+TRACER = Tracer()
+traced = TRACER.traced
@@ -0,0 +1,134 @@
+"""
+Background Vector Index
+Builds the chat vector store off the summary's critical path: summarize_cli
+hands the build to a detached `qa_cli --init --session` process and returns.
+A lock file (the building process's pid) and a status marker in the session's
+cache dir let qa_cli wait for a running build instead of starting another.
+"""
+
+import os
+import sys
+import json
+import time
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from metrics import pid_alive
+
+QA_CLI = Path(__file__).resolve().parent / "qa_cli.py"
+LOCK_FILE = "vectorstore.lock"
+STATUS_FILE = "vectorstore.status.json"
+LOG_FILE = "vectorstore.log"
+# How long qa_cli waits for a running build before answering without one
+BUILD_WAIT_SECONDS = float(os.environ.get("VECTORSTORE_WAIT_SECONDS", "300"))
+# Set for the background build: the pid that took the lock on its behalf
+HANDOFF_ENV = "VECTORSTORE_LOCK_FROM"
+
+
+def read_status(cache_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads((Path(cache_dir) / STATUS_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def write_status(cache_dir: str, state: str, **info: Any) -> None:
+    """building / ready / failed, replaced atomically"""
+    path = Path(cache_dir) / STATUS_FILE
+    tmp_file = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp_file.write_text(json.dumps({'state': state, 'updated': time.time(), **info}), encoding='utf-8')
+    os.replace(tmp_file, path)
+
+
+def _lock_owner(cache_dir: str) -> Optional[int]:
+    """pid of the live process building this session's index, if any"""
+    try:
+        pid = int((Path(cache_dir) / LOCK_FILE).read_text().strip() or 0)
+    except (OSError, ValueError):
+        return None
+    return pid if pid_alive(pid) else None
+
+
+def claim_build(cache_dir: str) -> bool:
+    """Take the build lock for this process. False if another live process holds it
+    (the process that spawned this one, named in VECTORSTORE_LOCK_FROM, hands it over)."""
+    pid = os.getpid()
+    lock = Path(cache_dir) / LOCK_FILE
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    for _ in range(2):
+        try:
+            fd = os.open(str(lock), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            owner = _lock_owner(cache_dir)
+            if owner == pid:
+                return True
+            if owner is not None and str(owner) == os.environ.get(HANDOFF_ENV):
+                lock.write_text(str(pid))
+                write_status(cache_dir, 'building', pid=pid)
+                return True
+            if owner is not None:
+                return False
+            # Left behind by a build that died: take it over
+            try:
+                lock.unlink()
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(pid))
+        write_status(cache_dir, 'building', pid=pid)
+        return True
+    return False
+
+
+def finish_build(cache_dir: str, ok: bool, error: Optional[str] = None) -> None:
+    write_status(cache_dir, 'ready' if ok else 'failed', **({'error': error} if error else {}))
+    try:
+        (Path(cache_dir) / LOCK_FILE).unlink()
+    except FileNotFoundError:
+        pass
+
+
+def is_ready(cache_dir: str) -> bool:
+    """Saved index and no build in progress (caches from before the marker count as ready)"""
+    if not (Path(cache_dir) / "vectorstore").exists() or _lock_owner(cache_dir) is not None:
+        return False
+    status = read_status(cache_dir)
+    return status is None or status['state'] == 'ready'
+
+
+def wait_for_build(cache_dir: str, timeout: float = BUILD_WAIT_SECONDS, poll: float = 0.5) -> bool:
+    """Wait while another process builds the index; True once it is ready"""
+    deadline = time.monotonic() + timeout
+    owner = _lock_owner(cache_dir)
+    if owner is not None and str(owner) == os.environ.get(HANDOFF_ENV):
+        # Held for us by the summary process that spawned this build: claim it and build
+        return False
+    if owner is not None and owner != os.getpid():
+        print(f"[vector_index] Waiting for the background build (pid {owner})...", file=sys.stderr)
+        while _lock_owner(cache_dir) is not None and time.monotonic() < deadline:
+            time.sleep(poll)
+    return is_ready(cache_dir)
+
+
+def start_background_build(session: str, cache_dir: str) -> Optional[int]:
+    """Spawn a detached `qa_cli --init --session` that outlives this process; its pid,
+    or None when a build is already running. The lock is taken here and handed to
+    the child, so a chat request arriving right away already sees the build."""
+    if not claim_build(cache_dir):
+        return None
+    kwargs: Dict[str, Any] = {'env': dict(os.environ, **{HANDOFF_ENV: str(os.getpid())})}
+    if os.name == 'nt':
+        kwargs['creationflags'] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs['start_new_session'] = True
+    try:
+        with open(Path(cache_dir) / LOG_FILE, 'ab') as log:
+            child = subprocess.Popen([sys.executable, str(QA_CLI), "--init", "--session", session],
+                                     cwd=str(QA_CLI.parent), stdin=subprocess.DEVNULL,
+                                     stdout=subprocess.DEVNULL, stderr=log, **kwargs)
+    except OSError as e:
+        finish_build(cache_dir, False, f"could not start build: {e}")
+        raise
+    return child.pid